@@ -0,0 +1,145 @@
+"""
+Small caches for data which rarely changes on the Hub, e.g. license texts
+
+Cache is a thread safe LRU held in memory, with optional expiry and optional persistence to a
+folder so that entries survive across runs. Values must be JSON serializable to be persisted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class Cache:
+    """Thread safe LRU cache with optional expiry and disk persistence.
+
+    None is a valid value, so a lookup which found nothing can be remembered as well
+    (a negative hit) and told apart from a key that was never looked up.
+
+    Usage:
+        texts = Cache(maxsize=2000, ttl=7 * 24 * 3600, folder='.cache/license-texts')
+        text = texts.get_or_load(license_href, fetch_text)
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, folder=None):
+        """
+        Args:
+            maxsize (int): number of entries kept in memory, least recently used are evicted first.
+                           Defaults to 1024.
+            ttl (float): seconds after which an entry is stale and reloaded. Defaults to None (never).
+            folder (str): optional, where entries are persisted, one JSON file per key
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.folder = folder
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if folder:
+            os.makedirs(folder, 0o755, True)
+
+    def _is_fresh(self, stored):
+        return self.ttl is None or time.time() - stored < self.ttl
+
+    def _pathname(self, key):
+        return os.path.join(self.folder, hashlib.sha1(str(key).encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, key):
+        try:
+            with open(self._pathname(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING, None
+        if entry.get('key') != key:
+            return _MISSING, None
+        return entry['value'], entry['stored']
+
+    def _write(self, key, value, stored):
+        pathname = self._pathname(key)
+        tmp_pathname = f"{pathname}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_pathname, 'w') as f:
+                json.dump({'key': key, 'stored': stored, 'value': value}, f)
+            os.replace(tmp_pathname, pathname)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not persist cache entry {key}: {e}")
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        if self.folder:
+            value, stored = self._read(key)
+            if value is not _MISSING and self._is_fresh(stored):
+                self._store(key, value, stored)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return _MISSING
+
+    def _store(self, key, value, stored):
+        with self._lock:
+            self._entries[key] = (stored, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the fresh value stored for key, or default"""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def put(self, key, value):
+        """Store value under key, in memory and (with a folder) on disk"""
+        stored = time.time()
+        self._store(key, value, stored)
+        if self.folder:
+            self._write(key, value, stored)
+
+    def get_or_load(self, key, loader):
+        """Return the value stored for key, calling loader(key) and storing its result on a miss.
+
+        Concurrent misses on the same key may each call loader, the last result is kept.
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            value = loader(key)
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Forget one key, or everything if key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        if not self.folder:
+            return
+        if key is None:
+            for filename in os.listdir(self.folder):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.folder, filename))
+        elif os.path.exists(self._pathname(key)):
+            os.remove(self._pathname(key))
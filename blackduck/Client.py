@@ -53,7 +53,7 @@ class HubSession(requests.Session):
         kwargs['timeout'] = self._timeout
 
         if method.lower() == 'get':
-            headers = kwargs.pop('headers', dict())
+            headers = kwargs.pop('headers', None) or dict()
             lc_keys = {key.lower(): value for (key, value) in headers.items()}
             if 'accept' not in lc_keys and 'content-type' not in lc_keys:
                 # set default media type only if neither 'accept' nor 'content-type'
@@ -70,3 +70,8 @@ def update_component_by_id(self, component_id, update_json):
 
 def update_component_by_url(self, component_url, update_json):
     return self.execute_put(component_url, update_json)
+
+def get_kb_lookup(self, **kwargs):
+    '''Return a KnowledgeBase.KBLookup using this instance's session'''
+    from .KnowledgeBase import KBLookup
+    return KBLookup(self.get_session(), base_url=self.get_urlbase(), **kwargs)
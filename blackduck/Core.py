@@ -5,6 +5,7 @@ from operator import itemgetter
 import urllib.parse
 
 from .Exceptions import UnknownVersion, CreateFailedAlreadyExists, CreateFailedUnknown
+from .Utils import get_paged_items
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,13 @@ def get_headers(self):
         else:
             return {"Authorization":"Bearer " + self.token}
 
+def get_session(self):
+    '''Return a requests session carrying the headers and TLS setting of this instance'''
+    session = requests.Session()
+    session.headers.update(self.get_headers())
+    session.verify = not self.config['insecure']
+    return session
+
 def get_api_version(self):
     url = self.get_urlbase() + '/api/current-version'
     response = self.execute_get(url)
@@ -195,6 +203,18 @@ def get_matched_components(self, version_obj, limit=9999):
     response = self.execute_get(url)
     return response.json()
 
+def iter_matched_components(self, version_obj, page_size=100, prefetch=False):
+    '''Generator version of get_matched_components that pages through all the matched files
+    instead of asking for everything in one request
+    '''
+    url = "{}/matched-files".format(version_obj['_meta']['href'])
+    return self._get_paged_items(url, page_size=page_size, prefetch=prefetch)
+
+def _get_paged_items(self, url, custom_headers={}, page_size=100, prefetch=False, parameters={}):
+    '''Generator which walks a paginated collection and yields one item at a time, see Utils.get_paged_items'''
+    return get_paged_items(self.get_session(), url, params=parameters, headers=custom_headers,
+                           page_size=page_size, prefetch=prefetch)
+
 def _check_version_compatibility(self):
     if int(self.bd_major_version) < 2018:
         raise UnsupportedBDVersion("The BD major version {} is less than the minimum required major version {}".format(self.bd_major_version, 2018))        
@@ -3,27 +3,37 @@ import requests
 import json
 from operator import itemgetter
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from .Cache import Cache
 
 logger = logging.getLogger(__name__)
 
+# custom field definitions only change when an admin edits them, re-read them after this many seconds
+CF_DEFINITIONS_TTL = 3600
+
 def _get_cf_url(self):
     return self.get_apibase() + "/custom-fields/objects"
 
+def set_cf_cache(self, ttl=CF_DEFINITIONS_TTL):
+    '''(Re)create the cache of custom field objects and field definitions, which expire after ttl seconds'''
+    self._cf_definitions = Cache(maxsize=256, ttl=ttl)
+    return self._cf_definitions
+
+def invalidate_cf_cache(self, object_name=None):
+    '''Forget the cached field definitions of one object type, or all cached definitions if object_name is None'''
+    self._cf_definitions.invalidate(None if object_name is None else "fields:{}".format(object_name.lower()))
+
 def supported_cf_object_types(self):
-    '''Get the types and cache them since they are static (on a per-release basis)'''
-    if not hasattr(self, "_cf_object_types"):
-        logger.debug("retrieving object types")
-        self._cf_object_types = [cfo['name'] for cfo in self.get_cf_objects().get('items', [])]
-    return self._cf_object_types
+    '''Get the types, cached since they are static (on a per-release basis)'''
+    return [cfo['name'] for cfo in self.get_cf_objects().get('items', [])]
 
 def get_cf_objects(self):
-    '''Get CF objects and cache them since these are static (on a per-release basis)'''
-    url = self._get_cf_url()
-    if not hasattr(self, "_cf_objects"):
+    '''Get CF objects, cached since these are static (on a per-release basis)'''
+    def load(key):
         logger.debug("retrieving objects")
-        response = self.execute_get(url)
-        self._cf_objects = response.json()
-    return self._cf_objects
+        return self.execute_get(self._get_cf_url()).json()
+    return self._cf_definitions.get_or_load("objects", load)
 
 def _get_cf_object_url(self, object_name):
     for cf_object in self.get_cf_objects().get('items', []):
@@ -65,6 +75,7 @@ def create_cf(self, object_name, field_type, description, label, position, activ
     if field_type in types_using_initial_options and initial_options:
         cf_request.update({"initialOptions": initial_options})
     response = self.execute_post(post_url, data=cf_request)
+    self.invalidate_cf_cache(object_name)
     return response
 
 def delete_cf(self, object_name, field_id):
@@ -75,38 +86,133 @@ def delete_cf(self, object_name, field_id):
     assert object_name in self.supported_cf_object_types(), "You must supply a supported object name that is in {}".format(self.supported_cf_object_types())
 
     delete_url = self._get_cf_object_url(object_name) + "/fields/{}".format(field_id)
-    return self.execute_delete(delete_url)
+    response = self.execute_delete(delete_url)
+    self.invalidate_cf_cache(object_name)
+    return response
 
 def get_custom_fields(self, object_name):
     '''Get the custom field (definition) for a given object type, e.g. Project, Project Version, Component, etc
+
+    Definitions are cached, see set_cf_cache() and invalidate_cf_cache()
     '''
     assert object_name in self.supported_cf_object_types(), "You must supply a supported object name that is in {}".format(self.supported_cf_object_types())
 
-    url = self._get_cf_object_url(object_name) + "/fields"
-
-    response = self.execute_get(url)        
-    return response.json()
+    def load(key):
+        url = self._get_cf_object_url(object_name) + "/fields"
+        return self.execute_get(url).json()
+    return self._cf_definitions.get_or_load("fields:{}".format(object_name.lower()), load)
 
-def get_cf_values(self, obj):
+def get_cf_values(self, obj, custom_headers={}):
     '''Get all of the custom fields from an object such as a Project, Project Version, Component, etc
 
     The obj is expected to be the JSON document for a project, project-version, component, etc
     '''
     url = self.get_link(obj, "custom-fields")
-    response = self.execute_get(url)
+    response = self.execute_get(url, custom_headers=custom_headers)
     return response.json()
 
-def get_cf_value(self, obj, field_id):
+def get_cf_value(self, obj, field_id, custom_headers={}):
     '''Get a custom field value from an object such as a Project, Project Version, Component, etc
 
     The obj is expected to be the JSON document for a project, project-version, component, etc
     '''
     url = self.get_link(obj, "custom-fields") + "/{}".format(field_id)
-    response = self.execute_get(url)
+    response = self.execute_get(url, custom_headers=custom_headers)
     return response.json()
 
-def put_cf_value(self, cf_url, new_cf_obj):
+def put_cf_value(self, cf_url, new_cf_obj, custom_headers={}):
     '''new_cf_obj is expected to be a modified custom field value object with the values updated accordingly, e.g.
     call get_cf_value, modify the object, and then call put_cf_value
     '''
-    return self.execute_put(cf_url, new_cf_obj)
+    return self.execute_put(cf_url, new_cf_obj, custom_headers=custom_headers)
+
+def _cf_values_by_label(self, obj, custom_headers={}):
+    url = self.get_link(obj, "custom-fields") or obj['_meta']['href'] + "/custom-fields"
+    return {cf['label']: cf for cf in self._get_paged_items(url, custom_headers=custom_headers)}
+
+def _find_cf(cfs, label):
+    # label is a custom field label or id, the id being the last segment of the field's url
+    if label in cfs:
+        return cfs[label]
+    for cf in cfs.values():
+        if cf['_meta']['href'].rstrip('/').split('/')[-1] == str(label):
+            return cf
+
+def get_cf_values_bulk(self, objs, labels=None, max_workers=8, custom_headers={}):
+    '''Read custom field values from many objects (projects, project versions, BOM components, etc) concurrently
+
+    Returns a table, one row (dict) per object in the order given, holding the object href under 'href' and the
+    'values' of each custom field keyed by its label. Restrict the columns with labels. Fields that are missing
+    on an object, or could not be read, are None. Pass the media type of the objects in custom_headers where
+    the default one is not accepted, e.g. the bill-of-materials-6 Accept header for BOM components.
+    '''
+    def read(obj):
+        row = {'href': obj['_meta']['href']}
+        try:
+            cfs = self._cf_values_by_label(obj, custom_headers)
+        except Exception as e:
+            logger.warning("failed to read custom fields of {}: {}".format(row['href'], e))
+            cfs = {}
+        for label in (labels if labels is not None else cfs.keys()):
+            row[label] = cfs[label].get('values') if label in cfs else None
+        return row
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read, objs))
+
+def _cf_values_equal(current, new):
+    # multi valued fields are compared regardless of order
+    return sorted(str(v) for v in (current or [])) == sorted(str(v) for v in (new or []))
+
+def put_cf_values_bulk(self, updates, max_workers=8, custom_headers={}):
+    '''Write custom field values to many objects concurrently, skipping PUTs where the value is already the same
+
+    updates is an iterable of (obj, label, values) tuples, label being the label or id of the custom field and
+    values the list of new values for the field.
+    The custom fields of each object are read once however many of its fields are updated.
+
+    Returns one result (dict) per update, in the order given, with href, label, status ('updated', 'unchanged',
+    'missing' or 'failed') and status_code of the PUT (if any). custom_headers are sent with the reads and
+    the PUTs, e.g. the bill-of-materials-6 Accept and Content-Type headers for BOM components.
+    '''
+    updates = list(updates)
+    objs = {}
+    for obj, label, values in updates:
+        objs.setdefault(obj['_meta']['href'], obj)
+
+    def read(href):
+        try:
+            return href, self._cf_values_by_label(objs[href], custom_headers)
+        except Exception as e:
+            logger.warning("failed to read custom fields of {}: {}".format(href, e))
+            return href, None
+
+    def write(update):
+        obj, label, values = update
+        result = {'href': obj['_meta']['href'], 'label': label, 'status': None, 'status_code': None}
+        cfs = current[result['href']]
+        cf = _find_cf(cfs, label) if cfs is not None else None
+        if cfs is None:
+            result['status'] = 'failed'
+        elif cf is None:
+            result['status'] = 'missing'
+        elif _cf_values_equal(cf.get('values'), values):
+            result['status'] = 'unchanged'
+        else:
+            new_cf_obj = dict(cf, values=values)
+            try:
+                response = self.put_cf_value(new_cf_obj['_meta']['href'], new_cf_obj, custom_headers)
+            except Exception as e:
+                logger.warning("failed to write custom field {} of {}: {}".format(label, result['href'], e))
+                result['status'] = 'failed'
+                return result
+            result['status_code'] = response.status_code
+            result['status'] = 'updated' if response.status_code == 200 else 'failed'
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        current = dict(executor.map(read, objs))
+        results = list(executor.map(write, updates))
+    counts = {status: sum(r['status'] == status for r in results) for status in ('updated', 'unchanged', 'missing', 'failed')}
+    logger.info("custom field updates: {}".format(counts))
+    return results
@@ -0,0 +1,118 @@
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from .Cache import Cache
+
+logger = logging.getLogger(__name__)
+
+# Index of users, user groups and roles by name, so that bulk operations resolve names with a dict
+# lookup instead of a search (and a linear scan of the results) per row. Each index is read once,
+# with a few paged requests, and kept up to date as users and groups are created or deleted.
+
+_USER_HEADERS = {'Accept': 'application/vnd.blackducksoftware.user-4+json'}
+_NAME_KEYS = {'users': 'userName', 'usergroups': 'name', 'roles': 'name', 'project_roles': 'name'}
+
+def set_directory_cache(self, ttl=None):
+    '''(Re)create the cache holding the user, user group and role indexes, optionally expiring after ttl seconds'''
+    self._directory = Cache(maxsize=8, ttl=ttl)
+    return self._directory
+
+def invalidate_directory(self, index=None):
+    '''Drop one of the 'users', 'usergroups', 'roles' or 'project_roles' indexes, or all of them if index is None'''
+    self._directory.invalidate(index)
+
+def _get_directory_index(self, index):
+    loaders = {
+        'users': (self._get_user_url(), _USER_HEADERS, {}),
+        'usergroups': (self._get_user_group_url(), _USER_HEADERS, {}),
+        'roles': (self._get_role_url(), {}, {}),
+        'project_roles': (self._get_role_url(), {}, {'filter': 'scope:project'}),
+    }
+    def load(key):
+        url, headers, parameters = loaders[key]
+        logger.debug("building the {} index".format(key))
+        items = self._get_paged_items(url, custom_headers=headers, page_size=1000, parameters=parameters)
+        return {item[_NAME_KEYS[key]]: item for item in items}
+    return self._directory.get_or_load(index, load)
+
+def _add_to_directory(self, index, url):
+    # add a newly created user or user group to its index, if the index was built already. The index
+    # is updated in place so that it still expires when it would have
+    entries = self._directory.get(index)
+    if entries is None or not url:
+        return
+    response = self.execute_get(url, custom_headers=_USER_HEADERS)
+    if response.status_code == 200:
+        item = response.json()
+        entries[item[_NAME_KEYS[index]]] = item
+    else:
+        self.invalidate_directory(index)
+
+def _remove_from_directory(self, index, url):
+    entries = self._directory.get(index)
+    for name in [name for name, item in (entries or {}).items() if item['_meta']['href'] == url]:
+        del entries[name]
+
+def find_user_by_name(self, user_name):
+    '''Exact (userName) lookup in the user index, returns the user or None'''
+    return self._get_directory_index('users').get(user_name)
+
+def find_user_group_by_name(self, user_group_name):
+    '''Exact lookup in the user group index, returns the user group or None'''
+    return self._get_directory_index('usergroups').get(user_group_name)
+
+def find_role_by_name(self, role_name, project_scope=False):
+    '''Exact lookup in the (global or project) role index, returns the role or None'''
+    return self._get_directory_index('project_roles' if project_scope else 'roles').get(role_name)
+
+def assign_to_projects(self, assignments, max_workers=8):
+    '''Assign many users and/or user groups to projects concurrently
+
+    assignments is an iterable of dicts with 'project' (name), either 'user' (userName) or 'group' (name) and
+    optionally 'roles', a list of project-role names. Names are resolved through the directory indexes and each
+    distinct project is looked up once.
+
+    Returns one result (dict) per assignment, in the order given, being the assignment updated with status
+    ('assigned', 'not_found' or 'failed'), status_code (of the POST, if any) and error
+    '''
+    assignments = [dict(a) for a in assignments]
+    project_names = list(dict.fromkeys(a['project'] for a in assignments))
+
+    # build the indexes up front so the workers don't race to load them
+    for index, needed in (('users', 'user'), ('usergroups', 'group'), ('project_roles', 'roles')):
+        if any(a.get(needed) for a in assignments):
+            self._get_directory_index(index)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        projects = dict(zip(project_names, executor.map(self.get_project_by_name, project_names)))
+
+        def assign(assignment):
+            assignment.update(status=None, status_code=None, error=None)
+            project = projects.get(assignment['project'])
+            if 'user' in assignment:
+                principal = self.find_user_by_name(assignment['user'])
+            else:
+                principal = self.find_user_group_by_name(assignment['group'])
+            roles = [self.find_role_by_name(r, project_scope=True) for r in assignment.get('roles') or []]
+            if not project or not principal or not all(roles):
+                assignment['status'] = 'not_found'
+                assignment['error'] = "unknown project, {} or project-role".format('user' if 'user' in assignment else 'group')
+                logger.warning("{}: {}".format(assignment['error'], assignment))
+                return assignment
+            try:
+                response = self._post_project_assignment(
+                    project['_meta']['href'], principal['_meta']['href'], [r['_meta']['href'] for r in roles],
+                    'user' if 'user' in assignment else 'group')
+            except requests.RequestException as e:
+                assignment.update(status='failed', error=e)
+                return assignment
+            assignment['status_code'] = response.status_code
+            assignment['status'] = 'assigned' if response.status_code in (200, 201) else 'failed'
+            return assignment
+
+        results = list(executor.map(assign, assignments))
+
+    counts = {status: sum(r['status'] == status for r in results) for status in ('assigned', 'not_found', 'failed')}
+    logger.info("project assignments: {}".format(counts))
+    return results
@@ -0,0 +1,320 @@
+"""
+Export resources to Apache Arrow record batches and Parquet files
+
+Reports built by appending each field of each item to Python lists and handing them to pandas hold
+the whole export in memory as Python objects. The exporters here turn a stream of items, e.g. from
+Client.get_items, into Arrow record batches with a fixed schema per resource (projects, versions,
+components, vulnerabilities and codelocations) and write them to Parquet a batch at a time, so
+memory use is bounded by the batch size whatever the number of rows. Timestamps are converted by
+Arrow a column at a time. Values which do not fit the type of their column, e.g. a malformed
+timestamp, are written as null and logged rather than failing the export.
+
+Requires pyarrow: pip install blackduck[arrow]
+
+Usage:
+    with ParquetExporter('components.parquet', 'components') as export:
+        for project in bd.get_resource('projects'):
+            for version in bd.get_resource('versions', project):
+                export.write(bd.get_resource('components', version),
+                             project_name=project['name'], version_name=version['versionName'])
+
+    write_parquet(bd.get_resource('projects'), 'projects', 'projects.parquet')
+"""
+
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .Utils import parse_iso8601, safe_get
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+
+CONTEXT = None  # getter of the columns whose value is given to write() rather than read from the items
+
+
+def _risk_count(count_type):
+    def get(item):
+        for count in safe_get(item, 'securityRiskProfile', 'counts') or []:
+            if count.get('countType') == count_type:
+                return count.get('count')
+    return get
+
+
+def _vulnerability(key):
+    return lambda item: safe_get(item, 'vulnerabilityWithRemediation', key)
+
+
+# resource -> list of (column, type, getter), the getter being a key path in the item, a function of
+# the item, or CONTEXT
+SCHEMAS = {
+    'projects': [
+        ('project_url', 'string', ('_meta', 'href')),
+        ('name', 'string', ('name',)),
+        ('description', 'string', ('description',)),
+        ('tier', 'int64', ('projectTier',)),
+        ('created_at', 'timestamp', ('createdAt',)),
+        ('created_by', 'string', ('createdBy',)),
+        ('updated_at', 'timestamp', ('updatedAt',)),
+    ],
+    'versions': [
+        ('project_name', 'string', CONTEXT),
+        ('version_url', 'string', ('_meta', 'href')),
+        ('version_name', 'string', ('versionName',)),
+        ('phase', 'string', ('phase',)),
+        ('distribution', 'string', ('distribution',)),
+        ('nickname', 'string', ('nickname',)),
+        ('license', 'string', ('license', 'licenseDisplay')),
+        ('release_date', 'timestamp', ('releasedOn',)),
+        ('created_at', 'timestamp', ('createdAt',)),
+        ('settings_updated_at', 'timestamp', ('settingUpdatedAt',)),
+        ('last_bom_update', 'timestamp', ('lastBomUpdateDate',)),
+    ],
+    'components': [
+        ('project_name', 'string', CONTEXT),
+        ('version_name', 'string', CONTEXT),
+        ('bom_component_url', 'string', ('_meta', 'href')),
+        ('component_name', 'string', ('componentName',)),
+        ('component_version_name', 'string', ('componentVersionName',)),
+        ('component_url', 'string', ('component',)),
+        ('component_version_url', 'string', ('componentVersion',)),
+        ('licenses', 'list<string>', lambda item: [l.get('licenseDisplay') for l in item.get('licenses') or []]),
+        ('usages', 'list<string>', ('usages',)),
+        ('match_types', 'list<string>', ('matchTypes',)),
+        ('policy_status', 'string', ('policyStatus',)),
+        ('review_status', 'string', ('reviewStatus',)),
+        ('approval_status', 'string', ('approvalStatus',)),
+        ('security_critical', 'int64', _risk_count('CRITICAL')),
+        ('security_high', 'int64', _risk_count('HIGH')),
+        ('security_medium', 'int64', _risk_count('MEDIUM')),
+        ('security_low', 'int64', _risk_count('LOW')),
+        ('total_file_match_count', 'int64', ('totalFileMatchCount',)),
+    ],
+    'vulnerabilities': [
+        ('project_name', 'string', CONTEXT),
+        ('version_name', 'string', CONTEXT),
+        ('component_name', 'string', ('componentName',)),
+        ('component_version_name', 'string', ('componentVersionName',)),
+        ('component_version_url', 'string', ('componentVersion',)),
+        ('vulnerability_name', 'string', _vulnerability('vulnerabilityName')),
+        ('source', 'string', _vulnerability('source')),
+        ('severity', 'string', _vulnerability('severity')),
+        ('base_score', 'float64', _vulnerability('baseScore')),
+        ('overall_score', 'float64', _vulnerability('overallScore')),
+        ('exploitability_subscore', 'float64', _vulnerability('exploitabilitySubscore')),
+        ('impact_subscore', 'float64', _vulnerability('impactSubscore')),
+        ('remediation_status', 'string', _vulnerability('remediationStatus')),
+        ('published_date', 'timestamp', _vulnerability('vulnerabilityPublishedDate')),
+        ('updated_date', 'timestamp', _vulnerability('vulnerabilityUpdatedDate')),
+        ('cwe_id', 'string', _vulnerability('cweId')),
+    ],
+    'codelocations': [
+        ('codelocation_url', 'string', ('_meta', 'href')),
+        ('name', 'string', ('name',)),
+        ('url', 'string', ('url',)),
+        ('mapped_project_version', 'string', ('mappedProjectVersion',)),
+        ('scan_size', 'int64', ('scanSize',)),
+        ('created_at', 'timestamp', ('createdAt',)),
+        ('updated_at', 'timestamp', ('updatedAt',)),
+    ],
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow not available. Install with: pip install blackduck[arrow]")
+
+
+def _arrow_type(type_name):
+    return {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'timestamp': pa.timestamp('ms', tz='UTC'),
+        'list<string>': pa.list_(pa.string()),
+    }[type_name]
+
+
+def _columns(resource):
+    if resource not in SCHEMAS:
+        raise ValueError(f"unknown resource '{resource}', use one of {', '.join(SCHEMAS)}")
+    return SCHEMAS[resource]
+
+
+def schema(resource):
+    """The Arrow schema of a resource"""
+    _require_pyarrow()
+    return pa.schema([(column, _arrow_type(type_name)) for column, type_name, _ in _columns(resource)])
+
+
+def _log_nulled(column, type_name, rejected):
+    if rejected:
+        logger.warning(f"{len(rejected)} {column} value(s) are not {type_name} and were written as null, e.g. {rejected[0]!r}")
+
+
+def _timestamps(column, values):
+    try:
+        return pa.array(values, pa.string()).cast(pa.timestamp('ms', tz='UTC'))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    # not ISO-8601 as Arrow reads it, parse them one by one
+    parsed, rejected = [], []
+    for value in values:
+        try:
+            parsed.append(parse_iso8601(value) if value else None)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            parsed.append(None)
+            rejected.append(value)
+    _log_nulled(column, 'timestamp', rejected)
+    return pa.array(parsed, pa.timestamp('ms', tz='UTC'))
+
+
+def _values(column, type_name, values):
+    arrow_type = _arrow_type(type_name)
+    try:
+        return pa.array(values, arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    # convert them one by one, dropping those which do not convert
+    converted, rejected = [], []
+    for value in values:
+        try:
+            converted.append(pa.scalar(value, arrow_type).as_py())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            converted.append(None)
+            rejected.append(value)
+    _log_nulled(column, type_name, rejected)
+    return pa.array(converted, arrow_type)
+
+
+class _BatchBuilder:
+    """Buffer the column values of up to batch_size items"""
+
+    def __init__(self, resource, batch_size):
+        self.resource = resource
+        self.batch_size = batch_size
+        self.columns = _columns(resource)
+        self.schema = schema(resource)
+        self._reset()
+
+    def _reset(self):
+        self.values = [[] for _ in self.columns]
+        self.rows = 0
+
+    def check_context(self, context):
+        unknown = set(context) - {column for column, _, getter in self.columns if getter is CONTEXT}
+        if unknown:
+            raise ValueError(f"{', '.join(sorted(unknown))} not context columns of {self.resource}")
+
+    def append(self, item, context):
+        """Add an item, returning True once the batch is full"""
+        for column_values, (column, _, getter) in zip(self.values, self.columns):
+            if getter is CONTEXT:
+                column_values.append(context.get(column))
+            elif callable(getter):
+                column_values.append(getter(item))
+            else:
+                column_values.append(safe_get(item, *getter))
+        self.rows += 1
+        return self.rows >= self.batch_size
+
+    def flush(self):
+        """The buffered rows as a record batch (None if there are none), emptying the buffer"""
+        if not self.rows:
+            return None
+        arrays = []
+        for (column, type_name, _), column_values in zip(self.columns, self.values):
+            if type_name == 'timestamp':
+                arrays.append(_timestamps(column, column_values))
+            else:
+                arrays.append(_values(column, type_name, column_values))
+        self._reset()
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+def record_batches(items, resource, batch_size=DEFAULT_BATCH_SIZE, **context):
+    """Convert items to Arrow record batches of at most batch_size rows.
+
+    Args:
+        items (iterable): of resource items (dicts), e.g. from Client.get_items()
+        resource (str): one of projects, versions, components, vulnerabilities or codelocations
+        batch_size (int): rows per batch. Defaults to 10000.
+        context: values of the columns which are not part of the items, e.g. project_name='p1'
+
+    Yields:
+        pyarrow.RecordBatch: with the schema of the resource
+    """
+    _require_pyarrow()
+    builder = _BatchBuilder(resource, batch_size)
+    builder.check_context(context)
+    for item in items:
+        if builder.append(item, context):
+            yield builder.flush()
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
+
+
+class ParquetExporter:
+    """Write streams of resource items to a Parquet file, a row group per batch_size rows.
+
+    Rows are buffered across write() calls, so writing the components of many small BOMs one by one
+    still makes large row groups.
+
+    Requires pyarrow: pip install blackduck[arrow]
+    """
+
+    def __init__(self, path, resource, batch_size=DEFAULT_BATCH_SIZE, compression='zstd'):
+        """
+        Args:
+            path (str): Parquet file to (over)write
+            resource (str): one of projects, versions, components, vulnerabilities or codelocations
+            batch_size (int): rows buffered before they are written. Defaults to 10000.
+            compression (str): Parquet compression codec. Defaults to 'zstd'.
+        """
+        _require_pyarrow()
+        self.path = path
+        self.resource = resource
+        self.batch_size = batch_size
+        self.rows = 0
+        self._builder = _BatchBuilder(resource, batch_size)
+        self.writer = pq.ParquetWriter(path, self._builder.schema, compression=compression)
+
+    def write(self, items, **context):
+        """Append items, with the given context column values, returning the number of items"""
+        self._builder.check_context(context)
+        rows = 0
+        for item in items:
+            if self._builder.append(item, context):
+                self.writer.write_batch(self._builder.flush())
+            rows += 1
+        self.rows += rows
+        return rows
+
+    def close(self):
+        batch = self._builder.flush()
+        if batch is not None:
+            self.writer.write_batch(batch)
+        self.writer.close()
+        logger.info(f"Wrote {self.rows} {self.resource} to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_parquet(items, resource, path, batch_size=DEFAULT_BATCH_SIZE, compression='zstd', **context):
+    """Write items to a Parquet file, see ParquetExporter.
+
+    Returns:
+        int: number of rows written
+    """
+    with ParquetExporter(path, resource, batch_size, compression) as export:
+        return export.write(items, **context)
@@ -68,7 +68,7 @@ class HubInstance(object):
         _create,_get_hub_rest_api_version_info,_get_major_version,_get_parameter_string,_validated_json_data,
         execute_delete,execute_get,execute_post,execute_put,get_api_version,get_apibase,get_auth_token,get_headers,
         get_limit_paramstring,get_link,get_matched_components,get_tags_url,get_urlbase,read_config,write_config,
-        _check_version_compatibility,execute_patch
+        _check_version_compatibility,execute_patch,_get_paged_items,iter_matched_components,get_session
     )
     from .Roles import (
         _get_role_url, assign_role_given_role_url, assign_role_to_user_or_group, 
@@ -87,18 +87,19 @@ class HubInstance(object):
     )
     from .Policy import (
         _get_policy_url, create_policy, delete_policy_by_id, delete_policy_by_url, 
-        get_policies, get_policy_by_id, get_policy_by_url, update_policy_by_id, update_policy_by_url
+        get_policies, get_policy_by_id, get_policy_by_url, get_policy_overrider, update_policy_by_id, update_policy_by_url
     )
     from .Vulnerabilities import (
-        _get_vulnerabilities_url, get_component_remediation, get_vulnerabilities, 
-        get_vulnerability_affected_projects, get_vulnerable_bom_components
+        _fetch_vulnerability, _get_vulnerabilities_url, get_component_remediation, get_vulnerabilities, 
+        get_vulnerabilities_bulk, get_vulnerability_affected_projects, get_vulnerable_bom_components,
+        iter_vulnerable_bom_components, set_vulnerability_cache
     )
     from .Reporting import (
         create_version_notices_report, create_version_reports, create_vuln_status_report, 
-        download_notification_report, download_report
+        download_notification_report, download_report, get_report_manager
     )
     from .Projects import (
-        _find_user_group_url, _find_user_url, _get_projects_url, _project_role_urls, 
+        _find_user_group_url, _find_user_url, _get_projects_url, _post_project_assignment, _project_role_urls, 
         assign_project_application_id, assign_user_group_to_project, assign_user_to_project, 
         compare_project_versions, create_project, create_project_version, delete_all_empty_versions, 
         delete_application_id, delete_empty_projects, delete_empty_versions, delete_project_by_name, 
@@ -107,26 +108,35 @@ class HubInstance(object):
         get_project_info, get_project_roles, get_project_version_by_name, get_project_versions, get_projects, 
         get_projects_by_version_name, get_version_by_id, get_version_by_name, get_version_codelocations, 
         get_version_components, get_version_scan_info, update_project_application_id, update_project_settings, 
-        update_project_version_settings
+        update_project_version_settings, iter_version_components, get_journal_sync
     ) # TODO Transfer relevant versions related functions to .Versions
     from .Versions import ( add_version_as_component, remove_version_as_component )
     from .Scans import (
-        delete_codelocation, delete_unmapped_codelocations, download_project_scans, 
-        get_codelocation_scan_summaries, get_codelocations, get_codelocations_internal, get_scan_locations, upload_scan
+        _get_unmapped_codelocations, _latest_scan_status, delete_codelocation, delete_unmapped_codelocations, download_project_scans, 
+        get_codelocation_scan_summaries, get_codelocations, get_codelocations_internal, get_scan_locations, upload_scan,
+        upload_scans, iter_codelocations, count_codelocations
     )
     from .Components import (
         _get_components_url, find_component_info_for_protex_component, get_component_by_id, 
-        get_component_by_url, get_components, search_components, update_component_by_id, update_component_by_url
+        get_component_by_url, get_components, get_kb_lookup, search_components, update_component_by_id,
+        update_component_by_url
     )
     from .CustomFields import (
-        _get_cf_obj_rel_path, _get_cf_object_url, _get_cf_url, create_cf, delete_cf, 
-        get_cf_object, get_cf_objects, get_cf_value, get_cf_values, get_custom_fields, put_cf_value,
-        supported_cf_object_types
+        _cf_values_by_label, _get_cf_obj_rel_path, _get_cf_object_url, _get_cf_url, create_cf, delete_cf, 
+        get_cf_object, get_cf_objects, get_cf_value, get_cf_values, get_cf_values_bulk, get_custom_fields,
+        invalidate_cf_cache, put_cf_value, put_cf_values_bulk, set_cf_cache, supported_cf_object_types
+    )
+    from .Licences import (
+        _get_license_info, get_license, get_license_info_for_bom_component, get_license_text,
+        get_licenses, prefetch_licenses, set_license_cache
     )
-    from .Licences import ( _get_license_info, get_license_info_for_bom_component, get_licenses )
     from .Snippet import ( get_file_matches_for_bom_component )
-    from .System import ( get_health_checks, get_notifications )
+    from .System import ( get_health_checks, get_notification_feed, get_notifications )
     from .Ldap import ( disable_ldap, enable_ldap, get_ldap_configs, get_ldap_state )
+    from .Directory import (
+        _add_to_directory, _get_directory_index, _remove_from_directory, assign_to_projects, find_role_by_name, find_user_by_name, find_user_group_by_name,
+        invalidate_directory, set_directory_cache
+    )
 
     def __init__(self, *args, **kwargs):
         # Config needs to be an instance variable for thread-safety, concurrent use of HubInstance()
@@ -161,6 +171,10 @@ class HubInstance(object):
             self.version_info = {'version': '3'} # assume it's v3 since all versions after 3 supported version info
 
         self.bd_major_version = self._get_major_version()
+        self.set_cf_cache()
+        self.set_vulnerability_cache()
+        self.set_directory_cache()
+        self.set_license_cache()
 
     def print_methods(self):
         import inspect
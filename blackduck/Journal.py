@@ -0,0 +1,253 @@
+"""
+Keep a local copy of the project and version journals
+
+The journal (activity) of every project and project version is an audit trail, but asking the
+Hub who did what across the portfolio means crawling every journal again. JournalSync copies
+journal events into a local, append-only SQLite store, JournalStore. It remembers per journal
+the timestamp of the newest event stored and, as the Hub returns the newest events first, reads
+each journal only until it reaches events it already has. Journals are read concurrently.
+
+Usage:
+    store = JournalStore('journal.db')
+    JournalSync(bd.session, store).sync_projects()
+    for event in store.query(action='Policy Override', since='2024-07-01'):
+        print(event['timestamp'], event['trigger_name'], event['object_name'])
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .Utils import get_link, get_paged_items, get_url, object_id, parse_iso8601, safe_get
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    journal_url TEXT NOT NULL,
+    project_name TEXT,
+    version_name TEXT,
+    timestamp TEXT,
+    action TEXT,
+    object_type TEXT,
+    object_name TEXT,
+    trigger_type TEXT,
+    trigger_name TEXT,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_action_timestamp ON events (action, timestamp);
+CREATE INDEX IF NOT EXISTS events_project_version ON events (project_name, version_name);
+CREATE INDEX IF NOT EXISTS events_trigger_name ON events (trigger_name);
+CREATE TABLE IF NOT EXISTS cursors (
+    journal_url TEXT PRIMARY KEY,
+    timestamp TEXT,
+    synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _parse(timestamp):
+    return parse_iso8601(timestamp) if timestamp else None
+
+
+class JournalStore:
+    """Append-only SQLite store of journal events with a resume cursor per journal.
+
+    Events are never updated or deleted. An event read twice (the newest events of a journal are
+    read again on each sync) is only stored once.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file, created if needed. ':memory:' works for a throw-away store.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def cursor(self, journal_url):
+        """Timestamp of the newest event stored for a journal, or None"""
+        with self._lock:
+            row = self.connection.execute("SELECT timestamp FROM cursors WHERE journal_url = ?", (journal_url,)).fetchone()
+        return row['timestamp'] if row else None
+
+    def append(self, journal_url, events, project_name=None, version_name=None):
+        """Store the events of a journal, skipping those already stored, and move its cursor.
+
+        Returns:
+            int: number of events added
+        """
+        rows = []
+        for event in events:
+            serialized = json.dumps(event, sort_keys=True)
+            rows.append((
+                hashlib.sha1((journal_url + serialized).encode('utf-8')).hexdigest(),
+                journal_url,
+                project_name,
+                version_name,
+                event.get('timestamp'),
+                event.get('action'),
+                safe_get(event, 'objectData', 'type'),
+                safe_get(event, 'objectData', 'name'),
+                safe_get(event, 'triggerData', 'type'),
+                safe_get(event, 'triggerData', 'name'),
+                serialized,
+            ))
+        newest = max((event['timestamp'] for event in events if event.get('timestamp')), key=_parse, default=None)
+        with self._lock, self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO events (digest, journal_url, project_name, version_name, timestamp, action, "
+                "object_type, object_name, trigger_type, trigger_name, event) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            added = self.connection.total_changes - before
+            if newest:
+                self.connection.execute(
+                    "INSERT INTO cursors (journal_url, timestamp) VALUES (?, ?) ON CONFLICT (journal_url) "
+                    "DO UPDATE SET timestamp = excluded.timestamp, synced_at = CURRENT_TIMESTAMP",
+                    (journal_url, newest))
+        return added
+
+    def execute(self, sql, parameters=()):
+        """Run any SQL on the store, returning the rows as sqlite3.Row objects"""
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def query(self, action=None, project_name=None, version_name=None, trigger_name=None, since=None, until=None):
+        """Find stored events, newest first.
+
+        Args:
+            action (str): journal action, e.g. 'Policy Override' or 'Component Added'
+            project_name (str): project the journal belongs to
+            version_name (str): project version the journal belongs to
+            trigger_name (str): who (or what) triggered the event
+            since (str): ISO-8601 timestamp, inclusive
+            until (str): ISO-8601 timestamp, exclusive
+
+        Returns:
+            list: of dicts with the stored columns, 'event' being the event as returned by the Hub
+        """
+        conditions = []
+        parameters = []
+        for column, value in (('action', action), ('project_name', project_name),
+                              ('version_name', version_name), ('trigger_name', trigger_name)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if since:
+            conditions.append("timestamp >= ?")
+            parameters.append(since)
+        if until:
+            conditions.append("timestamp < ?")
+            parameters.append(until)
+        sql = "SELECT * FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        rows = self.execute(sql + " ORDER BY timestamp DESC, id DESC", parameters)
+        return [dict(row, event=json.loads(row['event'])) for row in rows]
+
+
+class JournalSync:
+    """Incrementally copy project and version journals into a JournalStore."""
+
+    def __init__(self, session, store, base_url='', max_workers=8, page_size=100):
+        """
+        Args:
+            session (requests.Session): authenticated session
+            store (JournalStore): where the events go
+            base_url (str): Hub url, prepended to relative urls
+            max_workers (int): number of journals read concurrently. Defaults to 8.
+            page_size (int): events per page. Defaults to 100.
+        """
+        self.session = session
+        self.store = store
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.page_size = page_size
+
+    def _get_items(self, url, params=None):
+        return get_paged_items(self.session, url, params, page_size=self.page_size)
+
+    def read_journal(self, journal_url, since=None):
+        """Read the events of a journal which are not older than since (newest events come first)"""
+        since = _parse(since)
+        events = []
+        for event in self._get_items(journal_url):
+            if since and event.get('timestamp') and _parse(event['timestamp']) < since:
+                break
+            events.append(event)
+        return events
+
+    def journals(self, projects=None, versions=True):
+        """List the journals of projects, and of their versions.
+
+        Args:
+            projects (list): of project objects. Defaults to every project.
+            versions (bool): include the journal of every version. Defaults to True.
+
+        Returns:
+            list: of (journal url, project name, version name or None) tuples
+        """
+        if projects is None:
+            projects = list(self._get_items(self.base_url + "/api/projects"))
+
+        def project_journals(project):
+            journal_url = get_link(project, 'project-journal') or \
+                f"{self.base_url}/api/journal/projects/{object_id(project)}"
+            journals = [(journal_url, project['name'], None)]
+            if versions:
+                versions_url = get_link(project, 'versions') or get_url(project) + "/versions"
+                for version in self._get_items(versions_url):
+                    journals.append((f"{journal_url}/versions/{object_id(version)}", project['name'], version['versionName']))
+            return journals
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [journal for journals in executor.map(project_journals, projects) for journal in journals]
+
+    def sync(self, journals):
+        """Copy the events added to each journal since its last sync into the store.
+
+        Args:
+            journals (iterable): of (journal url, project name, version name) tuples, see journals()
+
+        Returns:
+            dict: journal url -> number of events added, or the exception if reading the journal failed
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.read_journal, journal_url, self.store.cursor(journal_url)): (journal_url, project_name, version_name)
+                for journal_url, project_name, version_name in journals
+            }
+            # the store is written from this thread only, as each journal has been read
+            for future in as_completed(futures):
+                journal_url, project_name, version_name = futures[future]
+                try:
+                    results[journal_url] = self.store.append(journal_url, future.result(), project_name, version_name)
+                except Exception as e:
+                    logger.error(f"Could not sync journal {journal_url}: {e}")
+                    results[journal_url] = e
+        added = sum(r for r in results.values() if isinstance(r, int))
+        logger.info(f"Synced {len(results)} journals, {added} new events")
+        return results
+
+    def sync_projects(self, projects=None, versions=True):
+        """Sync the journals of projects (default every project) and, optionally, their versions"""
+        return self.sync(self.journals(projects, versions))
@@ -0,0 +1,180 @@
+"""
+Cached, batched lookups of components in the Black Duck KnowledgeBase
+
+SBOM and component list imports look up every input line in the KB, and the same packages turn
+up over and over again. KBLookup normalizes each query (purl, component/version id or name),
+answers repeated queries from a Cache, remembers queries that found nothing (negative hits) and
+fetches the distinct misses of a batch concurrently.
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .Cache import Cache
+
+logger = logging.getLogger(__name__)
+
+# KB entries rarely change, but re-check after a week so that negative hits pick up new KB content
+KB_TTL = 7 * 24 * 3600
+
+_MISSING = object()
+
+
+def normalize_purl(purl):
+    """Normalize a package url for use as a cache key.
+
+    Whitespace is stripped, the scheme and type are lowercased and qualifiers are sorted, so
+    'pkg:NPM/lodash@4.17.21?b=2&a=1' and 'pkg:npm/lodash@4.17.21?a=1&b=2' are the same query.
+
+    Args:
+        purl (str): package url
+
+    Returns:
+        str: normalized package url
+    """
+    purl = purl.strip()
+    scheme, _, rest = purl.partition(':')
+    purl_type, _, rest = rest.lstrip('/').partition('/')
+    rest, _, subpath = rest.partition('#')
+    rest, _, qualifiers = rest.partition('?')
+    normalized = f"{scheme.lower()}:{purl_type.lower()}/{rest}"
+    if qualifiers:
+        normalized += '?' + '&'.join(sorted(qualifiers.split('&')))
+    if subpath:
+        normalized += '#' + subpath
+    return normalized
+
+
+def _normalize_ids(ids):
+    return '/'.join(str(i).strip().lower() for i in ids if i)
+
+
+def normalize_name(name):
+    """Normalize a component name for use as a cache key: stripped, lowercased, inner whitespace collapsed"""
+    return re.sub(r'\s+', ' ', name.strip().lower())
+
+
+class KBLookup:
+    """Look up components by purl, KB id or name with caching and concurrency.
+
+    Usage:
+        kb = KBLookup(bd.session, cache=Cache(ttl=KB_TTL, folder='.kb-cache'))
+        matches = kb.find_purls(purls)          # {purl: match or None}
+    """
+
+    def __init__(self, session, base_url='', cache=None, max_workers=8):
+        """
+        Args:
+            session (requests.Session): authenticated session used for the GET requests
+            base_url (str): Hub url, prepended to relative urls
+            cache (Cache): where results are kept, give it a folder to persist them across runs.
+                           Defaults to an in-memory Cache with a one week TTL.
+            max_workers (int): number of lookups run concurrently. Defaults to 8.
+        """
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else Cache(maxsize=100000, ttl=KB_TTL)
+        self.max_workers = max_workers
+
+    def _get(self, path, params=None, headers=None):
+        # returns the json document, or None if the KB does not know it. Other errors are raised so
+        # that they are not cached as negative hits. path may also be an absolute url
+        url = path if path.startswith('http') else self.base_url + path
+        response = self.session.get(url, params=params, headers=headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _find_purl(self, purl):
+        result = self._get("/api/search/kb-purl-component", params={'purl': purl})
+        items = (result or {}).get('items', [])
+        return items[0] if items else None
+
+    def _find_id(self, ids):
+        component_id, version_id = ids
+        # the component is looked up (and cached) on its own too, so the versions of a component share it
+        component_key = f"id:{_normalize_ids((component_id, None))}"
+        component = self.cache.get(component_key, _MISSING)
+        if component is _MISSING:
+            component = self._get(f"/api/components/{component_id}")
+            self.cache.put(component_key, component)
+        if component is None or not version_id:
+            return component
+        # the KB may answer with another (e.g. merged) component, the versions are under the url it returned
+        return self._get(f"{component['_meta']['href']}/versions/{version_id}")
+
+    def _search_name(self, name):
+        headers = {'Accept': 'application/vnd.blackducksoftware.internal-1+json, application/json, */*;q=0.8'}
+        result = self._get("/api/search/kb-components", params={'q': name, 'limit': 100}, headers=headers)
+        return [hit for item in (result or {}).get('items', []) for hit in item.get('hits', [])]
+
+    def _bulk(self, queries, kind, normalize, fetch, default=None):
+        keys = {query: f"{kind}:{normalize(query)}" for query in queries}
+        found = {}
+        misses = {}
+        for query, key in keys.items():
+            value = self.cache.get(key, _MISSING)
+            if value is _MISSING:
+                misses.setdefault(key, query)
+            else:
+                found[key] = value
+
+        def run(item):
+            key, query = item
+            try:
+                value = fetch(query)
+            except Exception as e:
+                logger.warning(f"KB lookup of {kind} {query} failed: {e}")
+                return key, default
+            self.cache.put(key, value)
+            return key, value
+
+        logger.debug(f"KB {kind} lookups: {len(keys)} queries, {len(set(keys.values()))} distinct, {len(misses)} not cached")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            found.update(executor.map(run, misses.items()))
+        return {query: found[key] for query, key in keys.items()}
+
+    def find_purls(self, purls):
+        """Find the KB component versions of many package urls.
+
+        Args:
+            purls (iterable): of package urls
+
+        Returns:
+            dict: purl -> KB match (with componentName, versionName, version, ...) or None
+        """
+        return self._bulk(purls, 'purl', normalize_purl, self._find_purl)
+
+    def find_purl(self, purl):
+        return self.find_purls([purl])[purl]
+
+    def find_ids(self, ids):
+        """Find components or component versions by their KB ids.
+
+        Args:
+            ids (iterable): of (component id, component version id or None) tuples
+
+        Returns:
+            dict: (component id, version id) -> the component version (or component if no version id) or None
+        """
+        return self._bulk(ids, 'id', _normalize_ids, self._find_id)
+
+    def find_id(self, component_id, version_id=None):
+        return self.find_ids([(component_id, version_id)])[(component_id, version_id)]
+
+    def search_names(self, names):
+        """Search the KB for many component names.
+
+        Args:
+            names (iterable): of component names
+
+        Returns:
+            dict: name -> list of search hits (each with fields and the component href in _meta),
+                  empty if the search failed
+        """
+        return self._bulk(names, 'name', normalize_name, self._search_name, default=[])
+
+    def search_name(self, name):
+        return self.search_names([name])[name]
@@ -4,6 +4,8 @@ import json
 from operator import itemgetter
 import urllib.parse
 
+from .Cache import Cache
+
 logger = logging.getLogger(__name__)
 
 def get_licenses(self, parameters={}):
@@ -12,34 +14,90 @@ def get_licenses(self, parameters={}):
     json_data = response.json()
     return json_data
 
-def _get_license_info(self, license_obj):
+def set_license_cache(self, maxsize=1024, ttl=None, folder=None):
+    '''Configure the cache of license texts, e.g. give it a folder to keep the texts across runs,
+    and empty the license catalogue. Texts are keyed by the license href under /api/licenses.
+    '''
+    self._licenses = {}
+    self._license_texts = Cache(maxsize=maxsize, ttl=ttl, folder=folder)
+    return self._license_texts
+
+def _license_id(license_url):
+    # BOM components refer to licenses through version scoped urls (.../versions/<id>/licenses/<license-id>),
+    # the last segment is the same license id as under /api/licenses
+    return license_url.rstrip('/').split('/')[-1]
+
+def prefetch_licenses(self, page_size=1000):
+    '''Load the whole license catalogue with a few paged requests, so that get_license() no longer
+    needs a GET per license. Returns the number of licenses in the catalogue.
+    '''
+    catalogue = self._licenses
+    url = self.get_urlbase() + "/api/licenses"
+    for license in self._get_paged_items(url, custom_headers={'Accept':'application/json'}, page_size=page_size):
+        catalogue[_license_id(license['_meta']['href'])] = license
+    logger.debug("prefetched {} licenses".format(len(catalogue)))
+    return len(catalogue)
+
+def get_license(self, license_url):
+    '''Get a license object from the catalogue, fetching (and remembering) it if it is not there yet.
+    Returns None if the license could not be retrieved.
+    '''
+    catalogue = self._licenses
+    license_id = _license_id(license_url)
+    if license_id not in catalogue:
+        response = self.execute_get(license_url)
+        if response.status_code != 200:
+            return None
+        catalogue[license_id] = response.json()
+    return catalogue[license_id]
+
+def get_license_text(self, license_obj):
+    '''Get the text of a license object, fetching each text at most once while it is cached.
+    Returns None if the text could not be retrieved.
+    '''
+    key = self.get_apibase() + "/licenses/" + _license_id(license_obj['_meta']['href'])
+    text = self._license_texts.get(key)
+    if text is None:
+        response = self.execute_get(self.get_link(license_obj, 'text'))
+        if response.status_code != 200:
+            return None
+        text = response.text
+        self._license_texts.put(key, text)
+    return text
+
+def _iter_license_leaves(license_obj):
+    # multi-license entries (e.g. DISJUNCTIVE) nest the individual licenses in 'licenses', possibly several levels deep
     if 'license' in license_obj:
-        license_info = {}
+        yield license_obj
+    elif isinstance(license_obj.get('licenses'), list):
+        for license in license_obj['licenses']:
+            yield from _iter_license_leaves(license)
+
+def _get_license_info(self, license_obj):
+    for leaf in _iter_license_leaves(license_obj):
+        logger.debug("license: {}".format(leaf))
+        license_info = self.get_license(leaf['license']) or {}
         text_json = {}
-        logger.debug("license: {}".format(license_obj))
-        response = self.execute_get(license_obj['license'])
-        if response.status_code == 200:
-            license_info = response.json()
-            text_url = self.get_link(license_info, 'text')
-            response = self.execute_get(text_url)
-            if response.status_code == 200:
-                text_json = response.text
+        if license_info:
+            text_json = self.get_license_text(license_info) or {}
         yield {"license_info": license_info,
                 "license_text_info": text_json}
-    elif 'licenses' in license_obj and isinstance(license_obj['licenses'], list):
-        for license in license_obj['licenses']:
-            self._get_license_info(license)
 
-def get_license_info_for_bom_component(self, bom_component, limit=1000):
+def get_license_info_for_bom_component(self, bom_component, limit=1000, leaf_licenses=False):
+    '''Return the license info and text of a BOM component's licenses, keyed by the licenseDisplay of
+    the BOM component's licenses. Multi-license entries (e.g. DISJUNCTIVE) are left out unless leaf_licenses
+    is True, which keys the info by each individual license instead
+    '''
     self._check_version_compatibility()
     all_licenses = {}
     logger.debug("gathering license info for bom component {}, version {}".format(
         bom_component['componentName'], bom_component['componentVersionName']))
     for license in bom_component.get('licenses', []):
-        for license_info_obj in self._get_license_info(license):
-            all_licenses.update({
-                    license['licenseDisplay']: license_info_obj
-                })
+        if not leaf_licenses and 'license' not in license:
+            continue
+        for leaf in _iter_license_leaves(license):
+            for license_info_obj in self._get_license_info(leaf):
+                all_licenses.update({
+                        leaf.get('licenseDisplay', license.get('licenseDisplay')): license_info_obj
+                    })
     return all_licenses
-
-
@@ -0,0 +1,450 @@
+"""
+Keep a local SQLite mirror of the portfolio
+
+Reporting on the portfolio (which versions use a component, how many critical vulnerabilities each
+project has, which licenses are in use) is read-only and does not need to hit the Hub live.
+MirrorSync copies projects, project versions and, for each version, its BOM components, their
+licenses, vulnerabilities and the version's policy status into a MirrorStore using Client.get_items.
+The first sync crawls everything; later syncs re-read only the BOMs of versions whose
+lastBomUpdateDate changed, only update the row of versions whose settings (settingUpdatedAt)
+changed, and drop projects and versions deleted from the Hub. BOMs are read concurrently.
+
+Each version is written together with its BOM in a single transaction, and its lastBomUpdateDate
+is only recorded once its BOM is stored, so an interrupted or partly failed sync is resumed by the
+next one: versions already mirrored are skipped, the others are read.
+
+Schema (timestamps are ISO-8601 text as returned by the Hub):
+
+    projects          project_url (primary key), name, description, tier, created_at, updated_at, synced_at
+    versions          version_url (primary key), project_url, project_name, version_name, phase,
+                      distribution, nickname, release_date, created_at, settings_updated_at,
+                      last_bom_update, synced_at
+    components        version_url, bom_component_url, component_name, component_version_name,
+                      component_url, component_version_url, policy_status, review_status,
+                      approval_status, usages, match_types (usages and match_types comma separated)
+    licenses          version_url, bom_component_url, license_name, license_url, license_family, license_type
+    vulnerabilities   version_url, component_name, component_version_name, component_version_url,
+                      vulnerability_name, source, severity, base_score, overall_score,
+                      remediation_status, published_date, updated_date, cwe_id
+    policy_status     version_url (primary key), overall_status, in_violation, in_violation_overridden,
+                      not_in_violation
+    sync_runs         id, started_at, finished_at (NULL while running or if interrupted), versions,
+                      bom_updated, settings_updated, removed, failed
+
+Deleting a project deletes its versions, deleting a version deletes the rows of its BOM. Component
+and license names compare case-insensitively, and the VERSION collation compares version names
+numerically, e.g. "WHERE component_version_name < '2.17' COLLATE VERSION". The indexes keep version
+names in text order, so such a comparison is checked row by row among the rows selected by the name.
+
+Usage:
+    bd = Client(base_url=..., token=...)
+    with MirrorStore('portfolio-mirror.db') as store:
+        MirrorSync(bd, store).sync()
+        rows = store.execute("SELECT project_name, version_name FROM components JOIN versions USING (version_url) "
+                             "WHERE component_name = ?", ('Apache Log4J',))
+        # or with the filter builder of blackduck.Query
+        rows = store.query('components').filter(component_name='apache log4j', component_version_name__lt='2.17').all()
+
+or from the command line: blackduck --mirror portfolio-mirror.db
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .Utils import get_url, safe_get
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    tier INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS projects_name ON projects (name);
+CREATE TABLE IF NOT EXISTS versions (
+    version_url TEXT PRIMARY KEY,
+    project_url TEXT NOT NULL REFERENCES projects (project_url) ON DELETE CASCADE,
+    project_name TEXT NOT NULL,
+    version_name TEXT NOT NULL,
+    phase TEXT,
+    distribution TEXT,
+    nickname TEXT,
+    release_date TEXT,
+    created_at TEXT,
+    settings_updated_at TEXT,
+    last_bom_update TEXT,
+    synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS versions_project ON versions (project_url);
+CREATE INDEX IF NOT EXISTS versions_names ON versions (project_name, version_name);
+CREATE TABLE IF NOT EXISTS components (
+    version_url TEXT NOT NULL REFERENCES versions (version_url) ON DELETE CASCADE,
+    bom_component_url TEXT,
+    component_name TEXT COLLATE NOCASE,
+    component_version_name TEXT,
+    component_url TEXT,
+    component_version_url TEXT,
+    policy_status TEXT,
+    review_status TEXT,
+    approval_status TEXT,
+    usages TEXT,
+    match_types TEXT
+);
+CREATE INDEX IF NOT EXISTS components_version ON components (version_url);
+CREATE INDEX IF NOT EXISTS components_name_version ON components (component_name, component_version_name);
+CREATE INDEX IF NOT EXISTS components_policy_status ON components (policy_status);
+CREATE TABLE IF NOT EXISTS licenses (
+    version_url TEXT NOT NULL REFERENCES versions (version_url) ON DELETE CASCADE,
+    bom_component_url TEXT,
+    license_name TEXT COLLATE NOCASE,
+    license_url TEXT,
+    license_family TEXT,
+    license_type TEXT
+);
+CREATE INDEX IF NOT EXISTS licenses_version ON licenses (version_url);
+CREATE INDEX IF NOT EXISTS licenses_name ON licenses (license_name);
+CREATE TABLE IF NOT EXISTS vulnerabilities (
+    version_url TEXT NOT NULL REFERENCES versions (version_url) ON DELETE CASCADE,
+    component_name TEXT COLLATE NOCASE,
+    component_version_name TEXT,
+    component_version_url TEXT,
+    vulnerability_name TEXT,
+    source TEXT,
+    severity TEXT,
+    base_score REAL,
+    overall_score REAL,
+    remediation_status TEXT,
+    published_date TEXT,
+    updated_date TEXT,
+    cwe_id TEXT
+);
+CREATE INDEX IF NOT EXISTS vulnerabilities_version ON vulnerabilities (version_url);
+CREATE INDEX IF NOT EXISTS vulnerabilities_name ON vulnerabilities (vulnerability_name);
+CREATE INDEX IF NOT EXISTS vulnerabilities_severity ON vulnerabilities (severity);
+CREATE TABLE IF NOT EXISTS policy_status (
+    version_url TEXT PRIMARY KEY REFERENCES versions (version_url) ON DELETE CASCADE,
+    overall_status TEXT,
+    in_violation INTEGER,
+    in_violation_overridden INTEGER,
+    not_in_violation INTEGER
+);
+CREATE INDEX IF NOT EXISTS policy_status_overall_status ON policy_status (overall_status);
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT,
+    versions INTEGER,
+    bom_updated INTEGER,
+    settings_updated INTEGER,
+    removed INTEGER,
+    failed INTEGER
+);
+"""
+
+BOM_MEDIA_TYPE = "application/vnd.blackducksoftware.bill-of-materials-6+json"
+
+
+def _project_row(project):
+    return {
+        'project_url': get_url(project),
+        'name': project['name'],
+        'description': project.get('description'),
+        'tier': project.get('projectTier'),
+        'created_at': project.get('createdAt'),
+        'updated_at': project.get('updatedAt'),
+    }
+
+
+def _version_row(project, version):
+    return {
+        'version_url': get_url(version),
+        'project_url': get_url(project),
+        'project_name': project['name'],
+        'version_name': version['versionName'],
+        'phase': version.get('phase'),
+        'distribution': version.get('distribution'),
+        'nickname': version.get('nickname'),
+        'release_date': version.get('releasedOn'),
+        'created_at': version.get('createdAt'),
+        'settings_updated_at': version.get('settingUpdatedAt'),
+        'last_bom_update': version.get('lastBomUpdateDate'),
+    }
+
+
+def version_key(version_name):
+    """Sort key for component version names, comparing numbers numerically: '2.9.1' < '2.17.0'"""
+    parts = re.findall(r'\d+|[a-zA-Z]+', str(version_name or ''))
+    # good enough to order releases, a pre-release suffix ('2.17.0-rc1') sorts after its release
+    return [(1, int(p), '') if p.isdigit() else (0, 0, p.lower()) for p in parts]
+
+
+def _compare_versions(a, b):
+    a, b = version_key(a), version_key(b)
+    return (a > b) - (a < b)
+
+
+def _status_count(policy_status, name):
+    for count in policy_status.get('componentVersionStatusCounts') or []:
+        if count.get('name') == name:
+            return count.get('value')
+    return 0
+
+
+class MirrorStore:
+    """SQLite mirror of the projects, versions and BOMs of a Hub, see the module docstring for the schema."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file, created if needed. ':memory:' works for a throw-away mirror.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.create_collation('VERSION', _compare_versions)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            # lets reports read the mirror while it is being synced
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        user_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if user_version > SCHEMA_VERSION:
+            raise ValueError(f"{path} is a version {user_version} mirror, this library reads up to version {SCHEMA_VERSION}")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def execute(self, sql, parameters=()):
+        """Run any SQL on the mirror, returning the rows as sqlite3.Row objects"""
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def query(self, table):
+        """Start a Query (see blackduck.Query) on a table of the mirror"""
+        from .Query import Query
+        return Query(self, table)
+
+    def version_state(self):
+        """dict: version url -> (settings_updated_at, last_bom_update) of every mirrored version"""
+        rows = self.execute("SELECT version_url, settings_updated_at, last_bom_update FROM versions")
+        return {row['version_url']: (row['settings_updated_at'], row['last_bom_update']) for row in rows}
+
+    def project_urls(self):
+        return {row['project_url'] for row in self.execute("SELECT project_url FROM projects")}
+
+    def upsert_projects(self, projects):
+        """Store (or update) project rows, leaving their versions alone"""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO projects (project_url, name, description, tier, created_at, updated_at) "
+                "VALUES (:project_url, :name, :description, :tier, :created_at, :updated_at) "
+                "ON CONFLICT (project_url) DO UPDATE SET name = excluded.name, description = excluded.description, "
+                "tier = excluded.tier, created_at = excluded.created_at, updated_at = excluded.updated_at, "
+                "synced_at = CURRENT_TIMESTAMP",
+                [_project_row(project) for project in projects])
+
+    def update_version(self, project, version):
+        """Update the settings of a mirrored version, keeping its BOM (and its last_bom_update)"""
+        row = _version_row(project, version)
+        del row['last_bom_update']
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE versions SET project_name = :project_name, version_name = :version_name, phase = :phase, "
+                "distribution = :distribution, nickname = :nickname, release_date = :release_date, "
+                "created_at = :created_at, settings_updated_at = :settings_updated_at, synced_at = CURRENT_TIMESTAMP "
+                "WHERE version_url = :version_url", row)
+
+    def replace_version(self, project, version, components, vulnerabilities, policy_status):
+        """Store (or replace) a version and its BOM in a single transaction"""
+        row = _version_row(project, version)
+        version_url = row['version_url']
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM versions WHERE version_url = ?", (version_url,))
+            self.connection.execute(
+                "INSERT INTO versions (version_url, project_url, project_name, version_name, phase, distribution, "
+                "nickname, release_date, created_at, settings_updated_at, last_bom_update) VALUES (:version_url, "
+                ":project_url, :project_name, :version_name, :phase, :distribution, :nickname, :release_date, "
+                ":created_at, :settings_updated_at, :last_bom_update)", row)
+            self.connection.executemany(
+                "INSERT INTO components (version_url, bom_component_url, component_name, component_version_name, "
+                "component_url, component_version_url, policy_status, review_status, approval_status, usages, "
+                "match_types) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(version_url, get_url(c), c.get('componentName'), c.get('componentVersionName'), c.get('component'),
+                  c.get('componentVersion'), c.get('policyStatus'), c.get('reviewStatus'), c.get('approvalStatus'),
+                  ','.join(c.get('usages') or []), ','.join(c.get('matchTypes') or [])) for c in components])
+            self.connection.executemany(
+                "INSERT INTO licenses (version_url, bom_component_url, license_name, license_url, license_family, "
+                "license_type) VALUES (?, ?, ?, ?, ?, ?)",
+                [(version_url, get_url(c), l.get('licenseDisplay'), l.get('license'),
+                  safe_get(l, 'licenseFamilySummary', 'name'), l.get('licenseType'))
+                 for c in components for l in c.get('licenses') or []])
+            self.connection.executemany(
+                "INSERT INTO vulnerabilities (version_url, component_name, component_version_name, "
+                "component_version_url, vulnerability_name, source, severity, base_score, overall_score, "
+                "remediation_status, published_date, updated_date, cwe_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(version_url, v.get('componentName'), v.get('componentVersionName'), v.get('componentVersion'),
+                  *(safe_get(v, 'vulnerabilityWithRemediation', key) for key in (
+                      'vulnerabilityName', 'source', 'severity', 'baseScore', 'overallScore', 'remediationStatus',
+                      'vulnerabilityPublishedDate', 'vulnerabilityUpdatedDate', 'cweId'))) for v in vulnerabilities])
+            if policy_status is not None:
+                self.connection.execute(
+                    "INSERT INTO policy_status (version_url, overall_status, in_violation, in_violation_overridden, "
+                    "not_in_violation) VALUES (?, ?, ?, ?, ?)",
+                    (version_url, policy_status.get('overallStatus'), _status_count(policy_status, 'IN_VIOLATION'),
+                     _status_count(policy_status, 'IN_VIOLATION_OVERRIDDEN'),
+                     _status_count(policy_status, 'NOT_IN_VIOLATION')))
+
+    def remove_versions(self, version_urls):
+        """Drop versions (and their BOMs) from the mirror"""
+        with self._lock, self.connection:
+            self.connection.executemany("DELETE FROM versions WHERE version_url = ?", [(url,) for url in version_urls])
+
+    def remove_projects(self, project_urls):
+        """Drop projects (and their versions) from the mirror"""
+        with self._lock, self.connection:
+            self.connection.executemany("DELETE FROM projects WHERE project_url = ?", [(url,) for url in project_urls])
+
+    def start_run(self):
+        """Record the start of a sync, returning its id"""
+        with self._lock, self.connection:
+            return self.connection.execute("INSERT INTO sync_runs DEFAULT VALUES").lastrowid
+
+    def finish_run(self, run_id, stats):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE sync_runs SET finished_at = CURRENT_TIMESTAMP, versions = :versions, bom_updated = :bom_updated, "
+                "settings_updated = :settings_updated, removed = :removed, failed = :failed WHERE id = :id",
+                dict(stats, id=run_id))
+
+    def last_run(self):
+        """The latest sync run as a dict, or None if the mirror was never synced"""
+        rows = self.execute("SELECT * FROM sync_runs ORDER BY id DESC LIMIT 1")
+        return dict(rows[0]) if rows else None
+
+    def last_finished_run(self):
+        """The latest sync run which completed as a dict, with its 'age' in seconds, or None"""
+        rows = self.execute(
+            "SELECT *, (julianday('now') - julianday(finished_at)) * 86400 AS age FROM sync_runs "
+            "WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT 1")
+        return dict(rows[0]) if rows else None
+
+    def is_stale(self, max_age):
+        """True if no sync completed, or none within the last max_age seconds"""
+        run = self.last_finished_run()
+        return run is None or run['age'] > max_age
+
+
+class MirrorSync:
+    """Incrementally copy the portfolio of a Hub into a MirrorStore.
+
+    Usage:
+        stats = MirrorSync(bd, MirrorStore('portfolio-mirror.db')).sync()
+    """
+
+    def __init__(self, client, store, max_workers=8, page_size=1000):
+        """
+        Args:
+            client (Client): authenticated client
+            store (MirrorStore): the mirror to update
+            max_workers (int): number of projects and BOMs read concurrently. Defaults to 8.
+            page_size (int): items per page. Defaults to 1000.
+        """
+        self.client = client
+        self.store = store
+        self.max_workers = max_workers
+        self.page_size = page_size
+
+    def list_versions(self, executor):
+        """Read every project and project version (the versions of each project concurrently)
+
+        Returns:
+            tuple: (list of projects, list of (project, version) tuples)
+        """
+        projects = list(self.client.get_resource('projects', page_size=self.page_size))
+
+        def project_versions(project):
+            return [(project, version) for version in self.client.get_resource('versions', project, page_size=self.page_size)]
+        return projects, [pv for pvs in executor.map(project_versions, projects) for pv in pvs]
+
+    def read_version(self, version):
+        """Read the BOM components, vulnerable components and policy status of a project version"""
+        headers = {'Accept': BOM_MEDIA_TYPE}
+        components = list(self.client.get_resource('components', version, page_size=self.page_size, headers=headers))
+        vulnerabilities = list(self.client.get_resource(
+            'vulnerable-components', version, page_size=self.page_size, headers=headers))
+        resources = self.client.list_resources(version)
+        policy_status = self.client.get_json(resources['policy-status']) if 'policy-status' in resources else None
+        return components, vulnerabilities, policy_status
+
+    def sync(self, full=False):
+        """Bring the mirror up to date.
+
+        Args:
+            full (bool): re-read every BOM, e.g. after policy rules changed. Defaults to False.
+
+        Returns:
+            dict: number of 'versions' on the Hub, of versions whose BOM was read ('bom_updated'), of
+                  versions whose settings only were updated ('settings_updated'), of 'removed' versions
+                  and of versions which 'failed' to sync (they are retried by the next sync)
+        """
+        last_run = self.store.last_run()
+        if last_run and not last_run['finished_at']:
+            logger.info(f"Resuming the sync started at {last_run['started_at']}")
+        run_id = self.store.start_run()
+        mirrored = self.store.version_state()
+        mirrored_projects = self.store.project_urls()
+        stats = {'versions': 0, 'bom_updated': 0, 'settings_updated': 0, 'removed': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            projects, versions = self.list_versions(executor)
+            self.store.upsert_projects(projects)
+            stats['versions'] = len(versions)
+
+            changed = []
+            for project, version in versions:
+                settings_updated_at, last_bom_update = mirrored.get(get_url(version), (None, None))
+                if full or not last_bom_update or last_bom_update != version.get('lastBomUpdateDate'):
+                    changed.append((project, version))
+                elif settings_updated_at != version.get('settingUpdatedAt'):
+                    self.store.update_version(project, version)
+                    stats['settings_updated'] += 1
+            logger.info(f"Reading the BOMs of {len(changed)} of {len(versions)} project versions")
+
+            futures = {executor.submit(self.read_version, version): (project, version) for project, version in changed}
+            # the store is written from this thread only, as each BOM has been read
+            for done, future in enumerate(as_completed(futures), 1):
+                project, version = futures[future]
+                try:
+                    self.store.replace_version(project, version, *future.result())
+                    stats['bom_updated'] += 1
+                except Exception as e:
+                    logger.error(f"Could not mirror {project['name']} {version['versionName']}: {e}")
+                    stats['failed'] += 1
+                if done % 100 == 0:
+                    logger.info(f"Mirrored {done} of {len(changed)} BOMs")
+
+        removed = set(mirrored) - {get_url(version) for _, version in versions}
+        self.store.remove_versions(removed)
+        self.store.remove_projects(mirrored_projects - {get_url(project) for project in projects})
+        stats['removed'] = len(removed)
+        self.store.finish_run(run_id, stats)
+        logger.info(f"Mirror synced: {stats}")
+        return stats
@@ -0,0 +1,166 @@
+"""
+Consume the Hub notifications as a feed
+
+Polling scripts used to ask for a broad window of notifications (or all of them) each time and
+filter them on the client. NotificationFeed keeps a cursor, the createdAt of the newest
+notification handled plus the ids of the notifications handled at that same instant, and asks
+the Hub only for newer notifications of the wanted types. Notifications seen before are dropped,
+the rest are passed to the registered handlers, oldest first, and the cursor is saved so a
+restarted poller carries on where it stopped. An idle poll costs a single small request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from .Utils import get_paged_items, get_url, parse_iso8601
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_MEDIA_TYPE = "application/vnd.blackducksoftware.notification-4+json"
+
+
+def notification_id(notification):
+    """Identity of a notification: its url, or a digest of its content if it has none"""
+    return get_url(notification) or hashlib.sha1(json.dumps(notification, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class NotificationFeed:
+    """Incremental notifications poller with a persisted cursor.
+
+    Usage:
+        feed = NotificationFeed(bd.session, types=['VERSION_BOM_CODE_LOCATION_BOM_COMPUTED'], state_file='.notifications')
+
+        @feed.handler('VERSION_BOM_CODE_LOCATION_BOM_COMPUTED')
+        def bom_computed(notification):
+            print(notification['content']['projectVersion'])
+
+        feed.run(interval=30)
+    """
+
+    def __init__(self, session, base_url='', url=None, types=None, state_file=None, start_date=None, page_size=100):
+        """
+        Args:
+            session (requests.Session): authenticated session
+            base_url (str): Hub url, used when url is not given
+            url (str): notifications endpoint, e.g. the 'notifications' link of the current user.
+                       Defaults to the system-wide /api/notifications.
+            types (list): notification types to ask for, filtered by the Hub. Defaults to all types.
+            state_file (str): optional, where the cursor is persisted across runs
+            start_date (str): ISO-8601 date to start from when there is no saved cursor.
+                              Defaults to None, i.e. every notification the Hub still has.
+            page_size (int): notifications per page. Defaults to 100.
+        """
+        self.session = session
+        self.url = url or base_url.rstrip('/') + "/api/notifications"
+        self.types = list(types or [])
+        self.state_file = state_file
+        self.page_size = page_size
+        self._handlers = []
+        self.cursor = self._load_cursor() or {'createdAt': start_date, 'ids': []}
+
+    def _load_cursor(self):
+        if not self.state_file:
+            return None
+        try:
+            with open(self.state_file) as f:
+                cursor = json.load(f)
+        except (OSError, ValueError):
+            return None
+        logger.debug(f"Resuming notifications after {cursor.get('createdAt')}")
+        return cursor
+
+    def save_cursor(self):
+        """Persist the cursor to the state file, if there is one"""
+        if not self.state_file:
+            return
+        tmp_pathname = self.state_file + '.tmp'
+        with open(tmp_pathname, 'w') as f:
+            json.dump(self.cursor, f)
+        os.replace(tmp_pathname, self.state_file)
+
+    def add_handler(self, handler, types=None):
+        """Call handler(notification) for each new notification, or only for those of the given type(s)"""
+        if isinstance(types, str):
+            types = [types]
+        self._handlers.append((set(types) if types else None, handler))
+
+    def handler(self, types=None):
+        """Decorator form of add_handler"""
+        def register(function):
+            self.add_handler(function, types)
+            return function
+        return register
+
+    def _params(self):
+        params = {'sort': 'createdAt ASC'}
+        if self.types:
+            params['filter'] = [f"notificationType:{t}" for t in self.types]
+        if self.cursor['createdAt']:
+            # startDate is inclusive, the notifications seen at that instant are dropped below
+            params['startDate'] = self.cursor['createdAt']
+        return params
+
+    def fetch(self):
+        """Read the notifications which are newer than the cursor, without moving it.
+
+        Returns:
+            list: of notifications, oldest first
+        """
+        notifications = list(get_paged_items(
+            self.session, self.url, self._params(), {'Accept': NOTIFICATION_MEDIA_TYPE}, self.page_size))
+
+        seen = set(self.cursor['ids'])
+        since = parse_iso8601(self.cursor['createdAt'])
+        new = {}
+        for notification in notifications:
+            created = parse_iso8601(notification['createdAt'])
+            if since and (created < since or (created == since and notification_id(notification) in seen)):
+                continue
+            if self.types and notification.get('type') not in self.types:
+                continue
+            new.setdefault(notification_id(notification), (created, notification))
+        logger.debug(f"{len(notifications)} notifications read, {len(new)} new")
+        return [notification for _, notification in sorted(new.values(), key=lambda n: n[0])]
+
+    def _advance(self, notification):
+        # compared as datetimes, as in fetch(), since the same instant may be written differently
+        if parse_iso8601(notification['createdAt']) != parse_iso8601(self.cursor['createdAt']):
+            self.cursor = {'createdAt': notification['createdAt'], 'ids': []}
+        self.cursor['ids'].append(notification_id(notification))
+
+    def poll(self):
+        """Fetch the new notifications, pass each one to the matching handlers and save the cursor.
+
+        The cursor moves past a notification once all its handlers returned, so if a handler raises
+        the notification is handed out again by the next poll.
+
+        Returns:
+            int: number of notifications handled
+        """
+        handled = 0
+        try:
+            for notification in self.fetch():
+                for types, handler in self._handlers:
+                    if types is None or notification.get('type') in types:
+                        handler(notification)
+                self._advance(notification)
+                handled += 1
+        finally:
+            if handled:
+                self.save_cursor()
+        return handled
+
+    def run(self, interval=30.0, iterations=None):
+        """Poll every interval seconds, for ever or for the given number of iterations"""
+        while iterations is None or iterations > 0:
+            count = self.poll()
+            if count:
+                logger.info(f"Handled {count} notifications")
+            if iterations is not None:
+                iterations -= 1
+                if not iterations:
+                    break
+            time.sleep(interval)
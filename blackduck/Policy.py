@@ -43,3 +43,8 @@ def delete_policy_by_id(self, policy_id):
 
 def delete_policy_by_url(self, policy_url):
     return self.execute_delete(policy_url)
+
+def get_policy_overrider(self, **kwargs):
+    '''Return a PolicyOverride.PolicyOverrider using this instance's session'''
+    from .PolicyOverride import PolicyOverrider
+    return PolicyOverrider(self.get_session(), base_url=self.get_urlbase(), **kwargs)
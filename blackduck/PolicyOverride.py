@@ -0,0 +1,219 @@
+"""
+Override policy violations of many BOM components at once
+
+Overriding one violation means finding the project version, the component in its BOM, the
+policy rules it violates and then PUTting the new status. Done row by row that is a walk of
+the portfolio per row. PolicyOverrider groups the rows by project version, reads each version
+and its BOM once, matches rows to components through a (component name, version name) index,
+fetches the policy status of each matched component once and applies the overrides concurrently.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .Utils import get_link, get_paged_items, get_url, object_id, safe_get
+
+logger = logging.getLogger(__name__)
+
+BOM_MEDIA_TYPE = "application/vnd.blackducksoftware.bill-of-materials-6+json"
+
+
+def component_key(component_name, component_version_name):
+    """Index key of a BOM component: the name case-insensitively and the version name stripped"""
+    return (str(component_name or '').strip().casefold(), str(component_version_name or '').strip())
+
+
+class PolicyOverrider:
+    """Override policy violations in bulk.
+
+    Usage:
+        overrider = PolicyOverrider(bd.session)
+        results = overrider.override([
+            {'project': 'p', 'version': '1.0', 'component': 'lodash', 'component_version': '4.17.21',
+             'comment': 'approved by legal', 'category': 'SECURITY'},
+        ])
+    """
+
+    def __init__(self, session, base_url='', max_workers=8, page_size=1000):
+        """
+        Args:
+            session (requests.Session): authenticated session
+            base_url (str): Hub url, prepended to relative urls
+            max_workers (int): number of requests run concurrently. Defaults to 8.
+            page_size (int): items per page when reading BOMs and policy rules. Defaults to 1000.
+        """
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self._policy_rules = None
+
+    def _get(self, url, params=None, headers=None):
+        response = self.session.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_items(self, url, params=None, headers=None):
+        return get_paged_items(self.session, url, params, headers, self.page_size)
+
+    def find_version(self, project_name, version_name):
+        """Return the project version named version_name in project project_name, or None"""
+        projects = self._get(self.base_url + "/api/projects", params={'q': f"name:{project_name}"})
+        project = next((p for p in projects.get('items', []) if p['name'] == project_name), None)
+        if not project:
+            return None
+        versions_url = get_link(project, 'versions') or get_url(project) + "/versions"
+        versions = self._get(versions_url, params={'q': f"versionName:{version_name}"})
+        return next((v for v in versions.get('items', []) if v['versionName'] == version_name), None)
+
+    def component_index(self, version):
+        """Read the BOM of a project version once and index it.
+
+        Returns:
+            dict: component_key(name, version name) -> list of BOM components
+        """
+        index = {}
+        components_url = get_link(version, 'components') or get_url(version) + "/components"
+        for component in self._get_items(components_url, headers={'Accept': BOM_MEDIA_TYPE}):
+            key = component_key(component.get('componentName'), component.get('componentVersionName'))
+            index.setdefault(key, []).append(component)
+        return index
+
+    def policy_rules(self):
+        """The policy rules of the server by id, read once"""
+        if self._policy_rules is None:
+            rules = self._get_items(self.base_url + "/api/policy-rules")
+            self._policy_rules = {object_id(rule): rule for rule in rules}
+        return self._policy_rules
+
+    def _policy_status(self, component):
+        url = get_link(component, 'policy-status') or get_url(component) + "/policy-status"
+        return url, self._get(url, headers={'Accept': BOM_MEDIA_TYPE})
+
+    def _put_override(self, url, comment):
+        data = {
+            "approvalStatus": "IN_VIOLATION_OVERRIDDEN",
+            "comment": comment,
+            "updatedAt": datetime.now().isoformat(),
+        }
+        headers = {'Content-Type': BOM_MEDIA_TYPE, 'Accept': BOM_MEDIA_TYPE}
+        response = self.session.put(url, headers=headers, json=data)
+        response.raise_for_status()
+        return response
+
+    def override(self, rows, comment=None):
+        """Override the policy violations of many BOM components.
+
+        Args:
+            rows (iterable): of dicts with 'project', 'version' (project version name), 'component',
+                             'component_version' and optionally 'comment' (falls back to the comment
+                             argument), 'category' and/or 'rule' (policy rule name) to only override
+                             violations of matching rules. Without either every violation is overridden.
+            comment (str): default override comment
+
+        Returns:
+            list: one result per row, in the order given, being the row updated with status
+                  ('overridden', 'not_in_violation', 'not_found' or 'failed'), the names of the
+                  overridden rules and error
+        """
+        results = [dict(row, status=None, rules=[], error=None) for row in rows]
+        version_names = list(dict.fromkeys((r['project'], r['version']) for r in results))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def index_version(names):
+                try:
+                    version = self.find_version(*names)
+                    return names, (self.component_index(version) if version else None), None
+                except Exception as e:
+                    return names, None, e
+
+            indexes = {}
+            errors = {}
+            for names, index, error in executor.map(index_version, version_names):
+                indexes[names] = index
+                if error:
+                    errors[names] = error
+                    logger.error(f"Could not read the BOM of {names}: {error}")
+            logger.info(f"Indexed the BOMs of {sum(i is not None for i in indexes.values())} of {len(version_names)} project versions")
+
+            # match rows to components, each matched component's policy status is read once
+            matched = {}
+            for result in results:
+                names = (result['project'], result['version'])
+                if names in errors:
+                    result.update(status='failed', error=errors[names])
+                    continue
+                index = indexes[names]
+                key = component_key(result['component'], result['component_version'])
+                components = index.get(key) if index else None
+                if not components:
+                    result.update(status='not_found', error="unknown project version or component")
+                    continue
+                result['_components'] = [c for c in components if c.get('policyStatus') != 'NOT_IN_VIOLATION']
+                for component in result['_components']:
+                    matched[get_url(component)] = component
+                if not result['_components']:
+                    result['status'] = 'not_in_violation'
+
+            def read_status(component):
+                try:
+                    return get_url(component), self._policy_status(component)
+                except Exception as e:
+                    return get_url(component), e
+            statuses = dict(executor.map(read_status, matched.values()))
+
+            if any(r.get('category') or r.get('rule') for r in results if r['status'] is None):
+                self.policy_rules()
+
+            def apply(result):
+                if result['status'] is not None:
+                    return result
+                try:
+                    for component in result['_components']:
+                        status = statuses[get_url(component)]
+                        if isinstance(status, Exception):
+                            raise status
+                        url, policy_status = status
+                        if policy_status.get('approvalStatus') != 'IN_VIOLATION':
+                            continue
+                        result['rules'].extend(self._override_component(
+                            get_url(component), url, policy_status, result, result.get('comment') or comment))
+                except Exception as e:
+                    result.update(status='failed', error=e)
+                    return result
+                result['status'] = 'overridden' if result['rules'] else 'not_in_violation'
+                return result
+
+            results = list(executor.map(apply, results))
+
+        for result in results:
+            result.pop('_components', None)
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        logger.info(f"policy overrides: {counts}")
+        return results
+
+    def _override_component(self, component_url, policy_status_url, policy_status, row, comment):
+        rule_ids = self._violated_rule_ids(policy_status)
+        if not (row.get('category') or row.get('rule')):
+            # one PUT overrides every violation of the component
+            self._put_override(policy_status_url, comment)
+            return [safe_get(self._policy_rules or {}, rule_id, 'name') or rule_id for rule_id in rule_ids] or ['*']
+
+        overridden = []
+        for rule_id in rule_ids:
+            rule = self.policy_rules().get(rule_id, {})
+            if row.get('category') and rule.get('category') != row['category']:
+                continue
+            if row.get('rule') and rule.get('name') != row['rule']:
+                continue
+            self._put_override(f"{component_url}/policy-rules/{rule_id}/policy-status", comment)
+            overridden.append(rule.get('name', rule_id))
+        return overridden
+
+    @staticmethod
+    def _violated_rule_ids(policy_status):
+        return [link['href'].rstrip('/').split('/')[-1] for link in safe_get(policy_status, '_meta', 'links') or []
+                if '/policy-rules/' in link.get('href', '')]
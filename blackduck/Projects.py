@@ -161,6 +161,14 @@ def get_version_components(self, projectversion, limit=1000):
     jsondata = response.json()
     return jsondata
 
+def iter_version_components(self, projectversion, page_size=100, prefetch=False):
+    '''Generator version of get_version_components which pages through the whole BOM
+    (page_size components per request) rather than asking for it all at once
+    '''
+    url = projectversion['_meta']['href'] + "/components"
+    custom_headers = {'Accept': 'application/vnd.blackducksoftware.bill-of-materials-6+json'}
+    return self._get_paged_items(url, custom_headers=custom_headers, page_size=page_size, prefetch=prefetch)
+
 def update_project_settings(self, project, new_settings={}):
     url = project['_meta']['href']
     headers = self.get_headers()
@@ -357,18 +365,41 @@ def _find_user_url(self, assignable_user, user_name):
             return user['user']
 
 def _project_role_urls(self, project_role_names):
-    all_project_roles = self.get_project_roles()
     project_role_urls = list()
     for project_role_name in project_role_names:
-        for project_role in all_project_roles:
-            if project_role_name == project_role['name']:
-                project_role_urls.append(project_role['_meta']['href'])
+        project_role = self.find_role_by_name(project_role_name, project_scope=True)
+        if project_role:
+            project_role_urls.append(project_role['_meta']['href'])
     return project_role_urls
 
+def _post_project_assignment(self, project_url, principal_url, project_roles_urls, kind):
+    # kind is 'user' or 'group'
+    headers = self.get_headers()
+
+    # The POST endpoint changes based on whether we found any project-roles to assign
+    # Also, due to what appears to be a defect, the Content-Type changes
+    if project_roles_urls:
+        url = principal_url + "/roles"
+        # one dict per project role assignment
+        post_data = [{'role': r, 'scope': project_url} for r in project_roles_urls]
+        # I found I had to use this Content-Type (application/json resulted in 412)
+        # ref: https://jira.dc1.lan/browse/HUB-18417
+        headers['Content-Type'] = 'application/vnd.blackducksoftware.internal-1+json'
+    else:
+        url = project_url + ("/users" if kind == 'user' else "/usergroups")
+        # Assigning a user or group with no project-roles
+        post_data = {kind: principal_url}
+        headers['Content-Type'] = 'application/json'
+
+    return requests.post(
+        url,
+        headers=headers,
+        data=json.dumps(post_data),
+        verify=not self.config['insecure'])
+
 def assign_user_group_to_project(self, project_name, user_group_name, project_roles):
     # Assign the user group to the project using the list of project-role names
     project = self.get_project_by_name(project_name)
-    # user_group = self.get_user_group_by_name(user_group_name)
 
     if project:
         project_url = project['_meta']['href']
@@ -383,32 +414,9 @@ def assign_user_group_to_project(self, project_name, user_group_name, project_ro
 
             user_group_url = self._find_user_group_url(assignable_user_groups, user_group_name)
             if user_group_url:
-                headers = self.get_headers()
-
                 # need project role urls to build the POST payload
                 project_roles_urls = self._project_role_urls(project_roles)
-
-                # The POST endpoint changes based on whether we found any project-roles to assign
-                # Also, due to what appears to be a defect, the Content-Type changes
-                if project_roles_urls:
-                    url = user_group_url + "/roles"
-                    # one dict per project role assignment
-                    post_data = [{'role': r, 'scope': project_url} for r in project_roles_urls]
-                    # I found I had to use this Content-Type (application/json resulted in 412)
-                    # ref: https://jira.dc1.lan/browse/HUB-18417
-                    headers['Content-Type'] = 'application/vnd.blackducksoftware.internal-1+json'
-                else:
-                    url = project_url + "/usergroups"
-                    # Assigning a group with no project-roles
-                    post_data = {"group": user_group_url}
-                    headers['Content-Type'] = 'application/json'
-
-                response = requests.post(
-                    url, 
-                    headers=headers, 
-                    data=json.dumps(post_data), 
-                    verify = not self.config['insecure'])
-                return response
+                return self._post_project_assignment(project_url, user_group_url, project_roles_urls, 'group')
             else:
                 assignable_groups = [u['name'] for u in assignable_user_groups['items']]
                 logger.warning("The user group {} was not found in the assignable user groups ({}) for this project {}. Is the group already assigned to this project?".format(
@@ -439,12 +447,10 @@ def assign_user_to_project(self, user_name, project_name, project_roles, limit=1
     if project:
         project_url = project['_meta']['href']
         assignable_users_link = self.get_link(project, 'assignable-users')
-        paramstring = self.get_limit_paramstring(limit)
-        url = assignable_users_link + paramstring
-        logger.debug("GET {}".format(url))
         if assignable_users_link:
-            assignable_users_response = self.execute_get(url)
-            assignable_users = assignable_users_response.json()
+            url = assignable_users_link + self.get_limit_paramstring(limit)
+            logger.debug("GET {}".format(url))
+            assignable_users = self.execute_get(url).json()
 
             # TODO: What to do if the user is already assigned to the project, and therefore
             # does not appear in the list of 'assignable' user? Should we search the (assigned) user
@@ -452,32 +458,9 @@ def assign_user_to_project(self, user_name, project_name, project_roles, limit=1
 
             user_url = self._find_user_url(assignable_users, user_name)
             if user_url:
-                headers = self.get_headers()
-
                 # need project role urls to build the POST payload
                 project_roles_urls = self._project_role_urls(project_roles)
-
-                # The POST endpoint changes based on whether we found any project-roles to assign
-                # Also, due to what appears to be a defect, the Content-Type changes
-                if project_roles_urls:
-                    url = user_url + "/roles"
-                    # one dict per project role assignment
-                    post_data = [{'role': r, 'scope': project_url} for r in project_roles_urls]
-                    # I found I had to use this Content-Type (application/json resulted in 412)
-                    # ref: https://jira.dc1.lan/browse/HUB-18417
-                    headers['Content-Type'] = 'application/vnd.blackducksoftware.internal-1+json'
-                else:
-                    url = project_url + "/users"
-                    # Assigning a user with no project-roles
-                    post_data = {"user": user_url}
-                    headers['Content-Type'] = 'application/json'
-
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    data=json.dumps(post_data),
-                    verify=not self.config['insecure'])
-                return response
+                return self._post_project_assignment(project_url, user_url, project_roles_urls, 'user')
             else:
                 assignable_username = [u['name'] for u in assignable_users['items']]
                 logger.warning(
@@ -590,3 +573,8 @@ def get_version_scan_info(self, version_obj):
             'number_scans': None
         }
     return scan_info
+
+def get_journal_sync(self, store, **kwargs):
+    '''Return a Journal.JournalSync copying journal events into store (a Journal.JournalStore)'''
+    from .Journal import JournalSync
+    return JournalSync(self.get_session(), store, base_url=self.get_urlbase(), **kwargs)
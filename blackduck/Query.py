@@ -0,0 +1,164 @@
+"""
+Query the portfolio mirror
+
+Finding, say, the vulnerabilities of every project with the Client takes nested get_resource loops,
+a request per project, version and component. Once the portfolio is mirrored (see blackduck.Mirror)
+the same question is a query on indexed local tables: MirrorStore.execute runs any SQL and Query
+builds the common queries from keyword filters.
+
+Each table is joined with the versions table (licenses also with their component) so that rows
+carry project_name and version_name. Filters are column=value or column__operator=value, with
+operator one of eq, ne, lt, le, gt, ge, like, contains, startswith, in and isnull. Version names are
+compared numerically. like takes a LIKE pattern, contains and startswith match the value literally.
+
+Indexes hold version names in plain text order, so a range on version_name or component_version_name
+(or ordering by them) is not answered from an index: it is checked on each row the other filters
+select. Filter on the name as well, e.g. component_name with component_version_name__lt, so that the
+index narrows the rows first; a version range alone scans the whole table.
+
+Usage:
+    store = MirrorStore('portfolio-mirror.db')
+    for row in store.query('vulnerabilities').filter(vulnerability_name='CVE-2021-44228', remediation_status__ne='PATCHED'):
+        print(row['project_name'], row['version_name'], row['component_version_name'])
+    store.query('components').filter(component_name='apache log4j', component_version_name__lt='2.17').count()
+    store.query('licenses').filter(license_name__contains='GPL').select('project_name', 'version_name', distinct=True).all()
+"""
+
+import copy
+
+TABLES = {
+    'projects': ("projects", ('projects',)),
+    'versions': ("versions", ('versions',)),
+    'components': ("components JOIN versions USING (version_url)", ('components', 'versions')),
+    'licenses': ("licenses JOIN components USING (version_url, bom_component_url) JOIN versions USING (version_url)",
+                 ('licenses', 'components', 'versions')),
+    'vulnerabilities': ("vulnerabilities JOIN versions USING (version_url)", ('vulnerabilities', 'versions')),
+    'policy_status': ("policy_status JOIN versions USING (version_url)", ('policy_status', 'versions')),
+}
+
+VERSION_COLUMNS = {'version_name', 'component_version_name'}
+
+OPERATORS = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=', 'like': 'LIKE'}
+
+
+def _escape_like(value):
+    # so that % and _ in the value of contains and startswith match themselves
+    return str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class Query:
+    """Filter, order and limit the rows of a mirror table. Each method returns a new Query."""
+
+    def __init__(self, store, table):
+        """
+        Args:
+            store (MirrorStore): the mirror
+            table (str): one of projects, versions, components, licenses, vulnerabilities or policy_status
+        """
+        if table not in TABLES:
+            raise ValueError(f"unknown table '{table}', use one of {', '.join(TABLES)}")
+        self.store = store
+        self.table = table
+        self._columns = None
+        self._distinct = False
+        self._conditions = []
+        self._parameters = []
+        self._order_by = []
+        self._limit = None
+        self._available = None
+
+    @property
+    def columns(self):
+        """The columns which can be filtered on, ordered by and selected"""
+        if self._available is None:
+            columns = []
+            for table in TABLES[self.table][1]:
+                columns.extend(row['name'] for row in self.store.execute(f"PRAGMA table_info({table})") if row['name'] not in columns)
+            self._available = columns
+        return self._available
+
+    def _column(self, column):
+        if column not in self.columns:
+            raise ValueError(f"unknown column '{column}' in {self.table}, use one of {', '.join(self.columns)}")
+        return column
+
+    def _copy(self):
+        query = copy.copy(self)
+        query._conditions = list(self._conditions)
+        query._parameters = list(self._parameters)
+        query._order_by = list(self._order_by)
+        return query
+
+    def filter(self, **conditions):
+        """Keep the rows matching all the conditions, e.g. filter(severity__in=['HIGH', 'CRITICAL'])"""
+        query = self._copy()
+        for key, value in conditions.items():
+            column, _, operator = key.partition('__')
+            column = self._column(column)
+            operator = operator or 'eq'
+            if operator == 'in':
+                values = list(value)
+                query._conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                query._parameters.extend(values)
+            elif operator == 'isnull':
+                query._conditions.append(f"{column} IS {'' if value else 'NOT '}NULL")
+            elif operator in ('contains', 'startswith'):
+                query._conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+                query._parameters.append(f"{'%' if operator == 'contains' else ''}{_escape_like(value)}%")
+            elif operator in OPERATORS:
+                # numeric comparison, which the (text ordered) indexes cannot serve, see the module docstring
+                collate = " COLLATE VERSION" if column in VERSION_COLUMNS and operator in ('lt', 'le', 'gt', 'ge') else ""
+                query._conditions.append(f"{column} {OPERATORS[operator]} ?{collate}")
+                query._parameters.append(value)
+            else:
+                raise ValueError(f"unknown operator '{operator}' in '{key}'")
+        return query
+
+    def select(self, *columns, distinct=False):
+        """Return only some columns, optionally dropping duplicate rows"""
+        query = self._copy()
+        query._columns = [self._column(column) for column in columns] or None
+        query._distinct = distinct
+        return query
+
+    def order_by(self, *columns):
+        """Order by columns, descending if prefixed with '-'"""
+        query = self._copy()
+        for column in columns:
+            descending = column.startswith('-')
+            column = self._column(column.lstrip('-'))
+            collate = " COLLATE VERSION" if column in VERSION_COLUMNS else ""
+            query._order_by.append(f"{column}{collate}{' DESC' if descending else ''}")
+        return query
+
+    def limit(self, limit):
+        query = self._copy()
+        query._limit = int(limit) if limit else None
+        return query
+
+    def sql(self):
+        """The SQL statement and its parameters"""
+        sql = f"SELECT {'DISTINCT ' if self._distinct else ''}{', '.join(self._columns or ['*'])} FROM {TABLES[self.table][0]}"
+        if self._conditions:
+            sql += " WHERE " + " AND ".join(self._conditions)
+        if self._order_by:
+            sql += " ORDER BY " + ", ".join(self._order_by)
+        if self._limit:
+            sql += f" LIMIT {self._limit}"
+        return sql, list(self._parameters)
+
+    def all(self):
+        """list: of the matching rows as dicts"""
+        return [dict(row) for row in self.store.execute(*self.sql())]
+
+    def first(self):
+        """The first matching row as a dict, or None"""
+        rows = self.limit(1).all()
+        return rows[0] if rows else None
+
+    def count(self):
+        sql, parameters = self.sql()
+        return self.store.execute(f"SELECT count(*) FROM ({sql})", parameters)[0][0]
+
+    def __iter__(self):
+        return iter(self.all())
@@ -0,0 +1,335 @@
+"""
+Generate and download many reports at once
+
+Reports are created on the Hub with a POST and then take anywhere from seconds to many minutes
+to generate. ReportManager keeps a bounded number of them generating at a time, polls every
+pending report from a single loop (backing off while they are still in progress) and downloads
+each one as soon as it completes, so a batch takes about as long as its slowest reports.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .Reporting import (_notices_report_data, _version_report_data, _vuln_status_report_data,
+                        vuln_status_report_headers)
+from .Transfers import DEFAULT_CHUNK_SIZE
+from .Utils import get_link, get_paged_items, object_id, parse_iso8601
+
+logger = logging.getLogger(__name__)
+
+valid_sbom_types = ["SPDX_22", "SPDX_23", "SPDX_30", "CYCLONEDX_13", "CYCLONEDX_14", "CYCLONEDX_15", "CYCLONEDX_16"]
+
+
+class ReportCache:
+    """Local store of downloaded reports, keyed by version, report type, categories and format.
+
+    An entry is fresh as long as the version's lastBomUpdateDate is the one it was stored with,
+    i.e. the BOM has not changed since the report was generated.
+    """
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): where cached reports and the index are kept
+        """
+        self.folder = folder
+        os.makedirs(folder, 0o755, True)
+        try:
+            with open(os.path.join(folder, self.INDEX_NAME)) as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    @staticmethod
+    def key(version_href, post_data):
+        """Cache key of a report request on a version.
+
+        Args:
+            version_href (str): url of the project version
+            post_data (dict): the report request body
+
+        Returns:
+            str: key
+        """
+        identity = [
+            version_href,
+            post_data.get('reportType'),
+            sorted(post_data.get('categories') or []),
+            post_data.get('reportFormat'),
+            post_data.get('sbomType'),
+        ]
+        return hashlib.sha1(json.dumps(identity).encode('utf-8')).hexdigest()
+
+    def get(self, key, bom_updated):
+        """Return the pathname of the cached report if it is still fresh, otherwise None"""
+        entry = self._index.get(key)
+        if entry and entry['bomUpdated'] == bom_updated and os.path.isfile(entry['pathname']):
+            return entry['pathname']
+
+    def put(self, key, pathname, bom_updated):
+        """Copy a downloaded report into the cache, replacing any older copy"""
+        cached_pathname = os.path.join(self.folder, key + os.path.splitext(pathname)[1])
+        shutil.copyfile(pathname, cached_pathname)
+        self._index[key] = {'pathname': cached_pathname, 'bomUpdated': bom_updated}
+        tmp_pathname = os.path.join(self.folder, self.INDEX_NAME + '.tmp')
+        with open(tmp_pathname, 'w') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_pathname, os.path.join(self.folder, self.INDEX_NAME))
+        return cached_pathname
+
+
+class ReportManager:
+    """Create, poll and download reports in bulk.
+
+    Usage:
+        manager = ReportManager(bd.session, output_folder='reports')
+        for version in versions:
+            manager.add_sbom_report(version, filename=f"{version['versionName']}-sbom.zip")
+        results = manager.run()
+    """
+
+    def __init__(self, session, base_url='', max_pending=10, poll_interval=5.0, max_poll_interval=60.0,
+                 timeout=3600.0, output_folder='.', download_workers=4, cache=None, reuse_server_reports=False):
+        """
+        Args:
+            session (requests.Session): authenticated session
+            base_url (str): Hub url, prepended to relative urls
+            max_pending (int): maximum number of reports generating on the Hub at any time. Defaults to 10.
+            poll_interval (float): seconds before a new report is first polled. Defaults to 5.
+            max_poll_interval (float): the poll interval of a report doubles each time it is found still
+                                       in progress, up to this many seconds. Defaults to 60.
+            timeout (float): seconds after which a report that is not complete is given up on. Defaults to 3600.
+            output_folder (str): where downloaded reports are written. Defaults to the current folder.
+            download_workers (int): number of reports downloaded concurrently. Defaults to 4.
+            cache (ReportCache): optional. Reports on versions whose BOM has not changed since they were
+                                 cached are copied from the cache instead of being generated again.
+            reuse_server_reports (bool): download a matching report that the Hub generated after the
+                                         last BOM update instead of creating a new one. Defaults to False.
+        """
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.output_folder = output_folder
+        self.download_workers = download_workers
+        self.cache = cache
+        self.reuse_server_reports = reuse_server_reports
+        self._queue = deque()
+
+    def add(self, url, post_data, filename, headers=None, version=None):
+        """Queue a report request.
+
+        Args:
+            url (str): report creation endpoint, e.g. a version's versionReport, licenseReports or sbom-reports link
+            post_data (dict): report request body
+            filename (str): name of the downloaded file, relative to output_folder
+            headers (dict): optional headers for the POST
+            version (dict): optional, the project version the report is on. Required for the report to be
+                            served from the cache or from an existing report on the Hub.
+
+        Returns:
+            dict: the request, which run() completes with its result
+        """
+        request = {'url': url, 'post_data': post_data, 'headers': headers or {}, 'version': version,
+                   'filename': filename, 'location': None, 'status': 'QUEUED', 'error': None, 'seconds': 0.0,
+                   'source': None}
+        self._queue.append(request)
+        return request
+
+    def add_version_report(self, version, categories, format="CSV", filename=None):
+        """Queue a version (details) report, see Reporting.create_version_reports"""
+        post_data = _version_report_data(version, categories, format)
+        filename = filename or f"{object_id(version)}-version-report.zip"
+        return self.add(get_link(version, 'versionReport'), post_data, filename, version=version)
+
+    def add_notices_report(self, version, format="TEXT", categories=("COPYRIGHT_TEXT", "LICENSE_DATA", "LICENSE_TEXT"), filename=None):
+        """Queue a notices (license) report, see Reporting.create_version_notices_report"""
+        post_data = _notices_report_data(version, format, include_copyright_info=False)
+        post_data['categories'] = list(categories)
+        filename = filename or f"{object_id(version)}-notices-report.zip"
+        return self.add(get_link(version, 'licenseReports'), post_data, filename, version=version)
+
+    def add_vuln_status_report(self, format="CSV", filename="vuln-status-report.zip"):
+        """Queue a (global) vulnerability status report, see Reporting.create_vuln_status_report"""
+        post_data = _vuln_status_report_data(format)
+        return self.add(self.base_url + "/api/vulnerability-status-reports", post_data, filename,
+                        headers={'Content-Type': vuln_status_report_headers['Content-Type']})
+
+    def add_sbom_report(self, version, sbom_type="SPDX_22", format="JSON", include_subprojects=None, filename=None):
+        """Queue an SBOM report"""
+        assert sbom_type in valid_sbom_types, "SBOM type must be one of {}".format(valid_sbom_types)
+        post_data = {
+            'reportFormat': format,
+            'reportType': 'SBOM',
+            'sbomType': sbom_type
+        }
+        if include_subprojects is not None:
+            post_data['includeSubprojects'] = include_subprojects
+        filename = filename or f"{object_id(version)}-sbom-report.zip"
+        return self.add(version['_meta']['href'] + "/sbom-reports", post_data, filename, version=version)
+
+    def _cache_key(self, request):
+        version = request['version']
+        if version and version.get('lastBomUpdateDate'):
+            return ReportCache.key(version['_meta']['href'], request['post_data'])
+
+    def _from_cache(self, request):
+        key = self._cache_key(request)
+        cached_pathname = self.cache.get(key, request['version']['lastBomUpdateDate']) if key else None
+        if cached_pathname:
+            pathname = os.path.join(self.output_folder, request['filename'])
+            os.makedirs(os.path.dirname(os.path.abspath(pathname)), 0o755, True)
+            shutil.copyfile(cached_pathname, pathname)
+            request.update(pathname=pathname, source='cache', status='COMPLETED')
+            logger.info(f"BOM unchanged, using cached report {cached_pathname} for {pathname}")
+            return True
+        return False
+
+    def _find_server_report(self, request):
+        '''Find a completed report on the Hub matching the request that was created after the last BOM update'''
+        bom_updated = parse_iso8601((request['version'] or {}).get('lastBomUpdateDate'))
+        if not bom_updated:
+            return None
+        post_data = request['post_data']
+        reports = get_paged_items(self.session, request['url'], headers={'Accept': 'application/vnd.blackducksoftware.report-4+json'})
+        for report in reports:
+            created = parse_iso8601(report.get('createdAt'))
+            if (report.get('status') == 'COMPLETED'
+                    and report.get('reportType') == post_data.get('reportType')
+                    and report.get('reportFormat') == post_data.get('reportFormat')
+                    and sorted(report.get('categories') or []) == sorted(post_data.get('categories') or [])
+                    and report.get('sbomType') == post_data.get('sbomType')
+                    and created and created > bom_updated):
+                return report
+
+    def _create(self, request):
+        request['started'] = time.monotonic()
+        response = self.session.post(request['url'], json=request['post_data'], headers=request['headers'])
+        response.raise_for_status()
+        location = response.headers.get('Location')
+        if not location:
+            raise ValueError(f"No Location header in the response when creating a report at {request['url']}")
+        request.update(location=location, status='IN_PROGRESS', interval=self.poll_interval,
+                       next_poll=time.monotonic() + self.poll_interval)
+        logger.debug(f"Created report {location}")
+
+    def _download(self, request, report):
+        download_url = get_link(report, 'download')
+        if not download_url:
+            base_url = request['location'].split('/api/')[0]
+            download_url = f"{base_url}/api/reports/{request['location'].rstrip('/').split('/')[-1]}"
+        pathname = os.path.join(self.output_folder, request['filename'])
+        os.makedirs(os.path.dirname(os.path.abspath(pathname)), 0o755, True)
+        headers = {'Accept': 'application/zip', 'Content-Type': 'application/zip'}
+        with self.session.get(download_url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            with open(pathname + '.part', 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE):
+                    f.write(chunk)
+        os.replace(pathname + '.part', pathname)
+        request['pathname'] = pathname
+        logger.info(f"Downloaded report {request['location']} to {pathname}")
+
+    def _finish(self, request, status, error=None):
+        request.update(status=status, error=error, seconds=time.monotonic() - request.get('started', time.monotonic()))
+        if error:
+            logger.error(f"Report {request['location'] or request['url']} {status}: {error}")
+        elif status == 'COMPLETED' and self.cache:
+            key = self._cache_key(request)
+            if key:
+                self.cache.put(key, request['pathname'], request['version']['lastBomUpdateDate'])
+
+    def _poll(self, request, downloads, executor):
+        response = self.session.get(request['location'], headers={'Accept': 'application/vnd.blackducksoftware.report-4+json'})
+        response.raise_for_status()
+        report = response.json()
+        status = report.get('status')
+        if status == 'COMPLETED':
+            request.update(status='DOWNLOADING', source='created')
+            downloads.append((request, executor.submit(self._download, request, report)))
+        elif status == 'FAILED':
+            self._finish(request, 'FAILED', report.get('errorMessage') or 'report generation failed')
+        elif time.monotonic() - request['started'] > self.timeout:
+            self._finish(request, 'TIMEOUT', f"not complete after {self.timeout} seconds")
+        else:
+            request['interval'] = min(request['interval'] * 2, self.max_poll_interval)
+            request['next_poll'] = time.monotonic() + request['interval']
+
+    def run(self, progress=None):
+        """Create, poll and download every queued report.
+
+        Args:
+            progress (callable): optional, called with each request as it finishes
+
+        Returns:
+            list(dict): the requests, each with status COMPLETED, FAILED, TIMEOUT or ERROR,
+                        pathname (if COMPLETED), source ('created', 'server' or 'cache'),
+                        error and elapsed seconds
+        """
+        report_requests = list(self._queue)
+        pending = []
+        downloads = []
+
+        def finished(request):
+            if progress:
+                progress(request)
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            while self._queue or pending or downloads:
+                # keep up to max_pending reports generating on the Hub
+                while self._queue and len(pending) < self.max_pending:
+                    request = self._queue.popleft()
+                    try:
+                        if self.cache and self._from_cache(request):
+                            finished(request)
+                            continue
+                        report = self._find_server_report(request) if self.reuse_server_reports else None
+                        if report:
+                            logger.info(f"BOM unchanged, reusing report {report['_meta']['href']} from the Hub")
+                            request.update(location=report['_meta']['href'], status='DOWNLOADING', source='server',
+                                           started=time.monotonic())
+                            downloads.append((request, executor.submit(self._download, request, report)))
+                            continue
+                        self._create(request)
+                        pending.append(request)
+                    except Exception as e:
+                        self._finish(request, 'ERROR', e)
+                        finished(request)
+
+                now = time.monotonic()
+                for request in [r for r in pending if r['next_poll'] <= now]:
+                    try:
+                        self._poll(request, downloads, executor)
+                    except Exception as e:
+                        self._finish(request, 'ERROR', e)
+                    if request['status'] != 'IN_PROGRESS':
+                        pending.remove(request)
+                        if request['status'] != 'DOWNLOADING':
+                            finished(request)
+
+                for download in [d for d in downloads if d[1].done()]:
+                    downloads.remove(download)
+                    request, future = download
+                    error = future.exception()
+                    self._finish(request, 'ERROR' if error else 'COMPLETED', error)
+                    finished(request)
+
+                # sleep until the next poll is due or a download finishes, whichever comes first
+                timeout = max(0.0, min(r['next_poll'] for r in pending) - time.monotonic()) if pending else None
+                if downloads:
+                    wait([future for _, future in downloads], timeout=timeout, return_when=FIRST_COMPLETED)
+                elif timeout:
+                    time.sleep(timeout)
+
+        completed = sum(r['status'] == 'COMPLETED' for r in report_requests)
+        logger.info(f"{completed} of {len(report_requests)} reports completed")
+        return report_requests
@@ -0,0 +1,179 @@
+"""
+Read downloaded report zips without extracting them
+
+Reports arrive as zip archives holding one or more CSV or JSON members. ReportReader opens the
+members as streams straight from the archive and yields parsed CSV rows or JSON items one at a
+time, so even multi-GB version detail reports are processed with roughly constant memory.
+
+A zip archive has its directory at the end, so a report fetched over HTTP is spooled first:
+into memory up to spool_size bytes, beyond that into an anonymous temporary file that is
+removed when the reader is closed. Nothing is ever extracted to disk.
+
+Iterating JSON items incrementally requires ijson: pip install blackduck[stream]
+Without it the member is loaded with json.load() and the items are yielded from memory.
+"""
+
+import csv
+import io
+import json
+import logging
+import re
+import shutil
+import tempfile
+import zipfile
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from .Transfers import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# reports smaller than this are held in memory, larger ones spill over to an anonymous temp file
+DEFAULT_SPOOL_SIZE = 64 * 1024 * 1024
+
+
+def _walk(document, prefix):
+    # mimics ijson.items() prefixes, e.g. 'aggregateBomViewEntries.item', on a loaded document
+    if not prefix:
+        yield document
+        return
+    key, _, rest = prefix.partition('.')
+    if key == 'item' and isinstance(document, list):
+        for element in document:
+            yield from _walk(element, rest)
+    elif isinstance(document, dict) and key in document:
+        yield from _walk(document[key], rest)
+
+
+class ReportReader:
+    """Stream the members of a report zip.
+
+    Usage:
+        with ReportReader.from_url(bd.session, download_url) as report:
+            for entry in report.iter_json('aggregateBomViewEntries.item', pattern=r'version.+\\.json$'):
+                ...
+
+        with ReportReader('reports/source.zip') as report:
+            for row in report.iter_csv(pattern=r'source.*\\.csv$'):
+                ...
+    """
+
+    def __init__(self, source, spool_size=DEFAULT_SPOOL_SIZE):
+        """
+        Args:
+            source: path of a zip file, the zip as bytes, a binary file object or a
+                    requests.Response (ideally requested with stream=True)
+            spool_size (int): bytes of a response or non seekable stream held in memory before
+                              spilling over to a temporary file. Defaults to 64 MiB.
+        """
+        self._spool = None
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif hasattr(source, 'iter_content'):
+            self._spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+            for chunk in source.iter_content(chunk_size=DEFAULT_CHUNK_SIZE):
+                self._spool.write(chunk)
+            source.close()
+            self._spool.seek(0)
+            source = self._spool
+        elif hasattr(source, 'read') and not (hasattr(source, 'seekable') and source.seekable()):
+            self._spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+            shutil.copyfileobj(source, self._spool, DEFAULT_CHUNK_SIZE)
+            self._spool.seek(0)
+            source = self._spool
+        self._zip = zipfile.ZipFile(source, 'r')
+
+    @classmethod
+    def from_url(cls, session, url, spool_size=DEFAULT_SPOOL_SIZE):
+        """Download a report zip and open it for reading.
+
+        Args:
+            session (requests.Session): authenticated session
+            url (str): download url of the report
+            spool_size (int): see ReportReader()
+
+        Returns:
+            ReportReader: to be closed by the caller, preferably by using it as a context manager
+        """
+        response = session.get(url, headers={'Accept': 'application/zip', 'Content-Type': 'application/zip'}, stream=True)
+        response.raise_for_status()
+        return cls(response, spool_size=spool_size)
+
+    def close(self):
+        self._zip.close()
+        if self._spool:
+            self._spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def names(self, pattern=None):
+        """List the members of the report.
+
+        Args:
+            pattern (str): optional regex, only members whose name matches (re.search) are listed
+
+        Returns:
+            list(str): member names in archive order
+        """
+        names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        if pattern:
+            names = [name for name in names if re.search(pattern, name)]
+        return names
+
+    def member(self, pattern):
+        """Name of the first member matching pattern
+
+        Raises:
+            KeyError: if no member matches
+        """
+        names = self.names(pattern)
+        if not names:
+            raise KeyError(f"No member matching '{pattern}' in report, members are {self.names()}")
+        return names[0]
+
+    def open(self, pattern):
+        """Open the first member matching pattern as a binary stream"""
+        return self._zip.open(self.member(pattern))
+
+    def iter_csv(self, pattern=r'\.csv$', **kwargs):
+        """Yield the rows of every CSV member matching pattern.
+
+        Args:
+            pattern (str): regex selecting the members. Defaults to all .csv members.
+            kwargs: passed on to csv.DictReader
+
+        Returns:
+            generator: of dict, one per row, keyed by the member's header row
+        """
+        for name in self.names(pattern):
+            with self._zip.open(name) as member:
+                text = io.TextIOWrapper(member, encoding='utf-8-sig', newline='')
+                yield from csv.DictReader(text, **kwargs)
+
+    def iter_json(self, prefix, pattern=r'\.json$'):
+        """Yield the items at prefix of the first JSON member matching pattern.
+
+        Args:
+            prefix (str): ijson style path of the items, e.g. 'aggregateBomViewEntries.item'
+            pattern (str): regex selecting the member. Defaults to the first .json member.
+
+        Returns:
+            generator: of the parsed items
+        """
+        with self.open(pattern) as member:
+            if ijson:
+                yield from ijson.items(member, prefix, use_float=True)
+            else:
+                yield from _walk(json.load(member), prefix)
+
+    def load_json(self, pattern=r'\.json$'):
+        """Parse the whole of the first JSON member matching pattern"""
+        with self.open(pattern) as member:
+            return json.load(member)
@@ -10,22 +10,26 @@ logger = logging.getLogger(__name__)
 
 valid_categories = ['VERSION','CODE_LOCATIONS','COMPONENTS','SECURITY','FILES', 'ATTACHMENTS', 'CRYPTO_ALGORITHMS', 'PROJECT_VERSION_CUSTOM_FIELDS', 'BOM_COMPONENT_CUSTOM_FIELDS', 'LICENSE_TERM_FULFILLMENT', 'UPGRADE_GUIDANCE', 'VULNERABILITY_MATCH']
 valid_report_formats = ["CSV", "JSON"]
-def create_version_reports(self, version, report_list, format="CSV"):
+def _version_report_data(version, report_list, format="CSV"):
     assert all(list(map(lambda k: k in valid_categories, report_list))), "One or more selected report categories in {} are not valid ({})".format(
         report_list, valid_categories)
     assert format in valid_report_formats, "Format must be one of {}".format(valid_report_formats)
 
-    post_data = {
-        'categories': report_list,
-        'versionId': version['_meta']['href'].split("/")[-1],
+    return {
+        'categories': list(report_list),
+        'versionId': object_id(version),
         'reportType': 'VERSION',
         'reportFormat': format
     }
+
+def create_version_reports(self, version, report_list, format="CSV"):
+    '''Create a version (details) report. To generate and download many reports use get_report_manager()'''
+    post_data = _version_report_data(version, report_list, format)
     version_reports_url = self.get_link(version, 'versionReport')
     return self.execute_post(version_reports_url, post_data)
 
 valid_notices_formats = ["TEXT", "JSON"]
-def create_version_notices_report(self, version, format="TEXT", include_copyright_info=True, include_license_info=True):
+def _notices_report_data(version, format="TEXT", include_copyright_info=True, include_license_info=True):
     assert format in valid_notices_formats, "Format must be one of {}".format(valid_notices_formats)
 
     post_data = {
@@ -37,10 +41,20 @@ def create_version_notices_report(self, version, format="TEXT", include_copyrigh
         post_data.update({'categories': ["COPYRIGHT_TEXT"] })
         if include_license_info:
             post_data.update({'categories': ["COPYRIGHT_TEXT","LICENSE_DATA","LICENSE_TEXT"] })
+    return post_data
 
+def create_version_notices_report(self, version, format="TEXT", include_copyright_info=True, include_license_info=True):
+    '''Create a notices report. To generate and download many reports use get_report_manager()'''
+    post_data = _notices_report_data(version, format, include_copyright_info, include_license_info)
     notices_report_url = self.get_link(version, 'licenseReports')
     return self.execute_post(notices_report_url, post_data)
 
+def get_report_manager(self, **kwargs):
+    '''Return a ReportManager.ReportManager using this instance's session'''
+    from .ReportManager import ReportManager
+    kwargs.setdefault('base_url', self.get_urlbase())
+    return ReportManager(self.get_session(), **kwargs)
+
 def download_report(self, report_id):
     # TODO: Fix me, looks like the reports should be downloaded from different paths than the one here, and depending on the type and format desired the path can change
     url = self.get_urlbase() + "/api/reports/{}".format(report_id)
@@ -70,16 +84,20 @@ def download_notification_report(self, report_location_url):
 #
 ##
 valid_vuln_status_report_formats = ["CSV", "JSON"]
-def create_vuln_status_report(self, format="CSV"):
+vuln_status_report_headers = {
+    'Content-Type': 'application/vnd.blackducksoftware.report-4+json',
+    'Accept': 'application/vnd.blackducksoftware.report-4+json'
+}
+def _vuln_status_report_data(format="CSV"):
     assert format in valid_vuln_status_report_formats, "Format must be one of {}".format(valid_vuln_status_report_formats)
 
-    post_data = {
+    return {
         "reportFormat": format,
         "locale": "en_US"
     }
+
+def create_vuln_status_report(self, format="CSV"):
+    '''Create a vulnerability status report. To generate and download it use get_report_manager()'''
+    post_data = _vuln_status_report_data(format)
     url = self.get_apibase() + "/vulnerability-status-reports"
-    custom_headers = {
-        'Content-Type': 'application/vnd.blackducksoftware.report-4+json',
-        'Accept': 'application/vnd.blackducksoftware.report-4+json'
-    }
-    return self.execute_post(url, custom_headers=custom_headers, data=post_data)
+    return self.execute_post(url, custom_headers=dict(vuln_status_report_headers), data=post_data)
@@ -32,10 +32,9 @@ def get_roles_for_user_or_group(self, user_or_group):
 
 def get_role_url_by_name(self, role_name):
     # Return the global (as opposed to project-specific) role URL for this server corresponding to the role name
-    all_roles = self.get_roles()
-    for role in all_roles['items']:
-        if role['name'] == role_name:
-            return role['_meta']['href']
+    role = self.find_role_by_name(role_name)
+    if role:
+        return role['_meta']['href']
 
 def assign_role_to_user_or_group(self, role_name, user_or_group):
     user_or_group_roles_url = self.get_roles_url_from_user_or_group(user_or_group)
@@ -0,0 +1,287 @@
+"""
+Roll up the risk profiles of many project versions
+
+Reports counting critical/high/medium/low security, license and operational risk per project
+(or phase, distribution, tag, project group) used to loop over every version's risk profile in
+Python. RiskProfiles loads the profiles once into a (versions, risk types, risk levels) NumPy
+array, with the label of each version alongside, and aggregates them with vectorized group-bys.
+Profiles read at different times can be saved, concatenated and rolled up into trends.
+
+Requires numpy: pip install blackduck[rollup]
+
+Usage:
+    profiles = read_risk_profiles(bd, tags=True)
+    for row in profiles.rollup(by='project_name', risk='SECURITY'):
+        print(row['project_name'], row['versions'], row['CRITICAL'], row['HIGH'])
+    profiles.save('risk-2024-07-01.npz')
+
+    history = RiskProfiles.concatenate([RiskProfiles.load(f) for f in sorted(glob.glob('risk-*.npz'))])
+    for row in history.trend(by='phase', period='month'):
+        print(row['period'], row['phase'], row['CRITICAL'])
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .Utils import get_url, parse_iso8601
+
+logger = logging.getLogger(__name__)
+
+RISK_TYPES = ('SECURITY', 'LICENSE', 'OPERATIONAL')
+LEVELS = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'OK', 'UNKNOWN')
+LABELS = ('project_name', 'version_name', 'version_url', 'phase', 'distribution', 'project_group')
+PROFILE_KEYS = {'SECURITY': 'securityRiskProfile', 'LICENSE': 'licenseRiskProfile', 'OPERATIONAL': 'operationalRiskProfile'}
+PERIODS = {'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y'}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy not available. Install with: pip install blackduck[rollup]")
+
+
+def risk_counts(record):
+    """Flat list of the counts of a record, for each risk type each level.
+
+    The record is either a project version risk profile ({'categories': {'SECURITY': {'HIGH': 1, ...}}})
+    or carries securityRiskProfile, licenseRiskProfile and operationalRiskProfile ({'counts': [{'countType':
+    'HIGH', 'count': 1}, ...]}) like BOM components do.
+    """
+    counts = []
+    categories = record.get('categories')
+    for risk in RISK_TYPES:
+        if categories is not None:
+            levels = categories.get(risk) or {}
+        else:
+            levels = {c.get('countType'): c.get('count') for c in (record.get(PROFILE_KEYS[risk]) or {}).get('counts') or []}
+        counts.extend(levels.get(level) or 0 for level in LEVELS)
+    return counts
+
+
+def _datetime64(value):
+    if isinstance(value, str):
+        value = parse_iso8601(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 's')
+
+
+def _bincount(inverse, matrix, groups):
+    return np.stack([np.bincount(inverse, weights=matrix[:, j], minlength=groups) for j in range(matrix.shape[1])],
+                    axis=1).astype(np.int64)
+
+
+class RiskProfiles:
+    """Risk counts of many project versions, with their labels and the time they were read."""
+
+    def __init__(self, counts, labels, tags=None, timestamps=None):
+        """
+        Args:
+            counts (numpy.ndarray): int, of shape (versions, len(RISK_TYPES), len(LEVELS))
+            labels (dict): label name (see LABELS) -> numpy.ndarray of str, one per version ('' if unknown)
+            tags (list): of lists of tag names, one per version. Defaults to no tags.
+            timestamps (numpy.ndarray): datetime64[s], one per version. Defaults to now.
+        """
+        _require_numpy()
+        self.counts = np.asarray(counts, dtype=np.int64).reshape(-1, len(RISK_TYPES), len(LEVELS))
+        size = len(self.counts)
+        self.labels = {label: np.asarray(labels.get(label, [''] * size), dtype=str) for label in LABELS}
+        self.tags = list(tags) if tags is not None else [[] for _ in range(size)]
+        if timestamps is None:
+            timestamps = np.full(size, _datetime64(datetime.now(timezone.utc)))
+        self.timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        self._label_codes = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    @classmethod
+    def from_records(cls, records, timestamp=None):
+        """Load records, i.e. dicts with the risk counts (see risk_counts()), the LABELS, 'tags' and 'timestamp'.
+
+        Args:
+            records (iterable): of dicts
+            timestamp (str or datetime): time of the records without a 'timestamp'. Defaults to now.
+        """
+        _require_numpy()
+        default = _datetime64(timestamp or datetime.now(timezone.utc))
+        counts, tags, timestamps = [], [], []
+        labels = {label: [] for label in LABELS}
+        for record in records:
+            counts.append(risk_counts(record))
+            for label in LABELS:
+                labels[label].append(record.get(label) or '')
+            tags.append(list(record.get('tags') or []))
+            timestamps.append(_datetime64(record['timestamp']) if record.get('timestamp') else default)
+        return cls(np.array(counts, dtype=np.int64), labels, tags, np.array(timestamps, dtype='datetime64[s]'))
+
+    @classmethod
+    def concatenate(cls, profiles):
+        """Combine RiskProfiles, e.g. read at different times"""
+        _require_numpy()
+        profiles = list(profiles)
+        return cls(np.concatenate([p.counts for p in profiles]),
+                   {label: np.concatenate([p.labels[label] for p in profiles]) for label in LABELS},
+                   [tags for p in profiles for tags in p.tags],
+                   np.concatenate([p.timestamps for p in profiles]))
+
+    def save(self, path):
+        """Save to a .npz file"""
+        np.savez_compressed(path, counts=self.counts, timestamps=self.timestamps,
+                            tags=np.array(['\n'.join(tags) for tags in self.tags], dtype=str),
+                            **{f"label_{label}": values for label, values in self.labels.items()})
+
+    @classmethod
+    def load(cls, path):
+        """Load a .npz file written by save()"""
+        _require_numpy()
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['counts'], {label: data[f"label_{label}"] for label in LABELS},
+                       [tags.split('\n') if tags else [] for tags in data['tags'].tolist()], data['timestamps'])
+
+    def _groups(self, by, rows=None, keys=()):
+        # rows: the versions to group, keys: (name, values per row) grouped on before by
+        by = [by] if isinstance(by, str) else list(by or [])
+        for label in by:
+            if label != 'tags' and label not in LABELS:
+                raise ValueError(f"unknown label '{label}', use one of {', '.join(LABELS + ('tags',))}")
+        rows = np.arange(len(self)) if rows is None else rows
+        columns = [(name, values) for name, values in keys]
+        if 'tags' in by:
+            # a version counts once for each of its tags, versions without tags are left out
+            tags = [self.tags[row] for row in rows]
+            lengths = np.fromiter((len(t) for t in tags), dtype=np.int64, count=len(tags))
+            tag_values = np.array([tag for t in tags for tag in t], dtype=str)
+            columns = [(name, np.repeat(values, lengths)) for name, values in columns]
+            rows = np.repeat(rows, lengths)
+        columns.extend((label, tag_values if label == 'tags' else None) for label in by)
+
+        if not len(rows):
+            return rows, [name for name, _ in columns], [], np.zeros(0, dtype=np.int64)
+        if not columns:
+            return rows, [], [()], np.zeros(len(rows), dtype=np.int64)
+        uniques, codes = [], []
+        for name, values in columns:
+            unique, code = self._codes(name) if values is None else np.unique(values, return_inverse=True)
+            uniques.append(unique)
+            codes.append(code.reshape(-1)[rows] if values is None else code.reshape(-1))
+        # one integer per combination of codes, ordered like the labels
+        combined = np.zeros(len(rows), dtype=np.int64)
+        for unique, code in zip(uniques, codes):
+            combined = combined * len(unique) + code
+        groups, inverse = np.unique(combined, return_inverse=True)
+        group_keys = []
+        for group in groups.tolist():
+            key = []
+            for unique in reversed(uniques):
+                group, code = divmod(group, len(unique))
+                key.append(unique[code].item())
+            group_keys.append(tuple(reversed(key)))
+        return rows, [name for name, _ in columns], group_keys, inverse.reshape(-1)
+
+    def _codes(self, label):
+        # sorted unique values of a label and the index of each version's value, computed once per label
+        if label not in self._label_codes:
+            self._label_codes[label] = np.unique(self.labels[label], return_inverse=True)
+        return self._label_codes[label]
+
+    def _aggregate(self, rows, names, group_keys, inverse, risk):
+        risks = RISK_TYPES if risk is None else (risk,)
+        for r in risks:
+            if r not in RISK_TYPES:
+                raise ValueError(f"unknown risk type '{r}', use one of {', '.join(RISK_TYPES)}")
+        groups = len(group_keys)
+        versions = np.bincount(inverse, minlength=groups)
+        results = [dict(zip(names, key), versions=count) for key, count in zip(group_keys, versions.tolist())]
+        for r in risks:
+            matrix = self.counts[rows, RISK_TYPES.index(r)]
+            sums = _bincount(inverse, matrix, groups)
+            # versions with at least one critical or high risk
+            at_risk = np.bincount(inverse, weights=(matrix[:, :2].sum(axis=1) > 0), minlength=groups).astype(np.int64)
+            prefix = '' if risk else f"{r}_"
+            columns = [prefix + level for level in LEVELS] + [prefix + 'at_risk']
+            for result, values in zip(results, np.column_stack((sums, at_risk)).tolist()):
+                result.update(zip(columns, values))
+        return results
+
+    def rollup(self, by='project_name', risk='SECURITY'):
+        """Sum the risk counts by label(s).
+
+        Args:
+            by (str or list): label(s) to group by, see LABELS, or 'tags'. None sums everything.
+            risk (str): one of RISK_TYPES, or None for all of them (the counts are then named e.g. SECURITY_HIGH)
+
+        Returns:
+            list: of dicts, one per group ordered by the labels, with the labels, the number of 'versions',
+                  the count of each level and 'at_risk', the number of versions with critical or high risks
+        """
+        return self._aggregate(*self._groups(by), risk)
+
+    def trend(self, by=None, risk='SECURITY', period='month'):
+        """Roll up the risk counts per period of time, see rollup().
+
+        A version read more than once within a period counts once, with its latest risk profile. Rows
+        without a version_url are counted each time.
+
+        Args:
+            by (str or list): label(s) to group by within each period. Defaults to None.
+            risk (str): one of RISK_TYPES, or None for all of them
+            period (str): one of day, week (starting on Monday), month or year. Defaults to month.
+
+        Returns:
+            list: of dicts like rollup() ones, with the 'period' (ISO-8601 date of its start), ordered by period
+        """
+        if period not in PERIODS:
+            raise ValueError(f"unknown period '{period}', use one of {', '.join(PERIODS)}")
+        # numpy weeks start on Thursday (1970-01-01 was one), shift them to start on Monday
+        shift = np.timedelta64(3 if period == 'week' else 0, 'D')
+        periods = (self.timestamps + shift).astype(f"datetime64[{PERIODS[period]}]")
+        # keep the latest profile of each version in each period
+        unique, versions = self._codes('version_url')
+        versions = versions.reshape(-1).astype(np.int64)
+        # versions without a url cannot be matched across reads, each of those rows counts
+        unknown = np.flatnonzero(self.labels['version_url'] == '')
+        versions[unknown] = len(unique) + unknown
+        order = np.lexsort((self.timestamps, periods, versions))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (versions[order][1:] != versions[order][:-1]) | (periods[order][1:] != periods[order][:-1])
+        rows = np.sort(order[last])
+        period_starts = (periods[rows].astype('datetime64[D]') - shift).astype(str)
+        return self._aggregate(*self._groups(by, rows, keys=[('period', period_starts)]), risk)
+
+
+def read_risk_profiles(client, projects=None, tags=False, max_workers=8, timestamp=None):
+    """Read the risk profile of every project version (of the given projects) into RiskProfiles.
+
+    Args:
+        client (Client): authenticated client
+        projects (list): of project objects. Defaults to every project.
+        tags (bool): read the tags of each project. Defaults to False.
+        max_workers (int): number of requests run concurrently. Defaults to 8.
+        timestamp (str or datetime): time recorded for the profiles. Defaults to now.
+    """
+    _require_numpy()
+    if projects is None:
+        projects = list(client.get_resource('projects'))
+
+    def project_versions(project):
+        project_tags = [tag['name'] for tag in client.get_resource('tags', project)] if tags else []
+        return [(project, version, project_tags) for version in client.get_resource('versions', project)]
+
+    def record(project_version):
+        project, version, project_tags = project_version
+        profile = client.get_resource('riskProfile', version, items=False)
+        return dict(profile, project_name=project['name'], version_name=version['versionName'],
+                    version_url=get_url(version), phase=version.get('phase'), distribution=version.get('distribution'),
+                    project_group=project.get('projectGroup'), tags=project_tags)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        versions = [pv for pvs in executor.map(project_versions, projects) for pv in pvs]
+        records = list(executor.map(record, versions))
+    logger.info(f"Read the risk profiles of {len(records)} project versions")
+    return RiskProfiles.from_records(records, timestamp)
@@ -3,6 +3,11 @@ import requests
 import json
 from operator import itemgetter
 import urllib.parse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .Transfers import ScanDownloader, ScanUploader
 
 logger = logging.getLogger(__name__)
 
@@ -21,36 +26,37 @@ def upload_scan(self, filename):
         raise Exception("Unkown file type")
     return response
 
-def download_project_scans(self, project_name,version_name, output_folder=None):
+def upload_scans(self, filenames, max_workers=4, retries=3, progress=None):
+    '''Upload many scan files concurrently, streaming each one from disk and retrying failed uploads
+    (see Transfers.ScanUploader). Returns one result dict per file
+    '''
+    uploader = ScanUploader(self.get_session(), url=self.get_apibase() + "/scan/data", max_workers=max_workers, retries=retries)
+    return uploader.upload_all(filenames, progress=progress)
+
+def download_project_scans(self, project_name,version_name, output_folder=None, max_workers=4):
+    '''Download the scan files of a project version, several at a time. Partially downloaded files
+    are resumed and files that were completely downloaded before are skipped (see Transfers.ScanDownloader)
+    '''
     version = self.get_project_version_by_name(project_name,version_name)
     codelocations = self.get_version_codelocations(version)
-    import os
-    if output_folder:
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder, 0o755, True)
-    
-    result = []
-    
+    output_folder = output_folder or project_name
+
+    jobs = []
     for item in codelocations['items']:
         links = item['_meta']['links']
         matches = [x for x in links if x['rel'] == 'enclosure' or x['rel'] == 'scan-data']
         for m in matches:
             url = m['href']
             filename = url.split('/')[6]
-            if output_folder:
-                pathname = os.path.join(output_folder, filename)
-            else:
-                if not os.path.exists(project_name):
-                    os.mkdir(project_name)
-                pathname = os.path.join(project_name, filename)
-            responce = requests.get(url, headers=self.get_headers(), stream=True, verify=not self.config['insecure'])
-            with open(pathname, "wb") as f:
-                for data in responce.iter_content():
-                    f.write(data)
-            result.append({filename, pathname})
-    return result
-                        
+            jobs.append((url, os.path.join(output_folder, filename)))
+
+    downloader = ScanDownloader(self.get_session(), max_workers=max_workers)
+    results = downloader.download_all(jobs)
+    return [{os.path.basename(r['pathname']), r['pathname']} for r in results if r['status'] != 'failed']
+
 def get_codelocations(self, limit=100, unmapped=False, parameters={}):
+    if unmapped:
+        return self._get_unmapped_codelocations(limit, parameters, internal=False)
     parameters['limit'] = limit
     paramstring = self._get_parameter_string(parameters)
     headers = self.get_headers()
@@ -58,12 +64,11 @@ def get_codelocations(self, limit=100, unmapped=False, parameters={}):
     headers['Accept'] = 'application/vnd.blackducksoftware.scan-4+json'
     response = requests.get(url, headers=headers, verify = not self.config['insecure'])
     jsondata = response.json()
-    if unmapped:
-        jsondata['items'] = [s for s in jsondata['items'] if 'mappedProjectVersion' not in s]
-        jsondata['totalCount'] = len(jsondata['items'])
     return jsondata
 
 def get_codelocations_internal(self, limit=100, unmapped=False, parameters={}):
+    if unmapped:
+        return self._get_unmapped_codelocations(limit, parameters, internal=True)
     parameters['limit'] = limit
     paramstring = self._get_parameter_string(parameters)
     headers = self.get_headers()
@@ -71,11 +76,51 @@ def get_codelocations_internal(self, limit=100, unmapped=False, parameters={}):
     headers['Accept'] = 'application/vnd.blackducksoftware.internal-1+json'
     response = requests.get(url, headers=headers, verify = not self.config['insecure'])
     jsondata = response.json()
-    if unmapped:
-        jsondata['items'] = [s for s in jsondata['items'] if 'mappedProjectVersion' not in s]
-        jsondata['totalCount'] = len(jsondata['items'])
     return jsondata
 
+def _get_unmapped_codelocations(self, limit, parameters, internal=False):
+    # the unmapped ones are filtered out of every page, so read them all (limit at a time) to
+    # give a totalCount which matches the items
+    items = list(self.iter_codelocations(page_size=limit, unmapped=True, parameters=parameters, internal=internal))
+    return {'totalCount': len(items), 'items': items}
+
+def _codelocation_parameters(unmapped, parameters):
+    parameters = dict(parameters)
+    if unmapped:
+        # let the server do the filtering rather than downloading every codelocation
+        parameters['filter'] = 'unmapped:true'
+    return parameters
+
+def iter_codelocations(self, page_size=100, unmapped=False, parameters={}, internal=False, prefetch=False):
+    '''Generator over all of the codelocations (not just the first page), fetched page_size at a time.
+
+    The unmapped filter is sent to the server and also checked on each item, so the result is correct
+    even where the server does not support the filter. Use count_codelocations for the total count.
+    '''
+    media_type = 'internal-1' if internal else 'scan-4'
+    custom_headers = {'Accept': 'application/vnd.blackducksoftware.{}+json'.format(media_type)}
+    url = self.get_apibase() + "/codelocations"
+    for codelocation in self._get_paged_items(
+            url, custom_headers=custom_headers, page_size=page_size, prefetch=prefetch,
+            parameters=_codelocation_parameters(unmapped, parameters)):
+        if unmapped and 'mappedProjectVersion' in codelocation:
+            continue
+        yield codelocation
+
+def count_codelocations(self, unmapped=False, parameters={}):
+    '''Return the number of (optionally unmapped) codelocations, i.e. how many iter_codelocations yields.
+    Unmapped codelocations are counted by reading them, since a server may ignore the unmapped filter
+    '''
+    if unmapped:
+        return sum(1 for _ in self.iter_codelocations(unmapped=True, parameters=parameters))
+    parameters = dict(parameters)
+    parameters['limit'] = 1
+    url = self.get_apibase() + "/codelocations" + self._get_parameter_string(parameters)
+    custom_headers = {'Accept': 'application/vnd.blackducksoftware.scan-4+json'}
+    response = self.execute_get(url, custom_headers=custom_headers)
+    response.raise_for_status()
+    return response.json().get('totalCount', 0)
+
 def get_codelocation_scan_summaries(self, code_location_id = None, code_location_obj = None, limit=100):
     '''Retrieve the scans (aka scan summaries) for the given location. You can give either
     code_location_id or code_location_obj. If both are supplied, precedence is to use code_location_obj
@@ -94,14 +139,57 @@ def get_codelocation_scan_summaries(self, code_location_id = None, code_location
     jsondata = response.json()
     return jsondata
 
-def delete_unmapped_codelocations(self, limit=1000):
-    code_locations = self.get_codelocations(limit=limit, unmapped=True).get('items', [])
+def _latest_scan_status(self, code_location_obj):
+    scan_summaries = self.get_codelocation_scan_summaries(code_location_obj = code_location_obj).get('items', [])
+    if scan_summaries:
+        latest = max(scan_summaries, key=lambda s: s.get('updatedAt') or s.get('createdAt') or '')
+        return latest.get('status')
+
+def delete_unmapped_codelocations(self, limit=1000, max_workers=8, max_concurrent_deletes=2, progress=None):
+    '''Delete all unmapped codelocations whose latest scan summary is COMPLETE.
+
+    Scan summaries are fetched max_workers at a time while at most max_concurrent_deletes DELETEs are
+    in flight, so as not to overload scan processing on the Hub. If given, progress is called with
+    the running counts after each codelocation. Returns the final counts (total, deleted, skipped, failed)
+    '''
+    # limit is the page size, all pages are read. Collect them before deleting anything since
+    # deleting while paging would shift the offsets and skip codelocations
+    code_locations = list(self.iter_codelocations(page_size=limit, unmapped=True))
+    logger.info("Found {} unmapped codelocations".format(len(code_locations)))
+
+    counts = {'total': len(code_locations), 'deleted': 0, 'skipped': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+    delete_slots = threading.BoundedSemaphore(max_concurrent_deletes)
+
+    def delete_if_complete(c):
+        url = c['_meta']['href']
+        try:
+            status = self._latest_scan_status(c)
+            if status == 'COMPLETE':
+                with delete_slots:
+                    response = self.execute_delete(url)
+                outcome = 'deleted' if response.status_code == 204 else 'failed'
+                if outcome == 'failed':
+                    logger.error("Failed to delete codelocation {}, status code {}".format(url, response.status_code))
+            else:
+                logger.debug("Skipping codelocation {}, its latest scan status is {}".format(url, status))
+                outcome = 'skipped'
+        except Exception:
+            logger.error("Failed to delete codelocation {}".format(url), exc_info=True)
+            outcome = 'failed'
 
-    for c in code_locations:
-        scan_summaries = self.get_codelocation_scan_summaries(code_location_obj = c).get('items', [])
+        with counts_lock:
+            counts[outcome] += 1
+            snapshot = dict(counts)
+        done = snapshot['deleted'] + snapshot['skipped'] + snapshot['failed']
+        if done % 100 == 0 or done == snapshot['total']:
+            logger.info("Processed {} of {} unmapped codelocations: {}".format(done, snapshot['total'], snapshot))
+        if progress:
+            progress(snapshot)
 
-        if scan_summaries[0]['status'] == 'COMPLETE':
-            response = self.execute_delete(c['_meta']['href'])
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(delete_if_complete, code_locations))
+    return counts
 
 def delete_codelocation(self, locationid):
     url = self.config['baseurl'] + "/api/codelocations/" + locationid
@@ -16,3 +16,8 @@ def get_notifications(self, parameters={}):
     response = self.execute_get(url, custom_headers=custom_headers)
     json_data = response.json()
     return json_data
+
+def get_notification_feed(self, **kwargs):
+    '''Return a Notifications.NotificationFeed using this instance's session'''
+    from .Notifications import NotificationFeed
+    return NotificationFeed(self.get_session(), base_url=self.get_urlbase(), **kwargs)
@@ -0,0 +1,330 @@
+"""
+Bulk transfer helpers for scan data, over an authenticated requests.Session
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
+logger = logging.getLogger(__name__)
+
+# response.iter_content() defaults to 1 byte chunks, far too small for multi-GB BDIO files
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_of_file(pathname, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Compute the sha256 hex digest of a file without reading it into memory at once.
+
+    Args:
+        pathname (str): file to hash
+        chunk_size (int): bytes read per iteration. Defaults to 1 MiB.
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(pathname, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScanDownloader:
+    """Download scan files concurrently using large buffered chunks.
+
+    Partial files are kept next to their destination with a '.part' suffix and resumed with an
+    HTTP Range request on the next attempt. Completed files are recorded (size and sha256) in a
+    manifest kept in each output folder, so files that are already complete are skipped
+    without contacting the server.
+    """
+    MANIFEST_NAME = '.scan-downloads.json'
+    PARTIAL_SUFFIX = '.part'
+
+    def __init__(self, session, max_workers=4, chunk_size=DEFAULT_CHUNK_SIZE, verify_hash=False):
+        """
+        Args:
+            session (requests.Session): authenticated session used for the GET requests
+            max_workers (int): number of files downloaded concurrently. Defaults to 4.
+            chunk_size (int): bytes per streamed chunk. Defaults to 1 MiB.
+            verify_hash (bool): re-hash existing files against the manifest before skipping them,
+                                instead of comparing sizes only. Defaults to False.
+        """
+        self.session = session
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.verify_hash = verify_hash
+        self._manifests = {}
+        self._lock = threading.Lock()
+
+    def _manifest(self, folder):
+        # callers must hold self._lock
+        if folder not in self._manifests:
+            try:
+                with open(os.path.join(folder, self.MANIFEST_NAME)) as f:
+                    self._manifests[folder] = json.load(f)
+            except (OSError, ValueError):
+                self._manifests[folder] = {}
+        return self._manifests[folder]
+
+    def _record(self, pathname, url, size, sha256):
+        folder, filename = os.path.split(os.path.abspath(pathname))
+        with self._lock:
+            manifest = self._manifest(folder)
+            manifest[filename] = {'url': url, 'size': size, 'sha256': sha256}
+            tmp_pathname = os.path.join(folder, self.MANIFEST_NAME + '.tmp')
+            with open(tmp_pathname, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_pathname, os.path.join(folder, self.MANIFEST_NAME))
+
+    def is_complete(self, pathname):
+        """Check whether pathname was completely downloaded by a previous run.
+
+        Args:
+            pathname (str): destination file
+
+        Returns:
+            bool: True if the file matches the size (and with verify_hash, the sha256) in the manifest
+        """
+        folder, filename = os.path.split(os.path.abspath(pathname))
+        with self._lock:
+            entry = self._manifest(folder).get(filename)
+        if not entry or not os.path.isfile(pathname):
+            return False
+        if os.path.getsize(pathname) != entry.get('size'):
+            return False
+        if self.verify_hash and sha256_of_file(pathname, self.chunk_size) != entry.get('sha256'):
+            return False
+        return True
+
+    def download(self, url, pathname):
+        """Download a single file, resuming or skipping it where possible.
+
+        Args:
+            url (str): of the file e.g. a codelocation 'scan-data' link
+            pathname (str): destination file
+
+        Returns:
+            dict: with url, pathname, status ('skipped', 'downloaded', 'resumed' or 'failed'),
+                  bytes transferred, elapsed seconds and error (if failed)
+        """
+        result = {'url': url, 'pathname': pathname, 'status': None, 'bytes': 0, 'seconds': 0.0, 'error': None}
+        start = time.monotonic()
+        try:
+            if self.is_complete(pathname):
+                result['status'] = 'skipped'
+            else:
+                result['status'], result['bytes'] = self._fetch(url, pathname)
+        except Exception as e:
+            logger.error(f"Failed to download {url} to {pathname}: {e}")
+            result['status'] = 'failed'
+            result['error'] = e
+        result['seconds'] = time.monotonic() - start
+        return result
+
+    def _fetch(self, url, pathname):
+        partial = pathname + self.PARTIAL_SUFFIX
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 416:
+                # Range not satisfiable, the partial file is either whole or longer than the original
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total != str(offset):
+                    os.remove(partial)
+                    return self._fetch(url, pathname)
+                status, mode, transferred = 'resumed', None, 0
+            else:
+                response.raise_for_status()
+                if offset and response.status_code == 206:
+                    status, mode = 'resumed', 'ab'
+                    logger.debug(f"Resuming {pathname} at byte {offset}")
+                else:
+                    # server ignored the Range header (or there was nothing to resume)
+                    status, mode = 'downloaded', 'wb'
+                transferred = 0
+                with open(partial, mode) as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                        transferred += len(chunk)
+
+        os.replace(partial, pathname)
+        self._record(pathname, url, os.path.getsize(pathname), sha256_of_file(pathname, self.chunk_size))
+        return status, transferred
+
+    def download_all(self, jobs, progress=None):
+        """Download many files concurrently.
+
+        Args:
+            jobs (iterable): of (url, pathname) tuples
+            progress (callable): optional, called with each result dict as its download finishes
+
+        Returns:
+            list(dict): one result per job, in job order (see download())
+        """
+        jobs = list(jobs)
+        for folder in {os.path.dirname(os.path.abspath(pathname)) for _, pathname in jobs}:
+            os.makedirs(folder, 0o755, True)
+
+        def run(job):
+            result = self.download(*job)
+            if progress:
+                progress(result)
+            return result
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(run, jobs))
+
+        elapsed = time.monotonic() - start
+        transferred = sum(r['bytes'] for r in results)
+        counts = {status: sum(r['status'] == status for r in results) for status in ('downloaded', 'resumed', 'skipped', 'failed')}
+        logger.info(f"Transferred {transferred} bytes in {elapsed:.1f} seconds ({counts})")
+        return results
+
+
+def scan_mime_type(filename):
+    """Guess the media type to upload a scan or SBOM file with.
+
+    .json files are sniffed (first 64 KiB only) for the CycloneDX and SPDX markers, anything
+    else that is JSON is treated as JSON-LD (BDIO 2).
+
+    Args:
+        filename (str): file to upload
+
+    Returns:
+        str: media type
+    """
+    if filename.endswith('.bdio'):
+        return 'application/vnd.blackducksoftware.bdio+zip'
+    if filename.endswith('.json'):
+        with open(filename, 'rb') as f:
+            head = f.read(64 * 1024)
+        if b'CycloneDX' in head:
+            return 'application/vnd.cyclonedx'
+        if b'spdxVersion' in head:
+            return 'application/spdx'
+    if filename.endswith('.json') or filename.endswith('.jsonld'):
+        return 'application/ld+json'
+    raise ValueError(f"Unknown scan file type: {filename}")
+
+
+class ScanUploader:
+    """Upload scan (.bdio, .jsonld) and SBOM files to the scan/data endpoint concurrently.
+
+    Files are streamed from disk with a multipart encoder so they are never buffered in memory.
+    Uploads are retried with exponential backoff on connection errors and on the same HTTP status
+    codes the Client session retries. Uploading the same scan twice replaces the earlier upload
+    on the Hub, so a retry after an ambiguous failure is safe.
+
+    Requires requests-toolbelt: pip install blackduck[upload]
+    """
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self, session, url="/api/scan/data", max_workers=4, retries=3, backoff_factor=2):
+        """
+        Args:
+            session (requests.Session): authenticated session used for the POST requests
+            url (str): upload endpoint, relative to the session base url for a Client session.
+                       Defaults to /api/scan/data.
+            max_workers (int): number of files uploaded concurrently. Defaults to 4.
+            retries (int): maximum number of retries per file. Defaults to 3.
+            backoff_factor (float): seconds to wait before the first retry, doubled for each
+                                    subsequent retry. Defaults to 2.
+        """
+        if MultipartEncoder is None:
+            raise ImportError(
+                "requests-toolbelt not available. Install with: pip install blackduck[upload]"
+            )
+        self.session = session
+        self.url = url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    def _post(self, filename, fields, mime_type):
+        with open(filename, 'rb') as f:
+            form = dict(fields or {})
+            form['file'] = (os.path.basename(filename), f, mime_type)
+            encoder = MultipartEncoder(fields=form)
+            response = self.session.post(self.url, data=encoder, headers={'Content-Type': encoder.content_type})
+        return response, encoder.len
+
+    def upload(self, filename, fields=None, mime_type=None):
+        """Upload a single file, retrying if needed.
+
+        Args:
+            filename (str): file to upload
+            fields (dict): optional extra form fields, e.g. {'projectName': ..., 'versionName': ...} for SBOMs
+            mime_type (str): media type of the file. Guessed with scan_mime_type() if not given.
+
+        Returns:
+            dict: with filename, status ('uploaded' or 'failed'), status_code, bytes sent,
+                  elapsed seconds, attempts, the last response and error (if failed)
+        """
+        result = {'filename': filename, 'status': None, 'status_code': None, 'bytes': 0,
+                  'seconds': 0.0, 'attempts': 0, 'response': None, 'error': None}
+        start = time.monotonic()
+        try:
+            mime_type = mime_type or scan_mime_type(filename)
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+                result['attempts'] = attempt + 1
+                try:
+                    response, sent = self._post(filename, fields, mime_type)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    logger.warning(f"Upload of {filename} failed on attempt {attempt + 1}: {e}")
+                    result['error'] = e
+                    continue
+                result.update(response=response, status_code=response.status_code, bytes=sent, error=None)
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    break
+                logger.warning(f"Upload of {filename} got status code {response.status_code} on attempt {attempt + 1}")
+            response = result['response']
+            result['status'] = 'uploaded' if response is not None and response.ok and not result['error'] else 'failed'
+        except Exception as e:
+            logger.error(f"Failed to upload {filename}: {e}")
+            result.update(status='failed', error=e)
+        result['seconds'] = time.monotonic() - start
+        if result['status'] == 'failed':
+            logger.error(f"Failed to upload {filename} (status code {result['status_code']})")
+        return result
+
+    def upload_all(self, jobs, progress=None):
+        """Upload many files concurrently, at most max_workers at a time.
+
+        Args:
+            jobs (iterable): of filenames or (filename, fields) or (filename, fields, mime_type) tuples
+            progress (callable): optional, called with each result dict as its upload finishes
+
+        Returns:
+            list(dict): one result per job, in job order (see upload())
+        """
+        def run(job):
+            result = self.upload(*((job,) if isinstance(job, str) else job))
+            if progress:
+                progress(result)
+            return result
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(run, jobs))
+
+        elapsed = time.monotonic() - start
+        sent = sum(r['bytes'] for r in results)
+        failed = sum(r['status'] == 'failed' for r in results)
+        rate = sent / elapsed / (1024 * 1024) if elapsed else 0.0
+        logger.info(f"Uploaded {len(results) - failed} of {len(results)} files, {sent} bytes in {elapsed:.1f} seconds ({rate:.2f} MiB/s)")
+        return results
@@ -27,6 +27,7 @@ def create_user_group(self, user_group_json):
     else:
         url = self._get_user_group_url()
     location = self._create(url, user_group_json)
+    self._add_to_directory('usergroups', location)
     return location
 
 def create_user_group_by_name(self, group_name, active=True):
@@ -65,4 +66,7 @@ def delete_user_group_by_id(self, user_group_id):
     return self.delete_user_group_by_url(url)
 
 def delete_user_group_by_url(self, user_group_url):
-    return self.execute_delete(user_group_url)
+    response = self.execute_delete(user_group_url)
+    if response.status_code == 204:
+        self._remove_from_directory('usergroups', user_group_url)
+    return response
@@ -24,6 +24,7 @@ def get_current_user(self):
 def create_user(self, user_json):
     url = self._get_user_url()
     location = self._create(url, user_json)
+    self._add_to_directory('users', location)
     return location
 
 def get_user_by_id(self, user_id):
@@ -49,7 +50,10 @@ def delete_user_by_id(self, user_id):
     return self.delete_user_by_url(url)
 
 def delete_user_by_url(self, user_url):
-    return self.execute_delete(user_url)
+    response = self.execute_delete(user_url)
+    if response.status_code == 204:
+        self._remove_from_directory('users', user_url)
+    return response
     
 def reset_user_password(self, user_id, new_password):
     url = self.config['baseurl'] + "/api/users/" + user_id + "/resetpassword"
@@ -5,7 +5,8 @@ Created on Dec 22, 2020
 
 '''
 
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import dateutil.parser
 import json
 import logging
@@ -13,6 +14,59 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# the Hub's own timestamp format, e.g. 2024-07-01T10:11:12.345Z. Such timestamps sort chronologically as strings.
+HUB_TIMESTAMP = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$")
+
+# datetime.fromisoformat() is python 3.7+, on 3.6 everything is parsed by dateutil
+_fromisoformat = getattr(datetime, 'fromisoformat', None)
+
+
+def parse_iso8601(iso_string):
+    """Utility function to convert an iso_8601 formatted string to a datetime object, fast.
+
+    Timestamps in the formats datetime.fromisoformat() reads (the Hub's included) are parsed by it,
+    anything else (everything on python 3.6) by dateutil.
+
+    Args:
+        iso_string (string): the iso_8601 string to convert, or None
+
+    Returns:
+        datetime.datetime: timezone aware if the string has a 'Z' or an offset, None if iso_string is None
+    """
+    if iso_string is None:
+        return None
+    if _fromisoformat is not None:
+        try:
+            # 'Z' is only read from python 3.11 on
+            return _fromisoformat(iso_string[:-1] + '+00:00' if iso_string.endswith('Z') else iso_string)
+        except ValueError:
+            pass
+    return dateutil.parser.parse(iso_string)
+
+def parse_iso8601_all(iso_strings):
+    """Utility function applying parse_iso8601 to a whole column of strings (None stays None)
+
+    Args:
+        iso_strings (iterable): of iso_8601 strings
+
+    Returns:
+        list: of datetime.datetime
+    """
+    parse = parse_iso8601
+    return [parse(iso_string) if iso_string is not None else None for iso_string in iso_strings]
+
+def to_iso8601(date):
+    """Utility function to format a datetime in the Hub's timestamp format, e.g. 2024-07-01T10:11:12.345Z
+
+    Args:
+        date (datetime.datetime): naive dates are taken to be UTC
+
+    Returns:
+        string: the UTC time, to the millisecond
+    """
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.strftime('%Y-%m-%dT%H:%M:%S.') + f"{date.microsecond // 1000:03d}Z"
 
 def iso8601_to_date(iso_string, with_zone=False):
     """Utility function to convert iso_8601 formatted string to datetime object, optionally accounting for timezone
@@ -22,22 +76,73 @@ def iso8601_to_date(iso_string, with_zone=False):
         with_zone (bool, optional): whether to account for timezone offset. Defaults to False.
 
     Returns:
-        datetime.datetime: equivalent time, with or without timezone offsets
-    """
-    date_timezone = iso_string.split('Z')
-    date = dateutil.parser.parse(date_timezone[0])
-    if with_zone and len(date_timezone > 1):
-        hours_minutes = date_timezone[1].split(':')
-        minutes = (60*int(hours_minutes[0]) + int(hours_minutes[1] if len(hours_minutes) > 1 else 0))
-        date = date + datetime.timedelta(minutes=minutes)
+        datetime.datetime: equivalent time, timezone aware (if the string has a 'Z' or an offset) with_zone,
+                           otherwise naive (the time as written, ignoring its timezone)
+    """
+    date = parse_iso8601(iso_string)
+    if not with_zone:
+        date = date.replace(tzinfo=None)
     return date
 
-def iso8601_timespan(days_ago, from_date=datetime.utcnow(), delta=timedelta(weeks=1)):
+def iso8601_timespan(days_ago, from_date=None, delta=timedelta(weeks=1)):
+    """Utility generator of iso_8601 timestamps, every delta from days_ago days before from_date until from_date
+
+    Args:
+        days_ago (int): how far back the timespan starts
+        from_date (datetime.datetime, optional): end of the timespan. Defaults to now (UTC).
+        delta (datetime.timedelta, optional): step. Defaults to a week.
+    """
+    if from_date is None:
+        from_date = datetime.now(timezone.utc).replace(tzinfo=None)
     curr_date = from_date - timedelta(days=days_ago)
     while curr_date < from_date:
         yield curr_date.isoformat('T', 'seconds')
         curr_date += delta
 
+def _date_bound(bound):
+    if bound is None:
+        return None
+    date = parse_iso8601(bound) if isinstance(bound, str) else bound
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    # round up to the millisecond, so that comparing Hub timestamps as strings gives the same answer as comparing dates
+    return date + timedelta(microseconds=-date.microsecond % 1000)
+
+def filter_by_date(items, field='createdAt', start=None, end=None):
+    """Utility generator of the items whose timestamp is within [start, end)
+
+    Timestamps in the Hub's format are compared as strings, without parsing them, others are parsed
+    (naive ones are taken to be UTC). Items without the timestamp are left out.
+
+    Args:
+        items (iterable): of dicts, e.g. notifications, codelocations or versions
+        field (string or tuple): key of the timestamp, or keys for safe_get. Defaults to 'createdAt'.
+        start (datetime.datetime or string, optional): inclusive lower bound
+        end (datetime.datetime or string, optional): exclusive upper bound
+
+    Yields:
+        dict: the items within the range, in the given order
+    """
+    keys = (field,) if isinstance(field, str) else tuple(field)
+    start, end = _date_bound(start), _date_bound(end)
+    start_string = to_iso8601(start) if start else None
+    end_string = to_iso8601(end) if end else None
+    match = HUB_TIMESTAMP.match
+    for item in items:
+        value = safe_get(item, *keys)
+        if value is None:
+            continue
+        if match(value):
+            if (start_string and value < start_string) or (end_string and value >= end_string):
+                continue
+        else:
+            date = parse_iso8601(value)
+            if date.tzinfo is None:
+                date = date.replace(tzinfo=timezone.utc)
+            if (start and date < start) or (end and date >= end):
+                continue
+        yield item
+
 def min_iso8601():
     """Utility wrapper for iso8601_to_date which provides minimum date (for comparison purposes).
 
@@ -88,6 +193,58 @@ def get_url(obj):
     """
     return safe_get(obj, '_meta', 'href')
 
+def get_link(obj, rel):
+    """Utility function providing the url of a named link of a given object
+
+    Args:
+        obj (dict): object to perform link lookup on.
+        rel (string): link name, e.g. 'versions'
+
+    Returns:
+        string: url if found or None.
+    """
+    for link in safe_get(obj, '_meta', 'links') or []:
+        if link.get('rel') == rel:
+            return link.get('href')
+
+def get_paged_items(session, url, params=None, headers=None, page_size=100, prefetch=False):
+    """Utility generator reading every item of a paged collection, a page at a time
+
+    Args:
+        session (requests.Session): authenticated session
+        url (string): collection url
+        params (dict, optional): query parameters, besides offset and limit
+        headers (dict, optional): request headers, e.g. an Accept media type
+        page_size (int, optional): items per request. Defaults to 100.
+        prefetch (bool, optional): request the next page in a background thread while the
+                                   current one is consumed. Defaults to False.
+
+    Yields:
+        dict: the items, in the order the Hub returns them
+    """
+    def get_page(offset):
+        response = session.get(url, params=dict(params or {}, offset=offset, limit=page_size), headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        offset = 0
+        page = get_page(offset)
+        while True:
+            items = page.get('items', [])
+            offset += page_size
+            more_pages = len(items) == page_size and offset < page.get('totalCount', offset + 1)
+            if more_pages and executor:
+                next_page = executor.submit(get_page, offset)
+            yield from items
+            if not more_pages:
+                return
+            page = next_page.result() if executor else get_page(offset)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+
 def get_resource_name(obj):
     """Utility function to determine resource name from a given resource object
 
@@ -3,17 +3,72 @@ import requests
 import json
 from operator import itemgetter
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from .Cache import Cache
 
 logger = logging.getLogger(__name__)
 
+# vulnerability records are updated by the KB now and then, re-read them after this many seconds
+VULNERABILITY_TTL = 24 * 3600
+
 def _get_vulnerabilities_url(self):
     return self.config['baseurl'] + '/api/vulnerabilities'
 
-def get_vulnerabilities(self, vulnerability, parameters={}):
+def set_vulnerability_cache(self, maxsize=10000, ttl=VULNERABILITY_TTL, folder=None):
+    '''Configure the cache of vulnerability details (keyed by vulnerability id, e.g. CVE-2021-44228 or BDSA-2021-3703),
+    e.g. give it a folder to keep the details across runs
+    '''
+    self._vulnerabilities = Cache(maxsize=maxsize, ttl=ttl, folder=folder)
+    return self._vulnerabilities
+
+def _fetch_vulnerability(self, vulnerability, parameters={}):
     url = self._get_vulnerabilities_url() + "/{}".format(vulnerability) + self._get_parameter_string(parameters)
     headers = {'Accept': 'application/vnd.blackducksoftware.vulnerability-4+json'}
-    response = self.execute_get(url, custom_headers=headers)
-    return response.json()
+    return self.execute_get(url, custom_headers=headers)
+
+def get_vulnerabilities(self, vulnerability, parameters={}):
+    '''Get the details of a vulnerability, served from the vulnerability cache unless parameters are given'''
+    if parameters:
+        return self._fetch_vulnerability(vulnerability, parameters).json()
+    details = self._vulnerabilities.get(vulnerability)
+    if details is None:
+        response = self._fetch_vulnerability(vulnerability)
+        details = response.json()
+        if response.status_code == 200:
+            self._vulnerabilities.put(vulnerability, details)
+    return details
+
+def get_vulnerabilities_bulk(self, vulnerabilities, max_workers=8):
+    '''Get the details of many vulnerabilities, each distinct id is looked up once and the ids that are
+    not cached are fetched concurrently
+
+    Returns a dict mapping each vulnerability id to its details, or None if it could not be retrieved
+    '''
+    details = {}
+    misses = []
+    for vulnerability in dict.fromkeys(vulnerabilities):
+        details[vulnerability] = self._vulnerabilities.get(vulnerability)
+        if details[vulnerability] is None:
+            misses.append(vulnerability)
+
+    def fetch(vulnerability):
+        try:
+            response = self._fetch_vulnerability(vulnerability)
+        except requests.RequestException as e:
+            logger.warning("failed to retrieve vulnerability {}: {}".format(vulnerability, e))
+            return vulnerability, None
+        if response.status_code != 200:
+            logger.warning("failed to retrieve vulnerability {}, status code {}".format(vulnerability, response.status_code))
+            return vulnerability, None
+        vulnerability_details = response.json()
+        self._vulnerabilities.put(vulnerability, vulnerability_details)
+        return vulnerability, vulnerability_details
+
+    logger.debug("{} vulnerabilities cached, fetching {}".format(len(details) - len(misses), len(misses)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        details.update(executor.map(fetch, misses))
+    return details
 
 def get_vulnerability_affected_projects(self, vulnerability):
     url = self._get_vulnerabilities_url() + "/{}/affected-projects".format(vulnerability) 
@@ -31,6 +86,14 @@ def get_vulnerable_bom_components(self, version_obj, limit=9999):
     response.raise_for_status()
     return response.json()
 
+def iter_vulnerable_bom_components(self, version_obj, page_size=100, prefetch=False):
+    '''Generator version of get_vulnerable_bom_components which pages through all of the
+    vulnerable BOM components rather than asking for them all at once
+    '''
+    url = "{}/vulnerable-bom-components".format(version_obj['_meta']['href'])
+    custom_headers = {'Accept': 'application/vnd.blackducksoftware.bill-of-materials-6+json'}
+    return self._get_paged_items(url, custom_headers=custom_headers, page_size=page_size, prefetch=prefetch)
+
 # TODO: Remove or refactor this
 def get_component_remediation(self, bom_component):
     url = "{}/remediating".format(bom_component['componentVersion'])
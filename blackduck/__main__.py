@@ -21,6 +21,25 @@ def main():
         help='Launch MCP (Model Context Protocol) server'
     )
     
+    parser.add_argument(
+        '--mirror',
+        metavar='DATABASE',
+        help='Sync a local SQLite mirror of the portfolio (projects, versions and BOMs) into DATABASE'
+    )
+
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='With --mirror, re-read every BOM instead of only those which changed'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='With --mirror, number of BOMs read concurrently (default: 8)'
+    )
+
     parser.add_argument(
         '--version',
         action='version',
@@ -31,6 +50,8 @@ def main():
     
     if args.mcp:
         launch_mcp_server()
+    elif args.mirror:
+        sync_mirror(args.mirror, full=args.full, max_workers=args.workers)
     else:
         show_usage()
 
@@ -47,10 +68,11 @@ def show_usage():
     print("BlackDuck Hub REST API CLI")
     print()
     print("Usage:")
-    print("  blackduck --mcp     Launch MCP server")
-    print("  blackduck --version Show version")
+    print("  blackduck --mcp                Launch MCP server")
+    print("  blackduck --mirror DATABASE    Sync a local SQLite mirror of the portfolio")
+    print("  blackduck --version            Show version")
     print()
-    print("For MCP server usage:")
+    print("For MCP server and mirror usage:")
     print("  Set environment variables:")
     print("    BLACKDUCK_URL")
     print("    BLACKDUCK_TOKEN")
@@ -68,5 +90,27 @@ def launch_mcp_server():
         print(f"Error launching MCP server: {e}", file=sys.stderr)
         sys.exit(1)
 
+def sync_mirror(path, full=False, max_workers=8):
+    """Sync the portfolio mirror in path, connecting with BLACKDUCK_URL and BLACKDUCK_TOKEN"""
+    base_url = os.environ.get('BLACKDUCK_URL')
+    token = os.environ.get('BLACKDUCK_TOKEN')
+    if not base_url or not token:
+        print("Error: set the BLACKDUCK_URL and BLACKDUCK_TOKEN environment variables", file=sys.stderr)
+        sys.exit(1)
+
+    from .Client import Client
+    from .Mirror import MirrorStore, MirrorSync
+    logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', level=logging.INFO)
+    try:
+        client = Client(base_url=base_url, token=token, timeout=30.0, retries=3)
+        with MirrorStore(path) as store:
+            stats = MirrorSync(client, store, max_workers=max_workers).sync(full=full)
+    except Exception as e:
+        print(f"Error syncing the mirror: {e}", file=sys.stderr)
+        sys.exit(1)
+    if stats['failed']:
+        print(f"{stats['failed']} project versions could not be mirrored, run again to retry them", file=sys.stderr)
+        sys.exit(2)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
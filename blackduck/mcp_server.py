@@ -4,10 +4,18 @@ BlackDuck MCP Server
 Provides Model Context Protocol interface for BlackDuck Hub REST API
 """
 
+import asyncio
+import base64
+import binascii
 import os
 import sys
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
 import json
 
 # Configure logging for MCP server
@@ -21,16 +29,51 @@ except ImportError:
         "FastMCP not available. Install with: pip install fastmcp"
     )
 
+from .Cache import Cache
 from .Client import Client
+from .Mirror import MirrorStore, MirrorSync
 from .Utils import safe_get
 
+# Seconds a project or version resolved by name is reused before it is looked up again, names
+# which were not found are looked up again on the next call
+LOOKUP_TTL = 300
+
+# Largest page requested from the Hub, whatever the limit given to a tool
+MAX_PAGE_SIZE = 1000
+
+# Page size used when a tool call has a max_bytes budget, results are truncated at page boundaries
+BUDGET_PAGE_SIZE = 25
+
+# Seconds a tool may take before the call fails, override with BLACKDUCK_MCP_TOOL_TIMEOUT
+TOOL_TIMEOUT = 120.0
+
+# Number of tool calls doing Hub I/O at the same time
+MAX_WORKERS = 8
+
+# Seconds after which a portfolio query starts syncing the portfolio mirror (see blackduck.Mirror) in
+# the background, override with BLACKDUCK_MCP_INDEX_MAX_AGE. The mirror file is BLACKDUCK_MCP_INDEX.
+INDEX_MAX_AGE = 3600
+INDEX_PATH = os.path.join(os.path.expanduser('~'), '.blackduck', 'portfolio-mirror.db')
+
 
 class BlackDuckMCPServer:
     """BlackDuck MCP Server implementation"""
     
-    def __init__(self):
+    def __init__(self, lookup_ttl=LOOKUP_TTL, max_workers=MAX_WORKERS, tool_timeout=None):
         self.mcp = FastMCP("BlackDuck Hub")
         self.client = None
+        # project and version lookups by name, shared by all tools
+        self._lookups = Cache(maxsize=1024, ttl=lookup_ttl)
+        # tools are async, their blocking Hub requests run on this pool
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blackduck-mcp")
+        self.tool_timeout = tool_timeout or float(os.environ.get('BLACKDUCK_MCP_TOOL_TIMEOUT', TOOL_TIMEOUT))
+        # local mirror of every BOM for the portfolio tools, opened on first use
+        self.index_path = os.environ.get('BLACKDUCK_MCP_INDEX', INDEX_PATH)
+        self.index_max_age = float(os.environ.get('BLACKDUCK_MCP_INDEX_MAX_AGE', INDEX_MAX_AGE))
+        self._portfolio = None
+        self._portfolio_refresh = threading.Lock()
+        self._portfolio_refresher = None
         self._setup_client()
         self._register_tools()
     
@@ -54,47 +97,305 @@ class BlackDuckMCPServer:
         )
         
         logger.info(f"BlackDuck client initialized for {base_url}")
+
+    def _get_items(self, name, parent=None, limit=None, params=None):
+        """Yield at most limit items of a resource, asking the Hub for pages no bigger than needed"""
+        page_size = min(limit, MAX_PAGE_SIZE) if limit else 250
+        items = self.client.get_resource(name, parent, page_size=page_size, params=dict(params or {}))
+        return islice(items, limit) if limit else items
+
+    def _lookup(self, key, load):
+        """load(key) through the lookup cache, not keeping a None result so that a project or version
+        created after a failed lookup is found by the next one"""
+        found = self._lookups.get_or_load(key, load)
+        if found is None:
+            self._lookups.invalidate(key)
+        return found
+
+    def _find_project(self, project_name):
+        """Resolve a project by name (case-insensitive), cached for LOOKUP_TTL seconds"""
+        def load(key):
+            params = {'q': [f"name:{project_name}"]}
+            for p in self._get_items('projects', limit=100, params=params):
+                if p['name'].lower() == project_name.lower():
+                    return p
+            return None
+        return self._lookup(f"project:{project_name.lower()}", load)
+
+    def _find_version(self, project_name, version_name=None):
+        """Resolve a project and one of its versions by name, the first version if version_name is None.
+
+        Returns:
+            tuple: (project, version), either of them None if not found
+        """
+        project = self._find_project(project_name)
+        if not project:
+            return None, None
+
+        def load(key):
+            if version_name:
+                params = {'q': [f"versionName:{version_name}"]}
+                for v in self._get_items('versions', project, limit=100, params=params):
+                    if v['versionName'].lower() == version_name.lower():
+                        return v
+                return None
+            # Use first (most recent) version
+            return next(iter(self._get_items('versions', project, limit=1)), None)
+        key = f"version:{project['_meta']['href']}:{(version_name or '').lower()}"
+        return project, self._lookup(key, load)
+    
+    def _encode_cursor(self, url, offset, params):
+        cursor = json.dumps({'url': url, 'offset': offset, 'params': params})
+        return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+    def _decode_cursor(self, cursor):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            url, offset, params = cursor['url'], int(cursor['offset']), dict(cursor['params'])
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise ValueError("Invalid cursor, pass the next_cursor returned by the previous call unchanged")
+        # the session authenticates every request, so never follow a cursor to another host
+        if urlparse(url).netloc not in ('', urlparse(self.client.base_url).netloc):
+            raise ValueError("Invalid cursor, it points to another server")
+        return url, offset, params
+
+    def _get_page(self, name=None, parent=None, limit=None, params=None, cursor=None, max_bytes=None, convert=None):
+        """Read up to limit items of a resource, or carry on from a cursor.
+
+        With max_bytes the items are read in small pages and reading stops at the page boundary
+        before the (JSON) size of the items would exceed max_bytes. The first page is always returned.
+
+        Returns:
+            dict: 'items', 'next_cursor' (None at the end of the collection) and 'truncated'
+                  (True if max_bytes stopped the read before limit was reached)
+        """
+        if cursor:
+            url, offset, params = self._decode_cursor(cursor)
+        else:
+            url, offset, params = self.client.list_resources(parent)[name], 0, dict(params or {})
+        page_size = min(limit or MAX_PAGE_SIZE, BUDGET_PAGE_SIZE if max_bytes else MAX_PAGE_SIZE)
+
+        items = []
+        size = 0
+        truncated = False
+        while True:
+            page = self.client.get_json(url, params=dict(params, offset=offset, limit=page_size))
+            page_items = page.get('items', [])
+            if limit:
+                page_items = page_items[:limit - len(items)]
+            page_items = [convert(item) for item in page_items] if convert else page_items
+            page_bytes = len(json.dumps(page_items))
+            if items and max_bytes and size + page_bytes > max_bytes:
+                truncated = True
+                break
+            items.extend(page_items)
+            size += page_bytes
+            offset += len(page_items)
+            more = offset < page['totalCount'] if 'totalCount' in page else len(page.get('items', [])) == page_size
+            if not more:
+                return {'items': items, 'next_cursor': None, 'truncated': False}
+            if limit and len(items) >= limit:
+                break
+        return {'items': items, 'next_cursor': self._encode_cursor(url, offset, params), 'truncated': truncated}
+
+    @staticmethod
+    def _project_summary(project):
+        return {
+            'name': project.get('name'),
+            'description': project.get('description', ''),
+            'projectOwner': safe_get(project, 'projectOwner'),
+            'createdAt': project.get('createdAt'),
+            'updatedAt': project.get('updatedAt'),
+            '_meta': {
+                'href': project.get('_meta', {}).get('href')
+            }
+        }
+
+    @staticmethod
+    def _version_summary(version):
+        return {
+            'versionName': version.get('versionName'),
+            'nickname': version.get('nickname'),
+            'phase': version.get('phase'),
+            'distribution': version.get('distribution'),
+            'createdAt': version.get('createdAt'),
+            'settingUpdatedAt': version.get('settingUpdatedAt'),
+            '_meta': {
+                'href': version.get('_meta', {}).get('href')
+            }
+        }
+
+    @staticmethod
+    def _vulnerability_summary(vuln):
+        return {
+            'componentName': vuln.get('componentName'),
+            'componentVersionName': vuln.get('componentVersionName'),
+            'vulnerabilityName': vuln.get('vulnerabilityName'),
+            'severity': vuln.get('severity'),
+            'baseScore': vuln.get('baseScore'),
+            'overallScore': vuln.get('overallScore'),
+            'remediationStatus': vuln.get('remediationStatus'),
+            'description': vuln.get('description', ''),
+            'publishedDate': vuln.get('publishedDate'),
+            'updatedDate': vuln.get('updatedDate')
+        }
+
+    @staticmethod
+    def _component_summary(component):
+        licenses = component.get('licenses', [])
+        license_display = licenses[0].get('licenseDisplay', 'Unknown') if licenses else 'Unknown'
+
+        return {
+            'componentName': component.get('componentName'),
+            'componentVersionName': component.get('componentVersionName'),
+            'matchTypes': component.get('matchTypes', []),
+            'usages': component.get('usages', []),
+            'licenseDisplay': license_display,
+            'policyStatus': component.get('policyStatus'),
+            'securityRiskProfile': component.get('securityRiskProfile'),
+            'activityData': component.get('activityData')
+        }
+
+    def _version_page(self, name, project_name, version_name, limit, cursor, max_bytes, convert):
+        # a cursor already knows its endpoint, so the project and version are only looked up without one
+        if cursor:
+            return self._get_page(limit=limit, cursor=cursor, max_bytes=max_bytes, convert=convert)
+        project, version = self._find_version(project_name, version_name)
+        if not version:
+            return {'items': [], 'next_cursor': None, 'truncated': False}
+        return self._get_page(name, version, limit=limit, max_bytes=max_bytes, convert=convert)
+
+    def _portfolio_mirror(self, force_refresh=False):
+        """Open the portfolio mirror and, if it is stale (or force_refresh), start syncing it in the background.
+
+        Only one sync runs at a time. Meanwhile queries answer from the mirror as it is, flagged stale.
+
+        Args:
+            force_refresh (bool): re-read every BOM, unless a sync is already running
+
+        Returns:
+            tuple: (MirrorStore, True if it is stale or being synced)
+        """
+        if self._portfolio is None:
+            if self.index_path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            self._portfolio = MirrorStore(self.index_path)
+        store = self._portfolio
+        with self._portfolio_refresh:
+            refresher = self._portfolio_refresher
+            if refresher is None or not refresher.is_alive():
+                if force_refresh or store.is_stale(self.index_max_age):
+                    refresher = threading.Thread(target=self._sync_portfolio, args=(store, force_refresh),
+                                                 name="blackduck-mcp-portfolio", daemon=True)
+                    self._portfolio_refresher = refresher
+                    refresher.start()
+            else:
+                logger.info("Portfolio mirror sync already running, answering from the current mirror")
+        refreshing = refresher is not None and refresher.is_alive()
+        return store, refreshing or store.is_stale(self.index_max_age)
+
+    def _sync_portfolio(self, store, full):
+        try:
+            MirrorSync(self.client, store, max_workers=self.max_workers).sync(full=full)
+        except Exception as e:
+            logger.error(f"Portfolio mirror sync failed: {e}")
+
+    def _portfolio_query(self, query, *args, **kwargs):
+        store, stale = self._portfolio_mirror()
+        run = store.last_finished_run()
+        return {
+            'items': query(store, *args, **kwargs),
+            'indexedAt': run['finished_at'] if run else None,
+            'stale': stale
+        }
+
+    @staticmethod
+    def _find_components(store, component_name, below_version=None, min_version=None, exact=False, limit=None):
+        query = store.query('components').filter(**{'component_name' if exact else 'component_name__contains': component_name})
+        if below_version:
+            query = query.filter(component_version_name__lt=below_version)
+        if min_version:
+            query = query.filter(component_version_name__ge=min_version)
+        rows = query.select(
+            'project_name', 'version_name', 'component_name', 'component_version_name', 'policy_status',
+            'review_status', 'version_url', 'bom_component_url').order_by('project_name', 'version_name').limit(limit).all()
+        licenses = {}
+        if rows:
+            version_urls = {row['version_url'] for row in rows}
+            for row in store.query('licenses').filter(version_url__in=version_urls).select('bom_component_url', 'license_name'):
+                licenses.setdefault(row['bom_component_url'], []).append(row['license_name'])
+        for row in rows:
+            row['licenses'] = '; '.join(licenses.get(row.pop('bom_component_url'), []))
+        return rows
+
+    @staticmethod
+    def _find_vulnerabilities(store, vulnerability_name=None, severity=None, component_name=None, limit=None):
+        query = store.query('vulnerabilities')
+        if vulnerability_name:
+            query = query.filter(vulnerability_name=vulnerability_name)
+        if severity:
+            query = query.filter(severity=severity.upper())
+        if component_name:
+            query = query.filter(component_name__contains=component_name)
+        return query.select(
+            'project_name', 'version_name', 'component_name', 'component_version_name', 'vulnerability_name',
+            'source', 'severity', 'base_score', 'overall_score', 'remediation_status', 'published_date', 'version_url'
+        ).order_by('-overall_score', 'project_name', 'version_name').limit(limit).all()
+
+    @staticmethod
+    def _find_licenses(store, license_name, limit=None):
+        return store.query('licenses').filter(license_name__contains=license_name).select(
+            'project_name', 'version_name', 'component_name', 'component_version_name', 'license_name'
+        ).order_by('project_name', 'version_name', 'component_name').limit(limit).all()
+
+    async def _run(self, function, *args, timeout=None, **kwargs):
+        """Run blocking Hub I/O on the thread pool so that concurrent tool calls overlap.
+
+        Raises:
+            TimeoutError: if it took longer than timeout (default: the server's tool_timeout) seconds.
+                          The request itself is not interrupted, its result is dropped.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout or self.tool_timeout)
+        except asyncio.TimeoutError:
+            name = getattr(function, '__qualname__', function)
+            raise TimeoutError(f"{name} did not complete within {timeout or self.tool_timeout} seconds")
     
     def _register_tools(self):
-        """Register MCP tools"""
+        """Register MCP tools
+
+        The list tools return a page: a dictionary with the 'items', a 'next_cursor' to pass back
+        (with the same limit/max_bytes or new ones) to read the following items, None once there are
+        no more, and 'truncated', True if the max_bytes budget cut the page short.
+        """
         
         @self.mcp.tool
-        def list_projects(limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        async def list_projects(limit: Optional[int] = 50, cursor: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
             """List BlackDuck projects
             
             Args:
                 limit: Maximum number of projects to return (default: 50)
+                cursor: next_cursor of a previous call, to continue where it stopped
+                max_bytes: Optional size budget of the returned projects, about 4 bytes per token
                 
             Returns:
-                List of project dictionaries with name, description, and metadata
+                Page of project dictionaries with name, description, and metadata, and the next_cursor
             """
-            try:
-                projects = self.client.get_resource('projects')
-                result = []
-                
-                for i, project in enumerate(projects):
-                    if limit and i >= limit:
-                        break
-                        
-                    result.append({
-                        'name': project.get('name'),
-                        'description': project.get('description', ''),
-                        'projectOwner': safe_get(project, 'projectOwner'),
-                        'createdAt': project.get('createdAt'),
-                        'updatedAt': project.get('updatedAt'),
-                        '_meta': {
-                            'href': project.get('_meta', {}).get('href')
-                        }
-                    })
-                
-                return result
+            def fetch():
+                try:
+                    return self._get_page('projects', limit=limit, cursor=cursor, max_bytes=max_bytes,
+                                          convert=self._project_summary)
                 
-            except Exception as e:
-                logger.error(f"Error listing projects: {e}")
-                raise
+                except Exception as e:
+                    logger.error(f"Error listing projects: {e}")
+                    raise
+
+            return await self._run(fetch)
         
         @self.mcp.tool
-        def get_project_details(project_name: str) -> Optional[Dict[str, Any]]:
+        async def get_project_details(project_name: str) -> Optional[Dict[str, Any]]:
             """Get detailed information about a specific project
             
             Args:
@@ -103,282 +404,284 @@ class BlackDuckMCPServer:
             Returns:
                 Project details dictionary or None if not found
             """
-            try:
-                params = {'q': [f"name:{project_name}"]}
-                projects = list(self.client.get_resource('projects', params=params))
-                
-                # Find exact match (case-insensitive)
-                project = None
-                for p in projects:
-                    if p['name'].lower() == project_name.lower():
-                        project = p
-                        break
+            def fetch():
+                try:
+                    # Find exact match (case-insensitive)
+                    project = self._find_project(project_name)
                 
-                if not project:
-                    return None
+                    if not project:
+                        return None
                 
-                return {
-                    'name': project.get('name'),
-                    'description': project.get('description', ''),
-                    'projectOwner': safe_get(project, 'projectOwner'),
-                    'createdAt': project.get('createdAt'),
-                    'updatedAt': project.get('updatedAt'),
-                    'projectLevelAdjustments': project.get('projectLevelAdjustments', False),
-                    'cloneCategories': project.get('cloneCategories', []),
-                    '_meta': project.get('_meta', {})
-                }
-                
-            except Exception as e:
-                logger.error(f"Error getting project details: {e}")
-                raise
+                    return {
+                        'name': project.get('name'),
+                        'description': project.get('description', ''),
+                        'projectOwner': safe_get(project, 'projectOwner'),
+                        'createdAt': project.get('createdAt'),
+                        'updatedAt': project.get('updatedAt'),
+                        'projectLevelAdjustments': project.get('projectLevelAdjustments', False),
+                        'cloneCategories': project.get('cloneCategories', []),
+                        '_meta': project.get('_meta', {})
+                    }
+                
+                except Exception as e:
+                    logger.error(f"Error getting project details: {e}")
+                    raise
+
+            return await self._run(fetch)
         
         @self.mcp.tool  
-        def list_project_versions(project_name: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        async def list_project_versions(project_name: str, limit: Optional[int] = 20, cursor: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
             """List versions for a specific project
             
             Args:
                 project_name: Name of the project
                 limit: Maximum number of versions to return (default: 20)
+                cursor: next_cursor of a previous call, to continue where it stopped
+                max_bytes: Optional size budget of the returned versions, about 4 bytes per token
                 
             Returns:
-                List of version dictionaries
+                Page of version dictionaries
             """
-            try:
-                # First find the project
-                params = {'q': [f"name:{project_name}"]}
-                projects = list(self.client.get_resource('projects', params=params))
-                
-                project = None
-                for p in projects:
-                    if p['name'].lower() == project_name.lower():
-                        project = p
-                        break
-                
-                if not project:
-                    return []
-                
-                # Get versions for the project
-                versions = self.client.get_resource('versions', project)
-                result = []
+            def fetch():
+                try:
+                    if cursor:
+                        return self._get_page(limit=limit, cursor=cursor, max_bytes=max_bytes, convert=self._version_summary)
+
+                    # First find the project
+                    project = self._find_project(project_name)
                 
-                for i, version in enumerate(versions):
-                    if limit and i >= limit:
-                        break
-                        
-                    result.append({
-                        'versionName': version.get('versionName'),
-                        'nickname': version.get('nickname'),
-                        'phase': version.get('phase'),
-                        'distribution': version.get('distribution'),
-                        'createdAt': version.get('createdAt'),
-                        'settingUpdatedAt': version.get('settingUpdatedAt'),
-                        '_meta': {
-                            'href': version.get('_meta', {}).get('href')
-                        }
-                    })
+                    if not project:
+                        return {'items': [], 'next_cursor': None, 'truncated': False}
                 
-                return result
+                    # Get versions for the project
+                    return self._get_page('versions', project, limit=limit, max_bytes=max_bytes, convert=self._version_summary)
                 
-            except Exception as e:
-                logger.error(f"Error listing project versions: {e}")
-                raise
+                except Exception as e:
+                    logger.error(f"Error listing project versions: {e}")
+                    raise
+
+            return await self._run(fetch)
         
         @self.mcp.tool
-        def search_projects(query: str, limit: Optional[int] = 25) -> List[Dict[str, Any]]:
+        async def search_projects(query: str, limit: Optional[int] = 25, cursor: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
             """Search for projects by name or description
             
             Args:
                 query: Search query string
                 limit: Maximum number of results to return (default: 25)
+                cursor: next_cursor of a previous call, to continue where it stopped
+                max_bytes: Optional size budget of the returned projects, about 4 bytes per token
                 
             Returns:
-                List of matching project dictionaries
+                Page of matching project dictionaries, most relevant first
             """
-            try:
-                params = {'q': [f"name:{query}"]}
-                projects = self.client.get_resource('projects', params=params)
-                result = []
-                
-                for i, project in enumerate(projects):
-                    if limit and i >= limit:
-                        break
-                        
-                    # Simple relevance scoring
-                    name = project.get('name', '').lower()
-                    description = project.get('description', '').lower()
+            def fetch():
+                try:
                     query_lower = query.lower()
+
+                    def convert(project):
+                        # Simple relevance scoring
+                        name = project.get('name', '').lower()
+                        description = project.get('description', '').lower()
                     
-                    relevance = 0
-                    if query_lower in name:
-                        relevance += 2
-                    if query_lower in description:
-                        relevance += 1
+                        relevance = 0
+                        if query_lower in name:
+                            relevance += 2
+                        if query_lower in description:
+                            relevance += 1
                     
-                    result.append({
-                        'name': project.get('name'),
-                        'description': project.get('description', ''),
-                        'relevance': relevance,
-                        'createdAt': project.get('createdAt'),
-                        '_meta': {
-                            'href': project.get('_meta', {}).get('href')
+                        return {
+                            'name': project.get('name'),
+                            'description': project.get('description', ''),
+                            'relevance': relevance,
+                            'createdAt': project.get('createdAt'),
+                            '_meta': {
+                                'href': project.get('_meta', {}).get('href')
+                            }
                         }
-                    })
+
+                    params = {'q': [f"name:{query}"]}
+                    result = self._get_page('projects', limit=limit, params=params, cursor=cursor,
+                                            max_bytes=max_bytes, convert=convert)
                 
-                # Sort by relevance
-                result.sort(key=lambda x: x['relevance'], reverse=True)
-                return result
+                    # Sort by relevance
+                    result['items'].sort(key=lambda x: x['relevance'], reverse=True)
+                    return result
                 
-            except Exception as e:
-                logger.error(f"Error searching projects: {e}")
-                raise
+                except Exception as e:
+                    logger.error(f"Error searching projects: {e}")
+                    raise
+
+            return await self._run(fetch)
         
         @self.mcp.tool
-        def get_project_vulnerabilities(project_name: str, version_name: Optional[str] = None, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        async def get_project_vulnerabilities(project_name: str, version_name: Optional[str] = None, limit: Optional[int] = 50, cursor: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
             """Get vulnerabilities for a project version
             
             Args:
                 project_name: Name of the project
                 version_name: Name of the version (if None, uses latest)
                 limit: Maximum number of vulnerabilities to return (default: 50)
+                cursor: next_cursor of a previous call, to continue where it stopped
+                max_bytes: Optional size budget of the returned vulnerabilities, about 4 bytes per token
                 
             Returns:
-                List of vulnerability dictionaries
+                Page of vulnerability dictionaries
             """
-            try:
-                # Find project
-                params = {'q': [f"name:{project_name}"]}
-                projects = list(self.client.get_resource('projects', params=params))
-                
-                project = None
-                for p in projects:
-                    if p['name'].lower() == project_name.lower():
-                        project = p
-                        break
-                
-                if not project:
-                    return []
-                
-                # Find version
-                versions = list(self.client.get_resource('versions', project))
-                if not versions:
-                    return []
-                
-                version = None
-                if version_name:
-                    for v in versions:
-                        if v['versionName'].lower() == version_name.lower():
-                            version = v
-                            break
-                else:
-                    # Use first (most recent) version
-                    version = versions[0]
-                
-                if not version:
-                    return []
-                
-                # Get vulnerabilities
+            def fetch():
                 try:
-                    vulnerabilities = self.client.get_resource('vulnerable-components', version)
-                    result = []
-                    
-                    for i, vuln in enumerate(vulnerabilities):
-                        if limit and i >= limit:
-                            break
-                            
-                        result.append({
-                            'componentName': vuln.get('componentName'),
-                            'componentVersionName': vuln.get('componentVersionName'),
-                            'vulnerabilityName': vuln.get('vulnerabilityName'),
-                            'severity': vuln.get('severity'),
-                            'baseScore': vuln.get('baseScore'),
-                            'overallScore': vuln.get('overallScore'),
-                            'remediationStatus': vuln.get('remediationStatus'),
-                            'description': vuln.get('description', ''),
-                            'publishedDate': vuln.get('publishedDate'),
-                            'updatedDate': vuln.get('updatedDate')
-                        })
-                    
-                    return result
-                    
-                except Exception:
-                    # Fallback: try to get components instead
-                    components = self.client.get_resource('components', version)
-                    return [{'info': 'Use list_project_components for component information'}]
+                    return self._version_page('vulnerable-components', project_name, version_name, limit, cursor,
+                                              max_bytes, self._vulnerability_summary)
                 
-            except Exception as e:
-                logger.error(f"Error getting vulnerabilities: {e}")
-                raise
+                except KeyError:
+                    # Fallback: point to components instead
+                    return {'items': [{'info': 'Use list_project_components for component information'}],
+                            'next_cursor': None, 'truncated': False}
+                
+                except Exception as e:
+                    logger.error(f"Error getting vulnerabilities: {e}")
+                    raise
+
+            return await self._run(fetch)
         
         @self.mcp.tool
-        def list_project_components(project_name: str, version_name: Optional[str] = None, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        async def list_project_components(project_name: str, version_name: Optional[str] = None, limit: Optional[int] = 50, cursor: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
             """List components in a project version
             
             Args:
                 project_name: Name of the project
                 version_name: Name of the version (if None, uses latest)  
                 limit: Maximum number of components to return (default: 50)
+                cursor: next_cursor of a previous call, to continue where it stopped
+                max_bytes: Optional size budget of the returned components, about 4 bytes per token
                 
             Returns:
-                List of component dictionaries
+                Page of component dictionaries
             """
-            try:
-                # Find project
-                params = {'q': [f"name:{project_name}"]}
-                projects = list(self.client.get_resource('projects', params=params))
-                
-                project = None
-                for p in projects:
-                    if p['name'].lower() == project_name.lower():
-                        project = p
-                        break
-                
-                if not project:
-                    return []
-                
-                # Find version
-                versions = list(self.client.get_resource('versions', project))
-                if not versions:
-                    return []
+            def fetch():
+                try:
+                    return self._version_page('components', project_name, version_name, limit, cursor,
+                                              max_bytes, self._component_summary)
                 
-                version = None
-                if version_name:
-                    for v in versions:
-                        if v['versionName'].lower() == version_name.lower():
-                            version = v
-                            break
-                else:
-                    version = versions[0]
+                except Exception as e:
+                    logger.error(f"Error listing components: {e}")
+                    raise
+
+            return await self._run(fetch)
+
+        @self.mcp.tool
+        async def get_version_risk(project_name: str, version_name: Optional[str] = None, limit: Optional[int] = 50, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+            """Get the components and the vulnerabilities of a project version in one call
+            
+            Args:
+                project_name: Name of the project
+                version_name: Name of the version (if None, uses latest)
+                limit: Maximum number of components, and of vulnerabilities, to return (default: 50)
+                max_bytes: Optional size budget of each of the two lists, about 4 bytes per token
                 
+            Returns:
+                Dictionary with the version name and a page of its components and of its vulnerabilities.
+                Continue either with list_project_components or get_project_vulnerabilities and its next_cursor.
+            """
+            try:
+                project, version = await self._run(self._find_version, project_name, version_name)
                 if not version:
-                    return []
+                    return {}
+
+                # both lists are read from the Hub at the same time
+                components, vulnerabilities = await asyncio.gather(
+                    self._run(self._get_page, 'components', version, limit, None, None, max_bytes, self._component_summary),
+                    self._run(self._get_page, 'vulnerable-components', version, limit, None, None, max_bytes, self._vulnerability_summary))
+                return {
+                    'versionName': version.get('versionName'),
+                    'components': components,
+                    'vulnerabilities': vulnerabilities
+                }
+
+            except Exception as e:
+                logger.error(f"Error getting version risk: {e}")
+                raise
+
+        @self.mcp.tool
+        async def find_component_usage(component_name: str, below_version: Optional[str] = None, min_version: Optional[str] = None, exact: bool = False, limit: Optional[int] = 100) -> Dict[str, Any]:
+            """Find every project version, across the portfolio, using a component
+            
+            Answered from the local portfolio mirror at once. If the mirror is older than the index max age
+            it is synced in the background and stale is true meanwhile.
+            E.g. component_name='log4j-core', below_version='2.17' finds the versions using log4j-core < 2.17.
+            
+            Args:
+                component_name: Component name, case-insensitive, a substring unless exact is true
+                below_version: Only component versions lower than this one
+                min_version: Only component versions equal to or higher than this one
+                exact: Match the whole component name (default: false)
+                limit: Maximum number of rows to return (default: 100)
                 
-                # Get components
-                components = self.client.get_resource('components', version)
-                result = []
+            Returns:
+                Dictionary with the matching rows (project, version, component version, licenses, policy status),
+                indexedAt and stale
+            """
+            return await self._run(self._portfolio_query, self._find_components, component_name,
+                                   below_version=below_version, min_version=min_version, exact=exact, limit=limit)
+
+        @self.mcp.tool
+        async def find_vulnerability_exposure(vulnerability_name: Optional[str] = None, severity: Optional[str] = None, component_name: Optional[str] = None, limit: Optional[int] = 100) -> Dict[str, Any]:
+            """Find the project versions, across the portfolio, affected by vulnerabilities
+            
+            Answered from the local portfolio mirror at once. If the mirror is older than the index max age
+            it is synced in the background and stale is true meanwhile.
+            
+            Args:
+                vulnerability_name: Vulnerability id, e.g. CVE-2021-44228 or BDSA-2021-3703
+                severity: Severity, e.g. CRITICAL or HIGH
+                component_name: Component name, case-insensitive substring
+                limit: Maximum number of rows to return (default: 100)
                 
-                for i, component in enumerate(components):
-                    if limit and i >= limit:
-                        break
-                        
-                    licenses = component.get('licenses', [])
-                    license_display = licenses[0].get('licenseDisplay', 'Unknown') if licenses else 'Unknown'
-                    
-                    result.append({
-                        'componentName': component.get('componentName'),
-                        'componentVersionName': component.get('componentVersionName'),
-                        'matchTypes': component.get('matchTypes', []),
-                        'usages': component.get('usages', []),
-                        'licenseDisplay': license_display,
-                        'policyStatus': component.get('policyStatus'),
-                        'securityRiskProfile': component.get('securityRiskProfile'),
-                        'activityData': component.get('activityData')
-                    })
+            Returns:
+                Dictionary with the matching rows, highest score first, indexedAt and stale
+            """
+            return await self._run(self._portfolio_query, self._find_vulnerabilities, vulnerability_name,
+                                   severity=severity, component_name=component_name, limit=limit)
+
+        @self.mcp.tool
+        async def find_license_usage(license_name: str, limit: Optional[int] = 100) -> Dict[str, Any]:
+            """Find the components, and the project versions using them, under a license across the portfolio
+            
+            Answered from the local portfolio mirror at once. If the mirror is older than the index max age
+            it is synced in the background and stale is true meanwhile.
+            
+            Args:
+                license_name: License name, case-insensitive substring, e.g. GPL
+                limit: Maximum number of rows to return (default: 100)
                 
-                return result
+            Returns:
+                Dictionary with the matching rows, indexedAt and stale
+            """
+            return await self._run(self._portfolio_query, self._find_licenses, license_name, limit=limit)
+
+        @self.mcp.tool
+        async def refresh_portfolio_index(force: bool = False) -> Dict[str, Any]:
+            """Start bringing the local portfolio mirror up to date, and report on it
+            
+            The refresh runs in the background, call this again to see whether it finished. Only the BOMs
+            which changed since they were mirrored are read again, unless force is true.
+            
+            Args:
+                force: Re-read every BOM (default: false)
                 
-            except Exception as e:
-                logger.error(f"Error listing components: {e}")
-                raise
+            Returns:
+                Dictionary with refreshing (true while the refresh runs), the number of mirrored versions and
+                of versions which failed to be read by the last refresh (retried by the next one), indexedAt and stale
+            """
+            def refresh():
+                store, stale = self._portfolio_mirror(force_refresh=force)
+                refresher = self._portfolio_refresher
+                versions = store.execute("SELECT count(*) AS count FROM versions")[0]['count']
+                run = store.last_finished_run()
+                return {'refreshing': refresher is not None and refresher.is_alive(),
+                        'versions': versions, 'failed': run['failed'] if run else 0,
+                        'indexedAt': run['finished_at'] if run else None, 'stale': stale}
+            return await self._run(refresh)
     
     def run(self):
         """Run the MCP server"""
@@ -28,8 +28,10 @@ import csv
 
 parser = argparse.ArgumentParser("A program to add BDSA details to security reports.")
 parser.add_argument("folder")
+parser.add_argument("-c", "--cache", default=None, help="Folder in which BDSA details are kept across runs")
 args = parser.parse_args()
 hub = HubInstance()
+hub.set_vulnerability_cache(folder=args.cache)
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(module)s: %(message)s', stream=sys.stderr, level=logging.DEBUG)
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -69,13 +71,18 @@ def handle_security_report(csvfile):
             row.append('Workaround')
             all.append(row)
 
-            for row in reader:
+            # Each BDSA record is retrieved once however many rows refer to it
+            rows = list(reader)
+            bdsa_data_by_id = hub.get_vulnerabilities_bulk(
+                [bdsa_id for bdsa_id in (parse_bdsa_id(row[9]) for row in rows) if bdsa_id])
+
+            for row in rows:
                 vuln_id_cell = row[9]  # Currently the column index of 'Vulnerability id' column is 9.  Change if required.
                 #logging.debug(f" CELL [{vuln_id_cell}]")
                 bdsa_id = parse_bdsa_id(vuln_id_cell)
                 #logging.debug(f"BDSA ID [{bdsa_id}]")
                 if bdsa_id != None:
-                    bdsa_data = load_bdsa_data(bdsa_id)
+                    bdsa_data = bdsa_data_by_id.get(bdsa_id)
                     #logging.info(f"{bdsa_data}")
                     if bdsa_data and "solution" in bdsa_data and "workaround" in bdsa_data and "name" in bdsa_data:
                         #logging.debug(f"BDSA Data Solution [{bdsa_data['solution']}]")
@@ -129,11 +136,6 @@ def parse_bdsa_id(record):
 def is_bdsa_record(record):
     return 'BDSA' in record
 
-def load_bdsa_data(bdsa_id):
-    logging.debug(f"Retrieving BDSA data for [{bdsa_id}]")
-    vuln = hub.get_vulnerabilities(bdsa_id)
-    return vuln
-
 def main():
     checkdirs(args.folder)
     handle_security_reports(args.folder)
@@ -40,23 +40,18 @@ logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.s
 if args.CSV:
     with open(args.CSV, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
-        for row in reader:
-            project = (row['Project'])
-            user = (row['User'])
-            roles = (row['Roles'])
-            roles_l = []
-            roles = roles.split(',')
-            if roles:
-                for x in range(len(roles)):
-                    project_roles_l = roles
-
-            else:
-                project_roles_l = []
-
-            response = hub.assign_user_to_project(user, project, project_roles_l)
-
-            if response and response.status_code == 201:
-                 logging.info("Successfully assigned user {} to project {} with project-roles {}".format(user, project, project_roles_l))
-            else:
-                logging.warning("Failed to assign user {} to project {}".format(user, project))
-            print('----------------------')
\ No newline at end of file
+        assignments = [{
+            'project': row['Project'],
+            'user': row['User'],
+            'roles': [r for r in row['Roles'].split(',') if r],
+        } for row in reader]
+
+    # names are resolved from indexes of users and project-roles which are read once, each distinct
+    # project is looked up once and the assignments are POSTed concurrently
+    for result in hub.assign_to_projects(assignments):
+        if result['status'] == 'assigned':
+            logging.info("Successfully assigned user {} to project {} with project-roles {}".format(
+                result['user'], result['project'], result['roles']))
+        else:
+            logging.warning("Failed to assign user {} to project {}: {}".format(
+                result['user'], result['project'], result['error'] or result['status_code']))
@@ -97,6 +97,7 @@ from itertools import islice
 from datetime  import timedelta
 from datetime import datetime
 from blackduck import Client
+from blackduck.PolicyOverride import PolicyOverrider
 from pprint import pprint
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
@@ -104,40 +105,28 @@ logging.getLogger("requests").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("blackduck").setLevel(logging.DEBUG)
 
-def override_policy_violaton(project_name, project_version, component_name, component_version, override_rationale, override_category):
-    params = {"q": f"name:{project_name}"}
-    projects = bd.get_resource('projects', params=params)
-    for project in projects:
-        if project['name'] == project_name:
-            versions = bd.get_resource('versions', project)
-            for version in versions :
-                if version['versionName'] == project_version:
-                    params = {"q":f"componentOrVersionName:{component_name}"}
-                    components = bd.get_resource('components', version, params=params)
-                    for component in components:
-                        component_version_name = str(component['componentVersionName'])
-                        component_url = bd.list_resources(component)['href']
-                        if str(component_version_name).strip() == str(component_version).strip():
-                            logging.info(f"Overriding violation for {component_name} {component_version} in {project_name} {project_version}")
-                            policy_status = bd.get_resource('policy-status', component, items=False)
-                            for item in policy_status['_meta']['links']:
-                                policy_url = item['href']
-                                policy_rule_id = policy_url.split("/")[5]
-                                policy_update_url = f"{component_url}/policy-rules/{policy_rule_id}/policy-status"
-                                policy_rule = bd.session.get(policy_url).json()
-                                policy_category = policy_rule['category']
-                                if override_category == policy_category:
-                                    data = {
-                                            "approvalStatus" : "IN_VIOLATION_OVERRIDDEN",
-                                            "comment" : f"{override_rationale}",
-                                            "updatedAt" : datetime.now().isoformat()
-                                            }
-                                    headers = {"Content-Type": "application/vnd.blackducksoftware.bill-of-materials-6+json",
-                                                "Accept": "application/vnd.blackducksoftware.bill-of-materials-6+json" }
-                                    r = bd.session.put(policy_update_url, headers = headers, json=data)
-                                    r.raise_for_status()
-                                    logging.info(f"Policy status update completion code {r.status_code}")
-
+def override_row(row):
+    # maps an input row (CSV or EXCEL) to a PolicyOverrider row, None if it is to be ignored
+    component_name = row[0]
+    component_version = row[1]
+    policy_violation_status = row[8]
+    override_category = row[9]
+    override_date = row[11]
+    override_rationale = row[12]
+    if override_rationale:
+        override_rationale = override_rationale.strip()
+    project_name = row[14]
+    project_version = row[15]
+    if policy_violation_status == 'IN_VIOLATION' and override_rationale and not override_date:
+        logging.info(f"Processing category {override_category} {component_name} {component_version} in {project_name} {project_version} with ''{override_rationale}''")
+        return {
+            'project': project_name,
+            'version': project_version,
+            'component': component_name,
+            'component_version': str(component_version),
+            'category': override_category,
+            'comment': override_rationale,
+        }
 
 def parse_command_args():
 
@@ -150,46 +139,24 @@ def parse_command_args():
     return parser.parse_args()
 
 def process_csv_file(filename):
-    file = open(filename)
-    type(file)
-    csvreader = csv.reader(file)
-    for row in csvreader:
-        component_name = row[0]
-        component_version = row[1]
-        policy_violation_status = row[8]
-        override_category = row[9]
-        override_date = row[11]
-        override_rationale = row[12]
-        if override_rationale:
-            override_rationale = override_rationale.strip()
-        project_name = row[14]
-        project_version = row[15]
-        if policy_violation_status == 'IN_VIOLATION' and override_rationale and not override_date:
-            logging.info(f"Processing category {override_category} {component_name} {component_version} in {project_name} {project_version} with ''{override_rationale}''")
-            override_policy_violaton(project_name, project_version, component_name, component_version, override_rationale, override_category)
+    with open(filename) as file:
+        csvreader = csv.reader(file)
+        return [r for r in map(override_row, csvreader) if r]
 
 def process_excel_file(filename):
     import openpyxl
     wb = openpyxl.load_workbook(filename)
     ws = wb.active
     process = False
+    rows = []
     for row in ws.values:
         if process:
-            component_name = row[0]
-            component_version = row[1]
-            policy_violation_status = row[8]
-            override_category = row[9]
-            override_date = row[11]
-            override_rationale = row[12]
-            if override_rationale:
-                override_rationale = override_rationale.strip()
-            project_name = row[14]
-            project_version = row[15]
-            if policy_violation_status == 'IN_VIOLATION' and override_rationale and not override_date:
-                logging.info(f"Processing category {override_category} {component_name} {component_version} in {project_name} {project_version} with ''{override_rationale}''")
-                override_policy_violaton(project_name, project_version, component_name, component_version, override_rationale, override_category)
+            override = override_row(row)
+            if override:
+                rows.append(override)
         if not process:
             process = (row[0] == "Name of Software Component")
+    return rows
 
 def main():
     args = parse_command_args()
@@ -200,10 +167,19 @@ def main():
 
     if re.match(".+xlsx?$", args.input_file):
         print (f"Processing EXCEL file {args.input_file}")
-        process_excel_file(args.input_file)
+        rows = process_excel_file(args.input_file)
     else:
         print ("Processing as CSV")
-        process_csv_file(args.input_file)
+        rows = process_csv_file(args.input_file)
+
+    # each project version's BOM and each matched component's policy status are read once,
+    # and the overrides are applied concurrently
+    overrider = PolicyOverrider(bd.session)
+    for result in overrider.override(rows):
+        if result['status'] == 'overridden':
+            logging.info(f"Overrode {result['rules']} for {result['component']} {result['component_version']} in {result['project']} {result['version']}")
+        else:
+            logging.warning(f"{result['status']}: {result['component']} {result['component_version']} in {result['project']} {result['version']} {result['error'] or ''}")
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -40,6 +40,7 @@ from itertools import islice
 from datetime  import timedelta
 from datetime import datetime
 from blackduck import Client
+from blackduck.KnowledgeBase import KBLookup
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -47,24 +48,14 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("blackduck").setLevel(logging.DEBUG)
 
 def find_kb_component(component_name):
-    url = bd.base_url + "/api/search/kb-components"
-    query = { "q": component_name }
-    url = "{}?{}&limit=100".format(url,urllib.parse.urlencode(query))
-    print (url)
-    headers = {
-    "Accept": "application/vnd.blackducksoftware.internal-1+json, application/json, */*;q=0.8"
-    }
-    response = bd.session.get(url, headers=headers)
-    print (response)
-    items = response.json()['items']
+    # KB searches are cached, a name repeated in the input file is searched once
     hit_counts = dict()
-    for item in items:
-        for hit in item['hits']:
-            aliases = hit.get('fields').get('aliases', None)
-            if aliases and component_name.strip() in aliases:
-                hit_counts[hit['_meta']['href']] = hit['fields']['release_count']
-            elif component_name.strip() in hit['fields']['name']:
-                hit_counts[hit['_meta']['href']] = hit['fields']['release_count']
+    for hit in kb.search_name(component_name):
+        aliases = hit.get('fields').get('aliases', None)
+        if aliases and component_name.strip() in aliases:
+            hit_counts[hit['_meta']['href']] = hit['fields']['release_count']
+        elif component_name.strip() in hit['fields']['name']:
+            hit_counts[hit['_meta']['href']] = hit['fields']['release_count']
     return hit_counts
 
 def add_component_version(component_version, project_version):
@@ -108,6 +99,8 @@ def main():
         access_token = tf.readline().strip()
     global bd
     bd = Client(base_url=args.base_url, token=access_token, verify=args.no_verify, timeout=60.0, retries=4)
+    global kb
+    kb = KBLookup(bd.session)
 
     global project_version
 
@@ -135,6 +128,8 @@ def main():
    
     with open(args.component_input_file,"r") as f:
         inputdata = f.readlines()
+    # Search the KB for all the distinct names at once
+    kb.search_names([line.strip().split(" ")[0] for line in inputdata if line.strip()])
     for line in inputdata:
         (name,version) = line.strip().split(" ")
         logging.info (f"Processing componemt name {name} version {version}")
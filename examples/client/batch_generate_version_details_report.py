@@ -28,7 +28,8 @@ Project version will be selected from an EXCEL file.
 Each row of a file is expected to contain a field for 
 Project Name and Project Version.
 Script will iterate through the rows of a spreadsheet and 
-process report generation sequentially, one at a time.
+queue report generation; up to --max-pending reports are generated
+concurrently and each is downloaded as soon as it completes.
 
 Requirements
 
@@ -80,6 +81,10 @@ options:
                         How many times to retry downloading the report, i.e. wait for the report to be generated
   -s SLEEP_TIME, --sleep_time SLEEP_TIME
                         The amount of time to sleep in-between (re-)tries to download the report
+  -mp MAX_PENDING, --max-pending MAX_PENDING
+                        Maximum number of reports generating on the server at the same time
+  -c CACHE_DIR, --cache-dir CACHE_DIR
+                        Reuse reports cached here (or already on the server) for versions whose BOM has not changed
   -r REPORTS, --reports REPORTS
                         Comma separated list (no spaces) of the reports to generate - ['version', 'scans', 'components',
                         'vulnerabilities', 'source', 'cryptography', 'license_terms', 'component_additional_fields',
@@ -94,9 +99,9 @@ import argparse
 import logging
 import re
 import openpyxl
-import time
 
 from blackduck import Client
+from blackduck.ReportManager import ReportCache, ReportManager
 from blackduck.constants import VERSION_PHASES
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
@@ -190,36 +195,6 @@ def process_excel_file(args):
             logging.info("Could not parse input file")
             sys.exit(1)
             
-def download_report(location, filename, retries, sleep_time):
-    report_id = location.split("/")[-1]
-    base_url = bd.base_url if bd.base_url.endswith("/") else bd.base_url + "/"
-    download_url = f"{base_url}api/reports/{report_id}"
-
-    logging.info(f"Retrieving report list for {location}")
-
-    if retries:
-        response = bd.session.get(location)
-        report_status = response.json().get('status', 'Not Ready')
-        if response.status_code == 200 and report_status == 'COMPLETED':
-            response = bd.session.get(download_url, headers={'Content-Type': 'application/zip', 'Accept':'application/zip'})
-            if response.status_code == 200:
-                with open(filename, "wb") as f:
-                    f.write(response.content)
-                logging.info(f"Successfully downloaded zip file to {filename} for report {report_id}")
-            else:
-                logging.error(f"Failed to download report")
-        else:	
-            retries -= 1
-            logging.debug(f"Failed to retrieve report {report_id}, report status: {report_status}")
-            logging.debug(f"Will retry {retries} more times. Sleeping for {sleep_time} second(s)")
-            time.sleep(sleep_time)
-            download_report(location, filename, retries, sleep_time)
-    else:
-        # raise FailedReportDownload(f"Failed to retrieve report {report_id} after multiple retries")
-        message = f"Failed to retrieve {filename} for report {report_id} after multiple retries"
-        logging.error(message)
-        append_to_summary (message)
-
 def process_project_version(project_name, version_name, args):
     params = {
         'q': [f"name:{project_name}"]
@@ -252,23 +227,9 @@ def process_project_version(project_name, version_name, args):
     reports_l = args.reports.split(",")
     reports_l = [version_name_map[r.lower()] for r in reports_l]
 
-    post_data = {
-            'categories': reports_l,
-            'versionId': version['_meta']['href'].split("/")[-1],
-            'reportType': 'VERSION',
-            'reportFormat': "CSV"	
-    }
-    version_reports_url = bd.list_resources(version).get('versionReport')
-    assert version_reports_url, "Ruh-roh, a version should always have a versionReport resource under it"
-
-    r = bd.session.post(version_reports_url, json=post_data)
-    r.raise_for_status()
-    location = r.headers.get('Location')
-    assert location, "Hmm, this does not make sense. If we successfully created a report then there needs to be a location where we can get it from"
-
-    logging.debug(f"Created version details report for project {project_name}, version {version_name} at location {location}")
     report_file_name = project_name + "-" + version_name + ".zip"
-    download_report(location, sanitize_filename(report_file_name), args.tries, args.sleep_time)
+    manager.add_version_report(version, reports_l, format="CSV", filename=sanitize_filename(report_file_name))
+    logging.debug(f"Queued version details report for project {project_name}, version {version_name}")
 
 def sanitize_filename(filename):
     forbidden = '/<>:"\|?*'
@@ -286,6 +247,8 @@ def parse_command_args():
     parser.add_argument("-nv", "--no-verify",   action='store_false', help="Disable TLS certificate verification")
     parser.add_argument('-tr', '--tries', default=30, type=int, help="How many times to retry downloading the report, i.e. wait for the report to be generated")
     parser.add_argument('-s', '--sleep_time', default=10, type=int, help="The amount of time to sleep in-between (re-)tries to download the report")
+    parser.add_argument('-mp', '--max-pending', default=10, type=int, help="Maximum number of reports generating on the server at the same time")
+    parser.add_argument('-c', '--cache-dir', default=None, help="Reuse reports cached here (or already on the server) for versions whose BOM has not changed")
     parser.add_argument("-r", "--reports",	default=",".join(all_reports),
     	help=f"Comma separated list (no spaces) of the reports to generate - {list(version_name_map.keys())}. Default is all reports.")
 
@@ -297,6 +260,12 @@ def main():
         access_token = tf.readline().strip()
     global bd
     bd = Client(base_url=args.base_url, token=access_token, verify=args.no_verify, timeout=60.0, retries=4)
+    global manager
+    # keeps up to --max-pending reports generating at once and downloads each as soon as it is done
+    manager = ReportManager(bd.session, max_pending=args.max_pending, poll_interval=args.sleep_time,
+                            max_poll_interval=max(args.sleep_time, 60), timeout=args.tries * args.sleep_time,
+                            cache=ReportCache(args.cache_dir) if args.cache_dir else None,
+                            reuse_server_reports=bool(args.cache_dir))
 
     if re.match(".+xlsx?$", args.input_file):
         logging.info(f"Processing EXCEL file {args.input_file}")
@@ -305,6 +274,12 @@ def main():
         logging.info(f"Processing CSV file {args.input_file}")
         process_csv_file(args)
 
+    for result in manager.run():
+        if result['status'] == 'COMPLETED':
+            logging.info(f"Successfully downloaded zip file to {result['pathname']}")
+        else:
+            append_to_summary(f"Failed to retrieve {result['filename']}: {result['status']} {result['error'] or ''}")
+
     print (summary_report)
 
 if __name__ == "__main__":
@@ -38,10 +38,9 @@ import subprocess
 import json
 import traceback
 import copy
-import ijson
 from json2html import *
 from blackduck import Client
-from zipfile import ZipFile
+from blackduck.ReportReader import ReportReader
 
 program_description = \
 '''This script collects BlackDuck reports for version details and discoveries and generates new reports.
@@ -92,10 +91,11 @@ blackduck_link_component_ui_api = "/api/projects/{projectId}/versions/{projectVe
 blackduck_link_snippet_ui_api = "/api/projects/{projectId}/versions/{projectVersionId}/source-trees"
 # BD version details report
 blackduck_create_version_report_api = "/api/versions/{projectVersionId}/reports"
-blackduck_version_report_filename = "./blackduck_version_report_for_{projectVersionId}.zip"
 # BD discoveries report
 blackduck_create_discoveries_report_api = "/api/versions/{projectVersionId}/license-reports"
-blackduck_discoveries_report_filename = "./blackduck_discoveries_report_for_{projectVersionId}.zip"
+# Report zip members
+VERSION_MEMBER = r"\bversion.+json\b"
+LICENSE_MEMBER = r"\bversion-license.+json\b"
 # Consolidated report
 BLACKDUCK_VERSION_MEDIATYPE = "application/vnd.blackducksoftware.status-4+json"
 BLACKDUCK_VERSION_API = "/api/current-version"
@@ -290,6 +290,7 @@ def report_create(hub_client, url, body):
 def report_download(hub_client, report_url, project_id, version_id, retry_count):
     """
     Download the generated report after the report completion. We will retry until reaching the retry-limit.
+    The report zip is returned as a ReportReader, its members are parsed straight from the archive.
     """
     retries = retry_count
     while retries:
@@ -299,11 +300,10 @@ def report_download(hub_client, report_url, project_id, version_id, retry_count)
             download_url = (((blackduck_report_download_api.replace("{projectId}", project_id))
                      .replace("{projectVersionId}", version_id))
                      .replace("{reportId}", report_id))  
-            res = hub_client.session.get(download_url, 
-                                         headers={'Content-Type': 'application/zip', 'Accept':'application/zip'})
-            if res.status_code != 200:
-                sys.exit(f"BlackDuck report download failed with status {res.status_code} for {download_url}!")
-            return res.content
+            try:
+                return ReportReader.from_url(hub_client.session, download_url)
+            except OSError as err:
+                sys.exit(f"BlackDuck report download failed for {download_url}: {err}")
         elif res.status_code != 200:
             sys.exit(f"BlackDuck report creation not completed successfully with status {res.status_code}")
         else:
@@ -322,12 +322,7 @@ def get_version_detail_report(hub_client, project_id, version_id, retries):
         'categories' : [ 'COMPONENTS', 'FILES' ]
     }
     report_url = report_create(hub_client, create_version_url, body)
-    # Zipped report content is received and write the content to a local zip file 
-    content = report_download(hub_client, report_url, project_id, version_id, retries)
-    output_file = blackduck_version_report_filename.replace("{projectVersionId}", version_id)
-    with open(output_file, "wb") as f:
-        f.write(content)
-        return output_file
+    return report_download(hub_client, report_url, project_id, version_id, retries)
 
 def get_discovery_report(hub_client, project_id, version_id, retries, copyright):
     """ Create and get discovery report for licenses and copyrights in json. """
@@ -343,11 +338,7 @@ def get_discovery_report(hub_client, project_id, version_id, retries, copyright)
     elif copyright ==2:
         body['categories'].extend(['COPYRIGHT_TEXT', 'FILE_COPYRIGHT_TEXT'])
     report_url = report_create(hub_client, create_discoveries_url, body)
-    content = report_download(hub_client, report_url, project_id, version_id, retries)
-    output_file = blackduck_discoveries_report_filename.replace("{projectVersionId}", version_id)
-    with open(output_file, "wb") as f:
-        f.write(content)
-        return output_file
+    return report_download(hub_client, report_url, project_id, version_id, retries)
     
 def get_folder_size(path="."):
     """
@@ -640,62 +631,47 @@ def generate_file_report(hub_client, project_id, version_id, codelocations, copy
         + BLACKDUCK_SNIPPET_FILTER
 
     # Report body - Component BOM, file BOM with Discoveries data
-    version_report_zip = get_version_detail_report(hub_client, project_id, version_id, retries)
-    with ZipFile(f"./{version_report_zip}", "r") as vzf:
-        vzf.extractall()
-    for i, unzipped_version in enumerate(vzf.namelist()):
-        if re.search(r"\bversion.+json\b", unzipped_version) is not None:
-            break
-        if i + 1 >= len(vzf.namelist()):
-            sys.exit(f"Version detail file not found in the downloaded report: {version_report_zip}!")
+    # Report zips are read in place, nothing is extracted to disk
+    version_report = get_version_detail_report(hub_client, project_id, version_id, retries)
+    if not version_report.names(VERSION_MEMBER):
+        sys.exit(f"Version detail file not found in the downloaded report: {version_report.names()}!")
     
     # Report body - Component BOM report
-    # Iterated json handling to reduce memory consumption. Remarks: Divided to two file-open sessions for components and files
-    # with respective file handles, because if otherwise ijson crashes!
-    with open(f"./{unzipped_version}", "r") as uvf:
-        for i, comp_bom in enumerate(ijson.items(uvf, 'aggregateBomViewEntries.item')):
-            comp_data = pull_component_bom(comp_bom)
-            report_component_bom['bomComponentEntries']['bomComponents'].append(comp_data)
-        logging.info(f"Number of the reported components {i+1}")
-        with open(REPORT_DIR + REPORT_COMPONENT_BOM + f".{format}", "w") as cmf:
-            if format == "json":
-                cmf.write(json.dumps(report_component_bom))
-            else:
-                cmf.write(json2html.convert(json = json.dumps(report_component_bom)))
-        report_content['fileInventory']['linkToBomComponentEntries'] = \
-            "file://" + os.path.abspath(REPORT_DIR + REPORT_COMPONENT_BOM + f".{format}")
+    # Iterated json handling to reduce memory consumption. Each iter_json() call streams the member anew.
+    for i, comp_bom in enumerate(version_report.iter_json('aggregateBomViewEntries.item', VERSION_MEMBER)):
+        comp_data = pull_component_bom(comp_bom)
+        report_component_bom['bomComponentEntries']['bomComponents'].append(comp_data)
+    logging.info(f"Number of the reported components {i+1}")
+    with open(REPORT_DIR + REPORT_COMPONENT_BOM + f".{format}", "w") as cmf:
+        if format == "json":
+            cmf.write(json.dumps(report_component_bom))
+        else:
+            cmf.write(json2html.convert(json = json.dumps(report_component_bom)))
+    report_content['fileInventory']['linkToBomComponentEntries'] = \
+        "file://" + os.path.abspath(REPORT_DIR + REPORT_COMPONENT_BOM + f".{format}")
 
     # Discovery data - licenses, copyrights and unmatched files - is fetched and integrated with file BOM report.
     discovery_data = {'discoveries': {'licenses': [], 'copyrights': []}}
-    discovery_report_zip = get_discovery_report(hub_client, project_id, version_id, retries, copyright_level)
-    with ZipFile(f"./{discovery_report_zip}", "r") as zlf:
-        zlf.extractall()
-    for i, unzipped_discovery in enumerate(zlf.namelist()):
-        if re.search(r"\bversion-license.+json\b", unzipped_discovery) is not None:
-            break
-        if i + 1 >= len(zlf.namelist()):
-            sys.exit(f"License file not found in downloaded report: {discovery_report_zip}!")
-    # Do not reuse TextIoWrapper for ijson to handle multiple items. If do, ijson crashes.
-    with open(f"./{unzipped_discovery}", "r") as ulf:
-        for i, comp_license in enumerate(ijson.items(ulf, 'componentLicenses.item')):
+    with get_discovery_report(hub_client, project_id, version_id, retries, copyright_level) as discovery_report:
+        if not discovery_report.names(LICENSE_MEMBER):
+            sys.exit(f"License file not found in downloaded report: {discovery_report.names()}!")
+        for i, comp_license in enumerate(discovery_report.iter_json('componentLicenses.item', LICENSE_MEMBER)):
             comp_license_data = pull_discovery_licenses(comp_license)
             discovery_data['discoveries']['licenses'].append(comp_license_data)
         logging.info(f"Number of the reported discovery licenses {i+1}")
-    if copyright_level != 0:
-        with open(f"./{unzipped_discovery}", "r") as ucf:
-            for i, comp_copyright in enumerate(ijson.items(ucf, 'componentCopyrightTexts.item')):
+        if copyright_level != 0:
+            for i, comp_copyright in enumerate(discovery_report.iter_json('componentCopyrightTexts.item', LICENSE_MEMBER)):
                 comp_copyright_data = pull_discovery_copyrights(comp_copyright)
                 discovery_data['discoveries']['copyrights'].append(comp_copyright_data)
             logging.info(f"Number of the reported discovery copyright texts {i+1}")
-    with open(f"./{unzipped_discovery}", "r") as uuf:
-        for i, comp_unmatched in enumerate(ijson.items(uuf, 'unmatchedFileData.item')):
+        for i, comp_unmatched in enumerate(discovery_report.iter_json('unmatchedFileData.item', LICENSE_MEMBER)):
             comp_unmatched_data = pull_discovery_unmatched(comp_unmatched)
             report_file_bom['bomFileEntries']['unmatchedFileDiscoveries'].append(comp_unmatched_data)
         logging.info(f"Number of the reported discovery unmatched files texts {i+1}")
         
     # Report body - Generate file BOM report. Discovery data is integrated.
-    with open(f"./{unzipped_version}", "r") as uvf:
-        for i, file_bom in enumerate(ijson.items(uvf, 'detailedFileBomViewEntries.item')):
+    with version_report:
+        for i, file_bom in enumerate(version_report.iter_json('detailedFileBomViewEntries.item', VERSION_MEMBER)):
             file_data = pull_file_bom(file_bom)
             disc_licenses = list(filter(lambda license_x:
                                         license_x['projectName'] == file_data['projectName'] and
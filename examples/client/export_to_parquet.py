@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+'''
+Copyright (C) 2023 Synopsys, Inc.
+http://www.blackducksoftware.com/
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements. See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership. The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License. You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied. See the License for the
+specific language governing permissions and limitations
+under the License.
+
+Export the projects, versions, BOM components and vulnerabilities of the portfolio to Parquet
+files (projects.parquet, versions.parquet, components.parquet and vulnerabilities.parquet), e.g.
+to load them with pandas.read_parquet() instead of building data frames row by row.
+
+Requires pyarrow: pip install blackduck[arrow]
+
+usage: export_to_parquet.py [-h] -u BASE_URL -t TOKEN_FILE [-nv] [-o OUTPUT_DIR] [-p PROJECT]
+
+options:
+  -h, --help            show this help message and exit
+  -u BASE_URL, --base-url BASE_URL
+                        Hub server URL e.g. https://your.blackduck.url
+  -t TOKEN_FILE, --token-file TOKEN_FILE
+                        containing access token
+  -nv, --no-verify      disable TLS certificate verification
+  -o OUTPUT_DIR, --output-dir OUTPUT_DIR
+                        where the Parquet files are written (default: current directory)
+  -p PROJECT, --project PROJECT
+                        only export this project
+
+'''
+import argparse
+import logging
+import os
+import sys
+
+from blackduck import Client
+from blackduck.Export import ParquetExporter
+
+BOM_MEDIA_TYPE = "application/vnd.blackducksoftware.bill-of-materials-6+json"
+
+parser = argparse.ArgumentParser("Export the portfolio to Parquet files")
+parser.add_argument("-u", "--base-url", required=True, help="Hub server URL e.g. https://your.blackduck.url")
+parser.add_argument("-t", "--token-file", required=True, help="containing access token")
+parser.add_argument("-nv", "--no-verify", dest='verify', action='store_false', help="disable TLS certificate verification")
+parser.add_argument("-o", "--output-dir", default=".", help="where the Parquet files are written (default: current directory)")
+parser.add_argument("-p", "--project", help="only export this project")
+args = parser.parse_args()
+
+logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stdout, level=logging.INFO)
+logging.getLogger("requests").setLevel(logging.WARNING)
+logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+with open(args.token_file, 'r') as tf:
+    access_token = tf.readline().strip()
+
+bd = Client(base_url=args.base_url, token=access_token, verify=args.verify)
+
+params = {'q': [f"name:{args.project}"]} if args.project else {}
+projects = [p for p in bd.get_resource('projects', params=params) if not args.project or p['name'] == args.project]
+
+
+def output(name):
+    return os.path.join(args.output_dir, f"{name}.parquet")
+
+
+with ParquetExporter(output('projects'), 'projects') as projects_export, \
+        ParquetExporter(output('versions'), 'versions') as versions_export, \
+        ParquetExporter(output('components'), 'components') as components_export, \
+        ParquetExporter(output('vulnerabilities'), 'vulnerabilities') as vulnerabilities_export:
+    projects_export.write(projects)
+    for project in projects:
+        versions = list(bd.get_resource('versions', project))
+        versions_export.write(versions, project_name=project['name'])
+        for version in versions:
+            names = {'project_name': project['name'], 'version_name': version['versionName']}
+            components_export.write(
+                bd.get_resource('components', version, page_size=1000, headers={'Accept': BOM_MEDIA_TYPE}), **names)
+            vulnerabilities_export.write(
+                bd.get_resource('vulnerable-components', version, page_size=1000, headers={'Accept': BOM_MEDIA_TYPE}), **names)
+            logging.info(f"Exported {project['name']} {version['versionName']}")
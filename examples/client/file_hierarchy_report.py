@@ -31,12 +31,11 @@ import argparse
 import csv
 import logging
 import sys
-import io
 import time
 import json
 import traceback
 from blackduck import Client
-from zipfile import ZipFile
+from blackduck.ReportReader import ReportReader
 from pprint import pprint
 
 program_description = \
@@ -110,11 +109,10 @@ def download_report(bd, location, retries, timeout):
         response = bd.session.get(location)
         report_status = response.json().get('status', 'Not Ready')
         if response.status_code == 200 and report_status == 'COMPLETED':
-            response = bd.session.get(download_link, headers={'Content-Type': 'application/zip', 'Accept':'application/zip'})
-            if response.status_code == 200:
-                return response.content
-            else:
-                logging.error("Ruh-roh, not sure what happened here")
+            try:
+                return ReportReader.from_url(bd.session, download_link)
+            except OSError as err:
+                logging.error(f"Ruh-roh, not sure what happened here: {err}")
                 return None
         else:
             logging.debug(f"Report status request {response.status_code} {report_status} ,waiting {timeout} seconds then retrying...")
@@ -272,13 +270,11 @@ def main():
         project = find_project_by_name(hub_client, args.project_name)
         version = find_project_version_by_name(hub_client, project, args.project_version_name)
         location = create_version_details_report(hub_client, version)
-        report_zip = download_report(hub_client, location, args.report_retries, args.report_timeout)
+        report = download_report(hub_client, location, args.report_retries, args.report_timeout)
         logging.debug(f"Deleting report from Black Duck {hub_client.session.delete(location)}")
-        zip=ZipFile(io.BytesIO(report_zip), "r")
-        pprint(zip.namelist())
-        report_data = {name: zip.read(name) for name in zip.namelist()}
-        filename = [i for i in report_data.keys() if i.endswith(".json")][0]
-        version_report = json.loads(report_data[filename])
+        with report:
+            pprint(report.names())
+            version_report = report.load_json()
         with open("out.json", "w") as f:
             json.dump(version_report, f)
         # TODO items
@@ -105,6 +105,8 @@ optional arguments:
 '''
 
 from blackduck import Client
+from blackduck.KnowledgeBase import KBLookup
+from blackduck.Notifications import NotificationFeed
 import argparse
 import sys
 import logging
@@ -214,41 +216,29 @@ def get_sbom_mime_type(filename):
 #
 # Returns on success. Errors are fatal.
 def poll_notifications_for_success(cl_url, proj_version_url, summaries_url):
-    retries = MAX_RETRIES
-    sleep_time = SLEEP
-
-    # Limit the query to the last 24 hours (very conservative but also
-    # keeps us from having to walk thousands of notifications every time)
-    today=datetime.now().astimezone(timezone.utc)
-    yesterday=today - timedelta(days=1)
-    start=yesterday.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-    params = {
-        'filter': ["notificationType:VERSION_BOM_CODE_LOCATION_BOM_COMPUTED"],
-        'sort'  : ["createdAt DESC"],
-        'startDate' : [start]
-    }
-
-    while (retries):
-        retries -= 1
-        for result in bd.get_items("/api/notifications", params=params):
-            if 'projectVersion' not in result['content']:
-               # Shouldn't be possible due to the filter
-               continue
-            # We're checking the entire list of notifications, but ours should
-            # be near the top.
-            if (result['content']['projectVersion'] == proj_version_url and
-              result['content']['codeLocation'] == cl_url and
-              result['content']['scanSummary'] == summaries_url):
-                print("BOM calculation complete")
-                return
-
+    # Only BOM computed notifications created since a little before the upload
+    # are requested, and each poll only asks for those newer than the last one seen
+    start = (datetime.now().astimezone(timezone.utc) - timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    feed = NotificationFeed(bd.session, types=["VERSION_BOM_CODE_LOCATION_BOM_COMPUTED"], start_date=start)
+    computed = []
+
+    @feed.handler()
+    def bom_computed(notification):
+        content = notification['content']
+        if (content.get('projectVersion') == proj_version_url and
+          content.get('codeLocation') == cl_url and
+          content.get('scanSummary') == summaries_url):
+            computed.append(notification)
+
+    for _ in range(MAX_RETRIES):
+        feed.poll()
+        if computed:
+            print("BOM calculation complete")
+            return
         print("Waiting for BOM calculation to complete")
-        # For debugging
-        #print(f"Searching Notifications for:\n Proj_version: {proj_version_url}\n" +
-        #  f" CodeLocation: {cl_url}\n Summaries: {summaries_url}")
-        time.sleep(sleep_time)
+        time.sleep(SLEEP)
 
-    logging.error(f"Failed to verify successful BOM computed in {MAX_RETRIES * sleep_time} seconds")
+    logging.error(f"Failed to verify successful BOM computed in {MAX_RETRIES * SLEEP} seconds")
     sys.exit(1)
 
 # Check if this project-version ever had a non-SBOM scan
@@ -422,15 +412,8 @@ def upload_sbom_file(filename, project, version):
 #  If match: API matching data (the "result" object)
 #  No match: None
 def find_comp_in_kb(extref):
-    params = {
-            'purl': extref
-    }
-    for result in bd.get_items("/api/search/kb-purl-component", params=params):
-        # Should be exactly 1 match when successful
-        return(result)
-
-    # Fall through -- lookup failed
-    return(None)
+    # Served from the KB lookup cache filled by prefetch_kb_matches
+    return kb.find_purl(extref)
 
 # Lookup the given BD Compononent Version in the BD KB.
 # Note: Match source will be one of: KB, CUSTOM, or KB_MODIFIED
@@ -446,9 +429,8 @@ def find_comp_in_kb(extref):
 #  No match returns None
 def find_comp_id_in_kb(comp, ver):
     kb_match = {}
-    try:
-        json_data = bd.get_json(f"/api/components/{comp}")
-    except:
+    json_data = kb.find_id(comp)
+    if not json_data:
         # No component match
         return None
     kb_match['componentName'] = json_data['name']
@@ -461,11 +443,9 @@ def find_comp_id_in_kb(comp, ver):
         kb_match['versionName'] = "UNKNOWN"
         return kb_match
 
-    # Update the component url to match the one returned by API
-    comp_url = json_data['_meta']['href']
-    try:
-        json_data = bd.get_json(f"{comp_url}/versions/{ver}")
-    except:
+    # The version is looked up under the component url returned by the API
+    json_data = kb.find_id(comp, ver)
+    if not json_data:
         # No component version match
         return None
     kb_match['versionName'] = json_data['versionName']
@@ -475,6 +455,26 @@ def find_comp_id_in_kb(comp, ver):
 
     return kb_match
 
+# Look up the pURLs and BD component IDs of all packages in one batch.
+# Identical lookups are made once and the distinct ones run concurrently,
+# find_comp_in_kb and find_comp_id_in_kb are then answered from the cache.
+def prefetch_kb_matches(document):
+    purls = []
+    ids = []
+    for package in document.packages:
+        extrefs = {}
+        for ref in package.external_references:
+            extrefs[ref.reference_type.lstrip("LocationRef-")] = ref.locator
+        if "BlackDuck-Component" in extrefs:
+            compid = normalize_id(extrefs['BlackDuck-Component'])
+            ids.append((compid, None))
+            if "BlackDuck-ComponentVersion" in extrefs:
+                ids.append((compid, normalize_id(extrefs['BlackDuck-ComponentVersion'])))
+        if "purl" in extrefs:
+            purls.append(extrefs['purl'])
+    kb.find_ids(ids)
+    kb.find_purls(purls)
+
 # Locate component name + version in component-import-events
 # Returns matched name+version on success, None on failure
 def find_comp_import_events(match_dict, compname, compver):
@@ -731,6 +731,8 @@ def import_sbom(bdobj, projname, vername, spdxfile, outfile=None, \
 
     global bd
     bd = bdobj
+    global kb
+    kb = KBLookup(bd.session)
 
     if (Path(spdxfile).is_file()):
         document = spdx_parse(spdxfile)
@@ -779,6 +781,8 @@ def import_sbom(bdobj, projname, vername, spdxfile, outfile=None, \
     # Saved component data to write to file
     comps_out = []
 
+    prefetch_kb_matches(document)
+
     # Walk through each component in the SPDX file
     for package in document.packages:
         package_count += 1
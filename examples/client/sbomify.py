@@ -55,13 +55,13 @@ Black Duck examples collection
 
 '''
 import argparse
-import io
 import json
 import sys
 import logging
-import time
+import tempfile
 
-from zipfile import ZipFile
+from blackduck.ReportManager import ReportManager
+from blackduck.ReportReader import ReportReader
 from blackduck import Client
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
@@ -143,58 +143,23 @@ def locate_project_version(bd, project_name, version_name, group="Black Duck Pro
             version = find_project_version_by_name(bd, project, version_name)
     return version
 
-def create_sbom_report(bd, version, type, include_subprojects):
-    post_data = {
-            'reportFormat': "JSON",
-            'sbomType': type,
-            'includeSubprojects': include_subprojects	
-    }
-    sbom_reports_url = version['_meta']['href'] + "/sbom-reports"
-
-    bd.session.headers["Content-Type"] = "application/vnd.blackducksoftware.report-4+json"
-    r = bd.session.post(sbom_reports_url, json=post_data)
-    if (r.status_code == 403):
-        logging.debug("Authorization Error - Please ensure the token you are using has write permissions!")
-    r.raise_for_status()
-    location = r.headers.get('Location')
-    assert location, "Hmm, this does not make sense. If we successfully created a report then there needs to be a location where we can get it from"
-    return location
-
-def download_report(bd, location, retries):
-    report_id = location.split("/")[-1]
-    if retries:
-        logging.debug(f"Retrieving generated report from {location}")
-        response = bd.session.get(location)
-        report_status = response.json().get('status', 'Not Ready')
-        if response.status_code == 200 and report_status == 'COMPLETED':
-            response = bd.session.get(location + "/download.zip", headers={'Content-Type': 'application/zip', 'Accept':'application/zip'})
-            if response.status_code == 200:
-                return response.content
-            else:
-                logging.error("Ruh-roh, not sure what happened here")
-                return None
-        else:
-            logging.debug(f"Report status request {response.status_code} {report_status} ,waiting {retries} seconds then retrying...")
-            time.sleep(60)
-            retries -= 1
-            return download_report(bd, location, retries)
-    else:
-        logging.debug(f"Failed to retrieve report {report_id} after multiple retries")
-        return None
-
 def produce_online_sbom_report(bd, project_name, project_version_name, sbom_type):
     project = find_project_by_name(bd, project_name)
     logging.debug(f"Project {project['name']} located")
     version = find_project_version_by_name(bd, project, project_version_name)
     logging.debug(f"Version {version['versionName']} located")
-    location = create_sbom_report(bd, version, sbom_type, True)
-    logging.debug(f"Created SBOM report of type {sbom_type} for project {project_name}, version {project_version_name} at location {location}")
-    sbom_data_zip = download_report(bd, location, 60)
-    logging.debug(f"Deleting report from Black Duck {bd.session.delete(location)}")
-    zip=ZipFile(io.BytesIO(sbom_data_zip), "r")
-    sbom_data = {name: zip.read(name) for name in zip.namelist()}
-    filename = [i for i in sbom_data.keys() if i.endswith(".json")][0]
-    return json.loads(sbom_data[filename])
+    bd.session.headers["Content-Type"] = "application/vnd.blackducksoftware.report-4+json"
+    with tempfile.TemporaryDirectory() as output_folder:
+        manager = ReportManager(bd.session, poll_interval=10, output_folder=output_folder)
+        request = manager.add_sbom_report(version, sbom_type=sbom_type, include_subprojects=True, filename="sbom.zip")
+        manager.run()
+        if request['location']:
+            logging.debug(f"Deleting report from Black Duck {bd.session.delete(request['location'])}")
+        if request['status'] != 'COMPLETED':
+            logging.error(f"SBOM report of type {sbom_type} for project {project_name}, version {project_version_name} {request['status']}: {request['error']}")
+            sys.exit(1)
+        with ReportReader(request['pathname']) as sbom_report:
+            return sbom_report.load_json()
 
 def upload_sbom_file(bd, project_name, version_name, sbom_data):
     if sbom_data.get('bomFormat', None) == "CycloneDX":
@@ -24,12 +24,12 @@ KIND, either express or implied. See the License for the
 specific language governing permissions and limitations
 under the License.
 
-usage: upload_bdio [-h] -u BASE_URL -t TOKEN_FILE [-nv] filename
+usage: upload_bdio [-h] -u BASE_URL -t TOKEN_FILE [-nv] [-w MAX_WORKERS] filenames [filenames ...]
 
-Uploads BDIO file to a Blackduck server
+Uploads BDIO files to a Blackduck server
 
 positional arguments:
-  filename              BDIO file to upload
+  filenames             BDIO file(s) to upload
 
 optional arguments:
   -h, --help            show this help message and exit
@@ -38,6 +38,8 @@ optional arguments:
   -t TOKEN_FILE, --token-file TOKEN_FILE
                         File containing access token
   -nv, --no-verify      Disable TLS certificate verification
+  -w MAX_WORKERS, --max-workers MAX_WORKERS
+                        Number of concurrent uploads
 
 Blackduck examples collection
 
@@ -49,6 +51,7 @@ import argparse
 import logging
 
 from blackduck import Client
+from blackduck.Transfers import ScanUploader
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -62,17 +65,17 @@ def main():
        access_token = tf.readline().strip()
     global bd
     bd = Client(base_url=args.base_url, token=access_token, verify=args.no_verify, timeout=60.0, retries=4)
-    files = {"file": open(args.filename,"rb")}
-    response = bd.session.post("/api/scan/data", files = files)
-    logging.info(response)
-    logging.info(response.headers)
+    uploader = ScanUploader(bd.session, max_workers=args.max_workers)
+    results = uploader.upload_all(args.filenames, progress=lambda r: logging.info(f"{r['filename']}: {r['status']} ({r['status_code']}) in {r['seconds']:.1f}s"))
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
 
 def parse_command_args():
     parser = argparse.ArgumentParser(prog = "upload_bdio", description="Uploads BDIO file to a Blackduck server", epilog="Blackduck examples collection")
-    parser.add_argument("filename", help="BDIO file to upload")
+    parser.add_argument("filenames", nargs='+', help="BDIO file(s) to upload")
     parser.add_argument("-u", "--base-url",     required=True, help="Hub server URL e.g. https://your.blackduck.url")
     parser.add_argument("-t", "--token-file",   required=True, help="File containing access token")
     parser.add_argument("-nv", "--no-verify",     action='store_false', help="Disable TLS certificate verification")
+    parser.add_argument("-w", "--max-workers",  type=int, default=4, help="Number of concurrent uploads")
     return parser.parse_args()
 
 
@@ -53,6 +53,7 @@ import argparse
 import logging
 
 from blackduck import Client
+from blackduck.Transfers import ScanUploader
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -146,12 +147,15 @@ def upload_sbom_file(filename, project, version, project_group):
         logging.error(f"Could not identify file content for {filename}")
         sys.exit(1)
     logging.info(f"Mime type {mime_type} will be used for file {filename}")
-    files = {"file": (filename, open(filename,"rb"), mime_type)}
     fields = {"projectName": project, "versionName": version}
-    response = bd.session.post("/api/scan/data", files = files, data=fields)
-    logging.info(response)
-    if response.status_code == 409:
+    # streams the file rather than reading it into memory, and retries on transient errors
+    result = ScanUploader(bd.session).upload(filename, fields=fields, mime_type=mime_type)
+    logging.info(f"Upload {result['status']} (status code {result['status_code']})")
+    if result['status_code'] == 409:
         logging.info(f"File {filename} is already mapped to a different project version")
+    elif result['status'] == 'failed':
+        logging.error(f"Could not upload {filename}: {result['error'] or result['status_code']}")
+        sys.exit(1)
 
 def main():
     args = parse_command_args()
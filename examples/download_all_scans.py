@@ -1,12 +1,14 @@
 import argparse
 import json
 import logging
+import os
 import sys
 from datetime import timedelta
 from pprint import pprint
 
 import arrow
 from blackduck import Client
+from blackduck.Transfers import ScanDownloader
 from blackduck.Utils import get_resource_name
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.DEBUG)
@@ -15,13 +17,12 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("blackduck").setLevel(logging.DEBUG)
 
 def main():
-    upstream_copyright_data_file='copyright_data.txt'
-
-    parser = argparse.ArgumentParser("Enumerate BOM componets without copyrigth statements. retrieve copyright statements form upstream channel and/or version")
+    parser = argparse.ArgumentParser("Download the scan data (BDIO) of every codelocation mapped to a project version")
     parser.add_argument("-u", "--base-url", required=True, help="Hub server URL e.g. https://your.blackduck.url")
     parser.add_argument("-t", "--token-file", dest='token_file', required=True, help="containing access token")
     parser.add_argument("-nv", "--no-verify", dest='verify', action='store_false', help="disable TLS certificate verification")
-    parser.add_argument("-o", "--outputdir", dest='outputdir', default='outdir', help="disable TLS certificate verification")
+    parser.add_argument("-o", "--outputdir", dest='outputdir', default='outdir', help="folder to download the scans into")
+    parser.add_argument("-w", "--max-workers", dest='max_workers', type=int, default=4, help="number of concurrent downloads")
     args = parser.parse_args()
 
     with open(args.token_file, 'r') as tf:
@@ -29,31 +30,20 @@ def main():
 
     global bd
     bd = Client(base_url=args.base_url, token=access_token, verify=args.verify, timeout = 60.0)
-    outdir=None
-    if args.outputdir:
-        outdir = args.outputdir
-    import os
-    if not os.path.exists(outdir):
-        os.mkdir(outdir)
-    projects = bd.get_resource('projects')
-    for project in projects:
-        versions = bd.get_resource('versions',project)
-        for version in versions:
-            codelocations = bd.get_resource('codelocations', version)
-            for codelocation in codelocations:
-                resources = bd.list_resources(codelocation)
-                url = resources['scan-data']
-                filename = url.split('/')[6]
-                response = bd.session.get(url, stream=True, verify=False)
-                print (response.status_code)
-                print (response.ok)
-                print (url)
-                if response.ok:
-                    pathname = os.path.join(outdir, filename)
-                    with open(pathname, "wb") as f:
-                        for data in response.iter_content():
-                            f.write(data)
-                    print(f"{filename}, {pathname}")
+    outdir = args.outputdir
+
+    def scan_data_jobs():
+        for project in bd.get_resource('projects'):
+            for version in bd.get_resource('versions',project):
+                for codelocation in bd.get_resource('codelocations', version):
+                    url = bd.list_resources(codelocation)['scan-data']
+                    filename = url.split('/')[6]
+                    yield url, os.path.join(outdir, filename)
+
+    # Resumes partial downloads and skips files already downloaded by a previous run
+    downloader = ScanDownloader(bd.session, max_workers=args.max_workers)
+    results = downloader.download_all(scan_data_jobs(), progress=lambda r: print(f"{r['status']}: {r['url']} -> {r['pathname']}"))
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -9,9 +9,7 @@ Generate CSV reports for a given project-version
 from blackduck.HubRestApi import HubInstance
 
 import argparse
-import json
 import logging
-import time
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -51,25 +49,6 @@ hub = HubInstance()
 class FailedReportDownload(Exception):
 	pass
 
-def download_report(location, filename, retries=args.tries):
-	report_id = location.split("/")[-1]
-
-	if retries:
-		print("Retrieving generated report from {}".format(location))
-		response = hub.download_report(report_id)
-		if response.status_code == 200:
-			with open(filename, "wb") as f:
-				f.write(response.content)
-			print("Successfully downloaded zip file to {} for report {}".format(filename, report_id))
-		else:
-			print("Failed to retrieve report {}".format(report_id))
-			print("Probably not ready yet, waiting 5 seconds then retrying...")
-			time.sleep(args.sleep_time)
-			retries -= 1
-			download_report(location, filename, retries)
-	else:
-		raise FailedReportDownload("Failed to retrieve report {} after multiple retries".format(report_id))
-
 project = hub.get_project_by_name(args.project_name)
 
 if project:
@@ -78,15 +57,17 @@ if project:
 
 	reports_l = args.reports.split(",")
 	reports_l = [version_name_map[r.lower()] for r in reports_l]
-	response = hub.create_version_reports(version, reports_l, args.format)
 
-	if response.status_code == 201:
-		print("Successfully created reports ({}) for project {} and version {}".format(
-			args.reports, args.project_name, args.version_name))
-		location = response.headers['Location']
-		download_report(location, args.zip_file_name)
+	# the report is polled with a doubling interval, starting at sleep_time, and given up on after tries polls
+	manager = hub.get_report_manager(poll_interval=args.sleep_time, timeout=args.sleep_time * (2 ** args.tries - 1))
+	request = manager.add_version_report(version, reports_l, args.format, filename=args.zip_file_name)
+	manager.run()
+
+	if request['status'] == 'COMPLETED':
+		print("Successfully downloaded zip file with reports ({}) for project {} and version {} to {}".format(
+			args.reports, args.project_name, args.version_name, request['pathname']))
 	else:
-		print("Failed to create reports for project {} version {}, status code returned {}".format(
-			args.project_name, args.version_name, response.status_code))
+		raise FailedReportDownload("Failed to create or retrieve reports for project {} version {}: {} {}".format(
+			args.project_name, args.version_name, request['status'], request['error']))
 else:
 	print("Did not find project with name {}".format(args.project_name))
\ No newline at end of file
@@ -12,34 +12,36 @@ Script designed to generate and collate Source reports for the master project an
 If a project has source but also sub projects with source that also have sub projects with source this utility will
 generate source reports for each level of project and combine to a consolidated source report.  It will also generate
 security and components reports for the master project (these automatically include subprojects).  It will output the 
-results to a ./results folder and uses ./temp for work in progress.  These can be modified in the below checkdirs, unzip
-and concat functions.  If you are finding the reports are not generated in time by default it will wait 5 seconds and 
-retry 10 times, if this is not long enough as your projects are large then increase the retries_per_download variable.
+results to a ./results folder, which can be modified in the below checkdirs and concat functions.  The downloaded report
+zips are read in place, nothing is extracted to disk.  If you are finding the reports are not generated in time by default
+it will wait 5 seconds and retry 10 times, if this is not long enough as your projects are large then increase the
+retries_per_download variable.
 
 To run this script, you will need to pass arguments for the master project name and the master project version.  Once
 they are specified, the script will investigate to see if the master project contains sub-projects and will generate
 reports for all sub-projects it discovers. Finally, it will combine them into a single report, saving it to a "results"
 sub-directory.
 
-For this script to run, the hub-rest-api-python (blackduck) library and pandas library will need to be installed.
+For this script to run, the hub-rest-api-python (blackduck) library will need to be installed.
 
 """
 
 import argparse
 from blackduck.HubRestApi import HubInstance
+from blackduck.ReportReader import ReportReader
 import time
-from zipfile import ZipFile
+import csv
+import re
 import shutil
 import os
-import glob
-import pandas
 
 parser = argparse.ArgumentParser("A program to create consolidated Source report for sub projects")
 parser.add_argument("project_name")
 parser.add_argument("version_name")
 args = parser.parse_args()
 hub = HubInstance()
-csv_list = []
+session = hub.get_session()
+writer = None
 timestamp = time.strftime('%m_%d_%Y_%H_%M')
 retries_per_download=10
 file_out = (args.project_name + '_' + "Consolidated_src_report-" + timestamp)
@@ -50,34 +52,30 @@ class FailedReportDownload(Exception):
     pass
 
 
-def download_report(location, filename, retries=retries_per_download):
+def download_report(location, retries=retries_per_download):
     report_id = location.split("/")[-1]
 
     if retries:
         print("Retrieving generated report from {}".format(location))
-        response = hub.download_report(report_id)
-        if response.status_code == 200:
-            with open(filename, "wb") as f:
-                f.write(response.content)
-
-            print("Successfully downloaded zip file to {} for report {}".format(filename, report_id))
-        else:
+        try:
+            report = ReportReader.from_url(session, hub.get_urlbase() + "/api/reports/{}".format(report_id))
+        except OSError:
             print("Failed to retrieve report {}".format(report_id))
             print("Probably not ready yet, waiting 5 seconds then retrying...")
             time.sleep(5)
             retries -= 1
-            download_report(location, filename, retries)
+            return download_report(location, retries)
+        print("Successfully downloaded report {}".format(report_id))
+        return report
     else:
         raise FailedReportDownload("Failed to retrieve report {} after multiple retries".format(report_id))
 
-def genreportsforversion(projectname,versionname,reportlist):
+def genreportsforversion(projectname,versionname,reportlist,out):
     print("Generating source report for project {} version {}".format(projectname, versionname))
 
     projversion = hub.get_project_version_by_name(projectname, versionname)
     components = hub.get_version_components(projversion)
 
-    subname = (projectname + '_' + versionname + '.zip')
-
     # Generates reports in the main project for SECURITY, COMPONENTS and FILES (source) report and just FILES for subprojects.
     result = hub.create_version_reports(version=projversion, report_list=reportlist, format="CSV")
     
@@ -86,7 +84,8 @@ def genreportsforversion(projectname,versionname,reportlist):
         print("Successfully created reports ({}) for project {} and version {}".format(
             reportlist, projectname, versionname))
         location = result.headers['Location']
-        download_report(location, subname)
+        with download_report(location) as report:
+            concat(report, out)
     else:
         print("Failed to create reports for project {} version {}, status code returned {}".format(
         projectname, versionname, result.status_code))
@@ -95,17 +94,12 @@ def genreportsforversion(projectname,versionname,reportlist):
         # NOTE THIS REQUIRES pip blackduck 0.0.56 to have the correct request header to obtain the componentType attribute.
         if component['componentType'] == 'SUB_PROJECT':
             print("is subproject, {} version {}".format(component['componentName'],component['componentVersionName']))
-            genreportsforversion(component['componentName'],component['componentVersionName'],reportlist=['FILES'])
+            genreportsforversion(component['componentName'],component['componentVersionName'],reportlist=['FILES'],out=out)
         else:
             print('is OSS component, no report to download')
 
 
 def checkdirs():
-    if os.path.isdir('./temp') == False:
-        os.makedirs('./temp')
-        print('made temp directory')
-    else:
-        print('temp directory already exists')
     if os.path.isdir('./results') == False:
         os.makedirs('./results')
         print('made results directory')
@@ -113,42 +107,24 @@ def checkdirs():
         print('results directory already exists')
 
 
-def unzip():
-    for filename in os.listdir("."):
-        if filename.endswith(".zip"):
-            shutil.move(filename, './temp/')
-    curdir = (os.getcwd() + './temp/')
-    os.chdir(curdir)
-    for zipfile in os.listdir(curdir):
-        with ZipFile(zipfile, 'r') as zipObj:
-            zipObj.extractall()
-
-
-def concat():
-    for csv in glob.iglob('**/source*.csv'):
-        csv_list.append(csv)
-    consolidated = pandas.concat([pandas.read_csv(csv) for csv in csv_list])
-    consolidated.to_csv(file_out, index=False, encoding="utf-8")
-    shutil.move(file_out, '../results/')
-
-    for csv in glob.iglob('**/components*.csv'):
-        shutil.move(csv, '../results/')
-    for csv in glob.iglob('**/security*.csv'):
-        shutil.move(csv, '../results/')
-
-    # If you do not want the original source reports for each project exclude this loop.
-    #for csv in glob.iglob('**/source*.csv'):
-    #    shutil.move(csv, '../results/')
+def concat(report, out):
+    # Source report rows are appended to the consolidated report as they are read from the zip
+    global writer
+    for row in report.iter_csv(r'source.*\.csv$'):
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=list(row.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
 
-    # Clean up after    
-    shutil.rmtree('../temp', ignore_errors=True)
+    for name in report.names(r'(components|security).*\.csv$'):
+        with report.open(re.escape(name) + '$') as member, open(os.path.join('./results', os.path.basename(name)), 'wb') as f:
+            shutil.copyfileobj(member, f)
 
 
 def main():
     checkdirs()
-    genreportsforversion(args.project_name, args.version_name,reportlist=['FILES','COMPONENTS','SECURITY'])
-    unzip()
-    concat()
+    with open(os.path.join('./results', file_out), 'w', newline='', encoding='utf-8') as out:
+        genreportsforversion(args.project_name, args.version_name,reportlist=['FILES','COMPONENTS','SECURITY'],out=out)
 
 
 main()
@@ -11,11 +11,15 @@ from blackduck.HubRestApi import HubInstance
 parser = argparse.ArgumentParser("Retreive BOM component license information for the given project and version")
 parser.add_argument("project_name")
 parser.add_argument("version")
+parser.add_argument("--license-cache", help="Folder in which license texts are kept across runs")
 
 args = parser.parse_args()
 
 
 hub = HubInstance()
+# one paged pass over the license catalogue, after which each license text is fetched at most once
+hub.prefetch_licenses()
+hub.set_license_cache(folder=args.license_cache)
 
 project = hub.get_project_by_name(args.project_name)
 version = hub.get_version_by_name(project, args.version)
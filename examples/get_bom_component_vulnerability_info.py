@@ -85,6 +85,13 @@ cve_records = set()
 
 
 if args.nodetails==False:
+    # Many components share the same vulnerabilities, retrieve the details of each one once
+    vuln_details_by_name = hub.get_vulnerabilities_bulk(
+        [v['vulnerabilityWithRemediation']['vulnerabilityName'] for v in vulnerable_bom_components])
+    related_vuln_names = [hub.get_link(d, "related-vulnerability").split("/")[-1]
+        for d in vuln_details_by_name.values() if d and hub.get_link(d, "related-vulnerability")]
+    vuln_details_by_name.update(hub.get_vulnerabilities_bulk(related_vuln_names))
+
     for i, vuln in enumerate(vulnerable_bom_components):
         source = vuln['vulnerabilityWithRemediation']['source']
         vuln_name = vuln['vulnerabilityWithRemediation']['vulnerabilityName']
@@ -97,9 +104,7 @@ if args.nodetails==False:
         vuln['update_guidance'] = update_guidance_results
 
         logging.debug("Retrieving additional details regarding vuln {}, i={}".format(vuln_name, i))
-        vuln_url = hub.get_apibase() + "/vulnerabilities/{}".format(vuln_name)
-        vuln_details_response = hub.execute_get(vuln_url, custom_headers={'Accept': 'application/json'})
-        vuln_details = vuln_details_response.json()
+        vuln_details = vuln_details_by_name[vuln_name] or {}
 
         vuln['additional_vuln_info'] = vuln_details
 
@@ -109,9 +114,8 @@ if args.nodetails==False:
             # get related vulnerability info, i.e. CVE
             # note: not all BDSA records will have a corresponding CVE record
             cve_url = hub.get_link(vuln_details, "related-vulnerability")
-            if cve_url:
-                cve_details_response = hub.execute_get(cve_url, custom_headers={'Accept': 'application/json'})
-                cve_details = cve_details_response.json()
+            if cve_url and vuln_details_by_name.get(cve_url.split("/")[-1]):
+                cve_details = vuln_details_by_name[cve_url.split("/")[-1]]
                 vuln['related_vulnerability'] = cve_details
                 cve_records.add(cve_details['name'])
         elif source == "NVD":
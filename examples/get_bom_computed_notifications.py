@@ -12,8 +12,6 @@ the notifications that can be received.
 
 '''
 
-# TODO: Use startDate filter on /api/notifications to limit the notifications retrieved when using -n
-
 import argparse
 from datetime import datetime
 import json
@@ -28,8 +26,8 @@ from blackduck.HubRestApi import HubInstance, object_id
 
 
 parser = argparse.ArgumentParser("Retreive BOM computed notifications")
-parser.add_argument("project", help="The name of the project")
-parser.add_argument("version", help="The name of the version")
+parser.add_argument("project", nargs='?', help="If supplied (with a version), filter the notifications to this project")
+parser.add_argument("version", nargs='?', help="If supplied, filter the notifications to this version of the project")
 parser.add_argument("-n", "--newer_than", 
     default=None, 
     type=str,
@@ -37,14 +35,16 @@ parser.add_argument("-n", "--newer_than",
 parser.add_argument("-d", "--save_dt", 
     action='store_true', 
     help="If set, the date/time will be saved to a file named '.last_run' in the current directory which can be used later with the -n option to see vulnerabilities published since the last run.")
-parser.add_argument("-l", "--limit", default=100000, help="To change the limit on the number of notifications to retrieve")
+parser.add_argument("-l", "--limit", type=int, default=1000, help="The number of notifications retrieved per request")
 parser.add_argument("-s", "--system", action='store_true', help="Pull notifications from the system as opposed to the user's account")
+parser.add_argument("-c", "--cursor_file",
+    help="If set, only the notifications newer than the ones retrieved by the last run using the same file are retrieved")
 args = parser.parse_args()
 
 if args.newer_than:
     newer_than = timestring.Date(args.newer_than).date
     # adjust to UTC so the comparison is normalized
-    newer_than = newer_than.astimezone(pytz.utc)
+    newer_than = newer_than.astimezone(pytz.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 else:
     newer_than = None
 
@@ -58,29 +58,28 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 hub = HubInstance()
 current_user = hub.get_current_user()
-version = hub.get_project_version_by_name(args.project, args.version)
-version_url = version['_meta']['href']
 
-# Construct the URL to either pull from the system or user account scope,
-# and then narrow the search to only include BOM computed notifications
+# Construct the URL to either pull from the system or user account scope
 if args.system:
     notifications_url = "{}/api/notifications".format(hub.get_urlbase())
 else:
     notifications_url = hub.get_link(current_user, "notifications")
 
-notifications_url = "{}?limit={}&filter=notificationType:VERSION_BOM_CODE_LOCATION_BOM_COMPUTED".format(
-    notifications_url, args.limit)
-
-if newer_than:
-    # add to the URL to include startDate
-    start_date = newer_than.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-    notifications_url += "&startDate=" + start_date
-
-logging.debug(f"Retrieving BOM computed notifications using {notifications_url}")
-bom_computed_notifications = hub.execute_get(notifications_url).json().get('items', [])
-
-# filter to include only those notification pertaining to the specified project, version
-bom_computed_notifications = list(
-    filter(lambda n: version_url == n['content']['projectVersion'], bom_computed_notifications))
+# only BOM computed notifications since the start date are retrieved, and with a cursor file
+# only those not seen by the previous run
+feed = hub.get_notification_feed(
+    url=notifications_url, types=['VERSION_BOM_CODE_LOCATION_BOM_COMPUTED'], start_date=newer_than,
+    state_file=args.cursor_file, page_size=args.limit)
+bom_computed_notifications = []
+feed.add_handler(bom_computed_notifications.append)
+feed.poll()
+logging.debug("Retrieved {} BOM computed notifications".format(len(bom_computed_notifications)))
+
+if args.project and args.version:
+    # filter to include only those notification pertaining to the specified project, version
+    version = hub.get_project_version_by_name(args.project, args.version)
+    version_url = version['_meta']['href']
+    bom_computed_notifications = list(
+        filter(lambda n: version_url == n['content']['projectVersion'], bom_computed_notifications))
 
 print(json.dumps(bom_computed_notifications))
@@ -31,7 +31,7 @@ from blackduck.HubRestApi import HubInstance, object_id
 
 parser = argparse.ArgumentParser("Get custom field value from a project version")
 parser.add_argument("project")
-parser.add_argument("version")
+parser.add_argument("version", help="Version name, or '*' to read the field from every version of the project")
 parser.add_argument("field_label")
 args = parser.parse_args()
 
@@ -43,6 +43,14 @@ logging.getLogger("blackduck").setLevel(logging.WARNING)
 
 hub = HubInstance()
 
+if args.version == '*':
+    project = hub.get_project_by_name(args.project)
+    versions = hub.get_project_versions(project, limit=9999).get('items', [])
+    table = hub.get_cf_values_bulk(versions, labels=[args.field_label])
+    for version, row in zip(versions, table):
+        print(f"{args.project}-{version['versionName']}: {row[args.field_label]}")
+    sys.exit()
+
 project_version = hub.get_project_version_by_name(args.project, args.version)
 custom_fields_url = hub.get_link(project_version, "custom-fields")
 custom_fields = hub.execute_get(custom_fields_url).json().get('items', [])
@@ -6,6 +6,7 @@ import logging
 import sys
 
 from blackduck.HubRestApi import HubInstance, object_id
+from blackduck.Journal import JournalStore
 
 journal_filters = [
     "journalObjectType", 
@@ -30,11 +31,18 @@ journal_actions = [
 #
 #   python examples/get_journal_events.py protex_tutorial -v 1.0 -f journalAction:component_added -f journalAction:component_deleted > journal_comp_adds_deletes.json
 #
+#   Keep a local copy of the project's journals (only new events are read on each run) and query it,
+#
+#   python examples/get_journal_events.py protex_tutorial -s journal.db -a "Policy Override" --since 2024-07-01 > overrides.json
+#
 
 parser = argparse.ArgumentParser("Retreive journal events for projects or project-versions")
 parser.add_argument("project")
 parser.add_argument("-v", "--version")
 parser.add_argument("-f", "--filter", nargs='+', action='append', help=f"Use the following filter keys to narrow the events returned ({journal_filters}). Specify the filter in the format filterKey:filterValue. ")
+parser.add_argument("-s", "--store", help="Sync the journals of the project and its versions into this SQLite file and query it instead")
+parser.add_argument("-a", "--action", help="With --store, the journal action to select, e.g. 'Policy Override'")
+parser.add_argument("--since", help="With --store, select the events from this ISO-8601 date on")
 
 # TODO: Add a check on the journalFilterKey:journalFilterValue
 
@@ -47,6 +55,14 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 hub = HubInstance()
 
 project_or_version = hub.get_project_by_name(args.project)
+
+if args.store:
+    with JournalStore(args.store) as store:
+        hub.get_journal_sync(store).sync_projects([project_or_version])
+        events = store.query(action=args.action, project_name=args.project, version_name=args.version, since=args.since)
+    print(json.dumps([e['event'] for e in events]))
+    sys.exit(0)
+
 journal_url = hub.get_link(project_or_version, "project-journal")
 if args.version:
     version = hub.get_project_version_by_name(args.project, args.version)
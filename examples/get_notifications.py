@@ -37,6 +37,9 @@ from blackduck.HubRestApi import HubInstance, object_id
 #
 #   To get policy rule violations and policy override notifications, since a given date/time,
 #       python3 examples/get_notifications.py -n "May 17, 2020" -t RULE_VIOLATION POLICY_OVERRIDE > notifications.json
+#
+#   To poll for new policy rule violations, each run retrieving only those newer than the previous run,
+#       python3 examples/get_notifications.py -c .notifications_cursor > new_notifications.json
 
 ALL_NOTIFICATION_TYPES = [
     'RULE_VIOLATION', 
@@ -57,15 +60,17 @@ parser.add_argument("-n", "--newer_than",
 parser.add_argument("-d", "--save_dt", 
     action='store_true', 
     help="If set, the date/time will be saved to a file named '.last_run' in the current directory which can be used later with the -n option to see vulnerabilities published since the last run.")
-parser.add_argument("-l", "--limit", default=100000, help="To change the limit on the number of notifications to retrieve")
+parser.add_argument("-l", "--limit", type=int, default=1000, help="The number of notifications retrieved per request")
 parser.add_argument("-s", "--system", action='store_true', help="Pull notifications from the system as opposed to the user's account")
 parser.add_argument("-t", "--types", nargs='+', default=['RULE_VIOLATION'], help="A list of notification types you want to retrieve")
+parser.add_argument("-c", "--cursor_file",
+    help="If set, only the notifications newer than the ones retrieved by the last run using the same file are retrieved")
 args = parser.parse_args()
 
 if args.newer_than:
     newer_than = timestring.Date(args.newer_than).date
     # adjust to UTC so the comparison is normalized
-    newer_than = newer_than.astimezone(pytz.utc)
+    newer_than = newer_than.astimezone(pytz.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 else:
     newer_than = None
 
@@ -85,24 +90,14 @@ if args.system:
 else:
     notifications_url = hub.get_link(current_user, "notifications")
 
-notifications_url = "{}?limit={}".format(notifications_url, args.limit)
-
+# the types and start date are filtered by the server, and with a cursor file only
+# the notifications not seen by the previous run are retrieved
+feed = hub.get_notification_feed(
+    url=notifications_url, types=args.types, start_date=newer_than, state_file=args.cursor_file, page_size=args.limit)
 filtered_notifications = []
-
-notifications = hub.execute_get(notifications_url).json().get('items', [])
-
-logging.debug("Total of {} notifications retrieved".format(len(notifications)))
-filtered_notifications = list(filter(lambda n: n['type'] in args.types, notifications))
-logging.debug("After filtering for notification types ({}) we are left with {} notifications".format(
-    args.types, len(filtered_notifications)))
-
-if newer_than:
-    logging.debug("Filtering {} notifications to only include those after {}".format(
-        len(filtered_notifications), newer_than))
-    filtered_notifications = list(
-        filter(lambda n: timestring.Date(n['createdAt']) > newer_than, filtered_notifications))
-    logging.debug("{} notifications after filtering for those after {}".format(
-        len(filtered_notifications), newer_than))
+feed.add_handler(filtered_notifications.append)
+feed.poll()
+logging.debug("Retrieved {} notifications of types {}".format(len(filtered_notifications), args.types))
 
 if args.project:
     filtered_notifications = list(
@@ -45,6 +45,9 @@ from blackduck.HubRestApi import HubInstance, object_id
 #   To get all the vulnerability notices for a given project and version,
 #       python examples/get_vulnerability_notifications.py -p my-project -v 1.0 > all_vuln_notifications_for_my_project_v1.0.json
 #
+#   To poll for new vulnerability notices, each run retrieving only those newer than the previous run,
+#       python examples/get_vulnerability_notifications.py -c .vuln_notifications_cursor > new_vuln_notifications.json
+#
 #
 
 
@@ -58,15 +61,17 @@ parser.add_argument("-n", "--newer_than",
 parser.add_argument("-d", "--save_dt", 
     action='store_true', 
     help="If set, the date/time will be saved to a file named '.last_run' in the current directory which can be used later with the -n option to see vulnerabilities published since the last run.")
-parser.add_argument("-l", "--limit", default=100000, help="To change the limit on the number of notifications to retrieve")
+parser.add_argument("-l", "--limit", type=int, default=1000, help="The number of notifications retrieved per request")
 parser.add_argument("-s", "--system", action='store_true', help="Pull notifications from the system as opposed to the user's account")
 parser.add_argument("-t", "--table_output", action='store_true', help="Produce a tabular output rather than JSON-formatted output")
+parser.add_argument("-c", "--cursor_file",
+    help="If set, only the notifications newer than the ones retrieved by the last run using the same file are retrieved")
 args = parser.parse_args()
 
 if args.newer_than:
     newer_than = timestring.Date(args.newer_than).date
     # adjust to UTC so the comparison is normalized
-    newer_than = newer_than.astimezone(pytz.utc)
+    newer_than = newer_than.astimezone(pytz.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 else:
     newer_than = None
 
@@ -86,32 +91,23 @@ if args.system:
 else:
     notifications_url = hub.get_link(current_user, "notifications")
 
-notifications_url = "{}?limit={}".format(notifications_url, args.limit)
-
+# the type and start date are filtered by the server, and with a cursor file only
+# the notifications not seen by the previous run are retrieved
+feed = hub.get_notification_feed(
+    url=notifications_url, types=['VULNERABILITY'], start_date=newer_than, state_file=args.cursor_file, page_size=args.limit)
 vulnerability_notifications = []
-
-response = hub.execute_get(notifications_url)
-if response.status_code == 200:
-    notifications = response.json()
-    notifications = notifications.get('items', [])
-
-    vulnerability_notifications = list(filter(lambda n: n['type'] == "VULNERABILITY", notifications))
-    if newer_than:
-        vulnerability_notifications = list(
-            filter(lambda n: timestring.Date(n['createdAt']) > newer_than, vulnerability_notifications))
-    if args.project:
+feed.add_handler(vulnerability_notifications.append)
+feed.poll()
+logging.debug("Retrieved {} vulnerability notifications".format(len(vulnerability_notifications)))
+
+if args.project:
+    vulnerability_notifications = list(
+        filter(lambda n: args.project in [apv['projectName'] for apv in n['content']['affectedProjectVersions']], 
+            vulnerability_notifications))
+    if args.version:
         vulnerability_notifications = list(
-            filter(lambda n: args.project in [apv['projectName'] for apv in n['content']['affectedProjectVersions']], 
+            filter(lambda n: args.version in [apv['projectVersionName'] for apv in n['content']['affectedProjectVersions']], 
                 vulnerability_notifications))
-        if args.version:
-            vulnerability_notifications = list(
-                filter(lambda n: args.version in [apv['projectVersionName'] for apv in n['content']['affectedProjectVersions']], 
-                    vulnerability_notifications))
-else:
-    if args.system:
-        print("Failed to retrieve notifications. Current user is: {}".format(current_user))
-    else:
-        print("Failed to retrieve notifications for current user {}".format(current_user))
 
 if args.table_output:
     vulnerability_notification_table = [[
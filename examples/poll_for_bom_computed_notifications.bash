@@ -5,16 +5,13 @@
 # 	./examples/poll_for_bom_computed_notifications.bash
 #
 
+START_DATE=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
+
 while true
 do
 	echo "polling for bom computed notifications to create fix it messages for the project-versions"
-	if [ -f ".last_run" ]
-	then
-		OPTIONS="-n $(cat .last_run) -d"
-	else
-		OPTIONS="-n $(date +"%Y-%m-%dT%H:%M:%SZ") -d"
-	fi
-	python examples/get_bom_computed_notifications.py ${OPTIONS} |
+	# the cursor file remembers the notifications already processed, the start date only applies to the first run
+	python examples/get_bom_computed_notifications.py -n "${START_DATE}" -c .bom_computed_notifications_cursor |
 	python examples/project_version_urls_from_bom_computed_notifications.py | 
 	while read url
 	do
@@ -38,17 +38,6 @@ users_to_copy = json.load(f)
 if not users_to_copy:
 	logging.debug("No users to copy, sure you used the right file?")
 	
-def get_user(dest_hub, user_copy):
-	parameters = {'q':'userName:{}'.format(user_copy['userName'])}
-	users = dest_hub.get_users(parameters=parameters)
-	if 'totalCount' in users and users['totalCount'] > 0:
-		assert 'items' in users, "Should always be an items list when totalCount > 0"
-
-		for user in users['items']:
-			if user['userName'] == user_copy['userName']:
-				return user
-	return None
-
 for user_info in users_to_copy:
 	assert 'user' in user_info, "There must be a user object in each record"
 	assert 'roles' in user_info, "There must be a list of role names in each record"
@@ -71,7 +60,8 @@ for user_info in users_to_copy:
 	if new_user_url:
 		new_user = dest_hub.get_user_by_url(new_user_url)
 	else:
-		new_user = get_user(dest_hub, user_copy)
+		# exact userName lookup in the user index (read once, refreshed when users are created)
+		new_user = dest_hub.find_user_by_name(user_copy['userName'])
 
 	if not role_names:
 		logging.debug("No roles to assign to user {}".format(user_copy['userName']))
@@ -7,8 +7,8 @@ Requirements:
 2. The field type needs to be "Text Area"
 
 Script: Executing the script will write source paths of each component from a Project-Version to the defined Custom Field. 
-Executing the script again will simply overwrite the existing values with new ones. This is particularly useful if an end-user 
-is using REST APIs and would like to pull file paths.
+Executing the script again will simply overwrite the existing values with new ones, components whose paths did not change
+are skipped. This is particularly useful if an end-user is using REST APIs and would like to pull file paths.
 
 """
 
@@ -24,11 +24,12 @@ parser.add_argument("version")
 
 args = parser.parse_args()
 
-# Set the Custom Field Id
+# Set the Custom Field Id, or its label
 custom_field_id = ""
+custom_field_label = ""
 
-
-custom_headers = {'Accept': 'application/vnd.blackducksoftware.bill-of-materials-6+json'}
+bom_media_type = 'application/vnd.blackducksoftware.bill-of-materials-6+json'
+custom_headers = {'Accept': bom_media_type, 'Content-Type': bom_media_type}
 
 hub = HubInstance()
 
@@ -37,9 +38,10 @@ project = hub.get_project_by_name(args.project_name)
 version = hub.get_version_by_name(project, args.version)
 
 # Custom Field Id Check
-if custom_field_id == "":
-	print("Set the custom_field_id variable above with the correct Id and try executing the script again.")
+if custom_field_id == "" and custom_field_label == "":
+	print("Set the custom_field_id (or custom_field_label) variable above with the correct value and try executing the script again.")
 	exit()
+custom_field = custom_field_id or custom_field_label
 
 # Get all BOM Components
 bom_components = hub.get_version_components(version)
@@ -47,12 +49,12 @@ bom_components = hub.get_version_components(version)
 # Total Components for given project and Version
 print("Total Components: ", len(bom_components['items']))
 
+# Custom field updates, written in one batch at the end
+updates = []
+
 # Iterate through each Bom Component
 for bomComponent in bom_components['items']:
 
-	# Parse the JSON to build the custom field URL
-	customFieldURL = bomComponent['_meta']['href'] + "/custom-fields/"+custom_field_id
-
 	# Check no of Origins per component
 	if len(bomComponent['origins']) == 0:
 
@@ -82,15 +84,15 @@ for bomComponent in bom_components['items']:
 				# Wrapping component_source_paths in double quotes 	
 				component_source_paths = '"'+component_source_paths[1::]+'"'
 
-				# Creating a dictionary to save component_source_paths to key "values"
-				data = {"values": [component_source_paths]}
+				updates.append((bomComponent, custom_field, [component_source_paths]))
 
-				# Execute PUT call
-				response = hub.execute_put(customFieldURL, data, custom_headers)
+# Execute the PUT calls concurrently, skipping components whose value is already up to date
+results = hub.put_cf_values_bulk(updates, custom_headers=custom_headers)
 
-				# Logging
-				if response.status_code != 200:
-					print(bomComponent['componentName'] + ' | ' + bomComponent['componentVersionName'] + ' | '+ 'No of Origins: '+str(len(bomComponent['origins'])) + ' failed to write to the custom field \n' )
-				else:
-					logging.info("Successfully updated custom field for bom component  {} , version {}".format(
-						bomComponent['componentName'], bomComponent['componentVersionName']))
+# Logging
+for (bomComponent, label, values), result in zip(updates, results):
+	if result['status'] in ('failed', 'missing'):
+		print(bomComponent['componentName'] + ' | ' + bomComponent['componentVersionName'] + ' | '+ 'No of Origins: '+str(len(bomComponent['origins'])) + ' failed to write to the custom field ({})\n'.format(result['status']))
+	else:
+		logging.info("Custom field for bom component {} , version {} {}".format(
+			bomComponent['componentName'], bomComponent['componentVersionName'], result['status']))
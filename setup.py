@@ -26,9 +26,14 @@ REQUIRED = [
     'requests', 'python-dateutil'
 ]
 
-# Optional dependencies for MCP server
+# Optional dependencies for MCP server, streaming uploads, streaming report parsing, Arrow/Parquet exports
+# and risk rollups
 EXTRAS = {
-    'mcp': ['fastmcp']
+    'mcp': ['fastmcp'],
+    'upload': ['requests-toolbelt'],
+    'stream': ['ijson'],
+    'arrow': ['pyarrow'],
+    'rollup': ['numpy']
 }
 
 # The rest you shouldn't have to touch too much :)
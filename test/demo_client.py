@@ -16,6 +16,11 @@ def vulns_in_all_project_versions_components(bd):
             for component in bd.get_resource('components', version):
                 for vulnerability in bd.get_resource('vulnerabilities', component):
                     print(f"{project.get('name')}-{version.get('versionName')} [{component.get('componentName')}] has {vulnerability.get('severity')} severity vulnerability '{vulnerability.get('name')}'")
+
+def vulns_in_all_project_versions_components_from_mirror(store):
+    # same answer from a local mirror (blackduck.Mirror) without a request per project, version and component
+    for row in store.query('vulnerabilities').order_by('project_name', 'version_name', 'component_name'):
+        print(f"{row['project_name']}-{row['version_name']} [{row['component_name']}] has {row['severity']} severity vulnerability '{row['vulnerability_name']}'")
     
 def list_project_subresources(bd):
     for project in bd.get_resource('projects'):
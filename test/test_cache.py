@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+import blackduck.Cache
+from blackduck.Cache import Cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = Cache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(blackduck.Cache.time, 'time', lambda: now[0])
+    cache = Cache(ttl=60)
+    cache.put('a', 1)
+
+    now[0] += 59
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a', 'stale') == 'stale'
+
+
+def test_entries_persist_across_instances_including_negative_hits(tmp_path):
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return None if key == 'unknown' else key.upper()
+
+    first = Cache(folder=str(tmp_path))
+    assert first.get_or_load('known', loader) == 'KNOWN'
+    assert first.get_or_load('unknown', loader) is None
+
+    second = Cache(folder=str(tmp_path))
+    assert second.get_or_load('known', loader) == 'KNOWN'
+    assert second.get_or_load('unknown', loader) is None
+    assert loads == ['known', 'unknown']
+
+    second.invalidate('known')
+    assert Cache(folder=str(tmp_path)).get('known') is None
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from blackduck.Export import ParquetExporter, record_batches, schema, write_parquet
+
+
+def component(i):
+    return {
+        'componentName': f"component-{i}", 'componentVersionName': "1.0", 'usages': ['DYNAMICALLY_LINKED'],
+        'licenses': [{'licenseDisplay': 'MIT'}, {'licenseDisplay': 'Apache License 2.0'}],
+        'securityRiskProfile': {'counts': [{'countType': 'CRITICAL', 'count': i % 2}, {'countType': 'HIGH', 'count': 3}]},
+        '_meta': {'href': f"https://my-hub-host/api/projects/p/versions/v/components/{i}"},
+    }
+
+
+def test_record_batches_have_the_fixed_schema():
+    batches = list(record_batches((component(i) for i in range(5)), 'components', batch_size=2, project_name='p1'))
+
+    assert [b.num_rows for b in batches] == [2, 2, 1]
+    assert all(b.schema == schema('components') for b in batches)
+    table = pa.Table.from_batches(batches)
+    assert table.column('project_name').to_pylist() == ['p1'] * 5
+    assert table.column('version_name').null_count == 5
+    assert table.column('licenses')[0].as_py() == ['MIT', 'Apache License 2.0']
+    assert table.column('security_critical').to_pylist() == [0, 1, 0, 1, 0]
+    assert table.column('security_low').null_count == 5
+
+    with pytest.raises(ValueError):
+        list(record_batches([], 'components', not_a_context_column='x'))
+    with pytest.raises(ValueError):
+        list(record_batches([], 'policies'))
+
+
+def test_parquet_row_groups_span_writes(tmp_path):
+    path = str(tmp_path / "components.parquet")
+    with ParquetExporter(path, 'components', batch_size=4) as export:
+        for version in ('1.0', '2.0', '3.0'):
+            assert export.write((component(i) for i in range(3)), project_name='p1', version_name=version) == 3
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_rows == 9
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read(columns=['version_name']).column(0).to_pylist() == ['1.0'] * 3 + ['2.0'] * 3 + ['3.0'] * 3
+
+    path = str(tmp_path / "vulnerabilities.parquet")
+    vulnerability = {'componentName': 'log4j', 'vulnerabilityWithRemediation': {
+        'vulnerabilityName': 'CVE-2021-44228', 'overallScore': 10.0, 'vulnerabilityPublishedDate': '2021-12-10T00:00:00.000Z'}}
+    assert write_parquet([vulnerability], 'vulnerabilities', path) == 1
+    row = pq.read_table(path).to_pylist()[0]
+    assert (row['vulnerability_name'], row['overall_score'], row['published_date'].year) == ('CVE-2021-44228', 10.0, 2021)
+
+
+def test_values_which_do_not_fit_their_column_are_written_as_null(caplog):
+    projects = [
+        {'name': 'p1', 'projectTier': 1, 'createdAt': '2024-01-01T10:00:00.000Z'},
+        {'name': 'p2', 'projectTier': 'high', 'createdAt': 'yesterday'},
+        {'name': 'p3', 'projectTier': 3, 'createdAt': 'Mon, 01 Jan 2024 10:00:00 GMT'},
+    ]
+
+    table = pa.Table.from_batches(list(record_batches(projects, 'projects')))
+
+    assert table.column('tier').to_pylist() == [1, None, 3]
+    assert [t and t.day for t in table.column('created_at').to_pylist()] == [1, None, 1]
+    assert "tier" in caplog.text and "'high'" in caplog.text
+    assert "created_at" in caplog.text and "'yesterday'" in caplog.text
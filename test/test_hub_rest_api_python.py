@@ -5,6 +5,7 @@ import json
 import os
 import pytest
 import re
+import requests
 from urllib.parse import urlparse
 
 from blackduck.HubRestApi import HubInstance
@@ -393,6 +394,221 @@ def test_get_version_by_name(requests_mock, mock_hub_instance, shared_datadir):
 
     assert version['versionName'] == version_name
 
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_version_components_pages_through_bom(requests_mock, mock_hub_instance, prefetch):
+    version_url = mock_hub_instance.get_urlbase() + "/api/projects/p-id/versions/v-id"
+    components = [{'componentName': "component-{}".format(i)} for i in range(5)]
+    for offset in range(0, 5, 2):
+        requests_mock.get(
+            "{}/components?limit=2&offset={}".format(version_url, offset),
+            json={'totalCount': len(components), 'items': components[offset:offset+2]}
+        )
+    version = {'_meta': {'href': version_url}}
+
+    result = list(mock_hub_instance.iter_version_components(version, page_size=2, prefetch=prefetch))
+
+    assert result == components
+    component_requests = [r for r in requests_mock.request_history if r.path.endswith("/components")]
+    assert len(component_requests) == 3
+    assert all(r.headers['Accept'] == 'application/vnd.blackducksoftware.bill-of-materials-6+json' for r in component_requests)
+
+def test_iter_vulnerable_bom_components_stops_on_short_page(requests_mock, mock_hub_instance):
+    version_url = mock_hub_instance.get_urlbase() + "/api/projects/p-id/versions/v-id"
+    requests_mock.get(
+        "{}/vulnerable-bom-components?limit=10&offset=0".format(version_url),
+        json={'items': [{'componentName': 'a'}, {'componentName': 'b'}]}
+    )
+    version = {'_meta': {'href': version_url}}
+
+    result = list(mock_hub_instance.iter_vulnerable_bom_components(version, page_size=10))
+
+    assert [c['componentName'] for c in result] == ['a', 'b']
+    assert requests_mock.call_count == 3 # auth, current-version, and the single page
+
+def mock_license_urls(requests_mock, bom_component):
+    license_urls = [l['license'] for l in bom_component['licenses'][0]['licenses']]
+    for license_url in license_urls:
+        license_id = license_url.split('/')[-1]
+        requests_mock.get(license_url, json={'name': license_id, '_meta': {'href': license_url, 'links': [
+            {'rel': 'text', 'href': "{}/api/licenses/{}/text".format(fake_hub_host, license_id)}]}})
+        requests_mock.get("{}/api/licenses/{}/text".format(fake_hub_host, license_id), text="text of {}".format(license_id))
+    return license_urls
+
+def test_get_license_info_for_bom_component_fetches_each_license_once(requests_mock, mock_hub_instance, sample_bom_component_json):
+    license_urls = mock_license_urls(requests_mock, sample_bom_component_json)
+
+    # by default the keys are the BOM component's licenses, of which the multi-license (CONJUNCTIVE) entry is left out
+    assert mock_hub_instance.get_license_info_for_bom_component(sample_bom_component_json) == {}
+
+    license_info = mock_hub_instance.get_license_info_for_bom_component(sample_bom_component_json, leaf_licenses=True)
+    calls = requests_mock.call_count
+    assert mock_hub_instance.get_license_info_for_bom_component(sample_bom_component_json, leaf_licenses=True) == license_info
+
+    # with leaf_licenses it is expanded into its individual licenses
+    assert sorted(license_info.keys()) == [
+        "GNU General Public License v3.0 or later", "GNU Lesser General Public License v3.0 or later"]
+    lgpl = license_info["GNU Lesser General Public License v3.0 or later"]
+    assert lgpl['license_text_info'] == "text of {}".format(license_urls[0].split('/')[-1])
+    assert requests_mock.call_count == calls
+
+def test_prefetch_licenses_replaces_per_license_gets(requests_mock, mock_hub_instance, sample_bom_component_json):
+    license_urls = mock_license_urls(requests_mock, sample_bom_component_json)
+    catalogue = [{'name': url.split('/')[-1], '_meta': {'href': "{}/api/licenses/{}".format(fake_hub_host, url.split('/')[-1]), 'links': [
+        {'rel': 'text', 'href': "{}/api/licenses/{}/text".format(fake_hub_host, url.split('/')[-1])}]}} for url in license_urls]
+    requests_mock.get("{}/api/licenses?limit=1000&offset=0".format(fake_hub_host), json={'totalCount': 2, 'items': catalogue})
+
+    assert mock_hub_instance.prefetch_licenses() == 2
+    license_info = mock_hub_instance.get_license_info_for_bom_component(sample_bom_component_json, leaf_licenses=True)
+
+    assert len(license_info) == 2
+    assert not any(r.url in license_urls for r in requests_mock.request_history)
+
+def make_cf_objects(requests_mock, values_by_version):
+    objs = []
+    for version_id, values in values_by_version.items():
+        version_url = "{}/api/projects/p-id/versions/{}".format(fake_hub_host, version_id)
+        requests_mock.get(version_url + "/custom-fields", json={'items': [
+            {'label': label, 'values': v, '_meta': {'href': "{}/custom-fields/{}".format(version_url, label)}}
+            for label, v in values.items()]})
+        objs.append({'_meta': {'href': version_url, 'links': [{'rel': 'custom-fields', 'href': version_url + "/custom-fields"}]}})
+    return objs
+
+def test_get_cf_values_bulk(requests_mock, mock_hub_instance):
+    objs = make_cf_objects(requests_mock, {'v1': {'owner': ['alice'], 'tier': ['1']}, 'v2': {'tier': ['2']}})
+
+    table = mock_hub_instance.get_cf_values_bulk(objs, labels=['owner', 'tier'])
+
+    assert table == [
+        {'href': objs[0]['_meta']['href'], 'owner': ['alice'], 'tier': ['1']},
+        {'href': objs[1]['_meta']['href'], 'owner': None, 'tier': ['2']},
+    ]
+
+def test_put_cf_values_bulk_skips_unchanged_values(requests_mock, mock_hub_instance):
+    objs = make_cf_objects(requests_mock, {'v1': {'owner': ['alice'], 'tier': ['1', '2']}})
+    put = requests_mock.put(objs[0]['_meta']['href'] + "/custom-fields/owner", json={})
+
+    results = mock_hub_instance.put_cf_values_bulk([
+        (objs[0], 'owner', ['bob']), (objs[0], 'tier', ['2', '1']), (objs[0], 'nope', ['x'])])
+
+    assert [r['status'] for r in results] == ['updated', 'unchanged', 'missing']
+    assert put.call_count == 1
+    assert put.last_request.json()['values'] == ['bob']
+    assert len([r for r in requests_mock.request_history if r.path.endswith("/custom-fields")]) == 1
+
+def test_put_cf_values_bulk_finds_fields_by_id_on_every_page(requests_mock, mock_hub_instance):
+    version_url = "{}/api/projects/p-id/versions/v1".format(fake_hub_host)
+    cfs = [{'label': 'field {}'.format(i), 'values': [], '_meta': {'href': "{}/custom-fields/{}".format(version_url, i)}} for i in range(101)]
+    requests_mock.get(version_url + "/custom-fields?limit=100&offset=0", json={'totalCount': 101, 'items': cfs[:100]})
+    requests_mock.get(version_url + "/custom-fields?limit=100&offset=100", json={'totalCount': 101, 'items': cfs[100:]})
+    put = requests_mock.put(version_url + "/custom-fields/100", json={})
+    obj = {'_meta': {'href': version_url, 'links': [{'rel': 'custom-fields', 'href': version_url + "/custom-fields"}]}}
+
+    results = mock_hub_instance.put_cf_values_bulk([(obj, '100', ['x']), (obj, 'field 100', ['x'])])
+
+    assert [r['status'] for r in results] == ['updated', 'updated']
+    assert put.last_request.json()['label'] == 'field 100'
+
+def test_put_cf_values_bulk_sends_headers_and_reports_put_errors(requests_mock, mock_hub_instance):
+    objs = make_cf_objects(requests_mock, {'v1': {'owner': ['alice']}, 'v2': {'owner': ['alice']}})
+    bom_media_type = 'application/vnd.blackducksoftware.bill-of-materials-6+json'
+    put = requests_mock.put(objs[0]['_meta']['href'] + "/custom-fields/owner", json={})
+    requests_mock.put(objs[1]['_meta']['href'] + "/custom-fields/owner", exc=requests.exceptions.ConnectionError)
+
+    results = mock_hub_instance.put_cf_values_bulk(
+        [(obj, 'owner', ['bob']) for obj in objs], custom_headers={'Accept': bom_media_type, 'Content-Type': bom_media_type})
+
+    assert [r['status'] for r in results] == ['updated', 'failed']
+    assert put.last_request.headers['Content-Type'] == bom_media_type
+    assert all(r.headers['Accept'] == bom_media_type for r in requests_mock.request_history if '/custom-fields' in r.path)
+
+def test_cf_definitions_are_cached_until_changed(requests_mock, mock_hub_instance):
+    objects_url = "{}/api/custom-fields/objects".format(fake_hub_host)
+    objects = requests_mock.get(objects_url, json={'items': [{'name': 'Project', '_meta': {'href': objects_url + "/project"}}]})
+    fields = requests_mock.get(objects_url + "/project/fields", json={'items': []})
+    requests_mock.post(objects_url + "/project/fields", status_code=201)
+
+    mock_hub_instance.get_custom_fields("Project")
+    mock_hub_instance.get_custom_fields("Project")
+    assert (objects.call_count, fields.call_count) == (1, 1)
+
+    mock_hub_instance.create_cf("Project", "TEXT", "a field", "a field", 0)
+    mock_hub_instance.get_custom_fields("Project")
+    assert (objects.call_count, fields.call_count) == (1, 2)
+
+def test_get_vulnerabilities_bulk_fetches_each_id_once(requests_mock, mock_hub_instance, tmp_path):
+    mock_hub_instance.set_vulnerability_cache(folder=str(tmp_path))
+    vulns_url = "{}/api/vulnerabilities".format(fake_hub_host)
+    cve = requests_mock.get(vulns_url + "/CVE-2021-44228", json={'name': 'CVE-2021-44228'})
+    bdsa = requests_mock.get(vulns_url + "/BDSA-2021-3703", json={'name': 'BDSA-2021-3703'})
+    requests_mock.get(vulns_url + "/CVE-0000-0000", status_code=404, json={'errorCode': 'not found'})
+
+    assert mock_hub_instance.get_vulnerabilities("CVE-2021-44228") == {'name': 'CVE-2021-44228'}
+    details = mock_hub_instance.get_vulnerabilities_bulk(
+        ["BDSA-2021-3703", "CVE-2021-44228", "BDSA-2021-3703", "CVE-0000-0000"])
+
+    assert details == {'BDSA-2021-3703': {'name': 'BDSA-2021-3703'}, 'CVE-2021-44228': {'name': 'CVE-2021-44228'}, 'CVE-0000-0000': None}
+    assert (cve.call_count, bdsa.call_count) == (1, 1)
+
+    # persisted, so a new cache on the same folder needs no requests
+    mock_hub_instance.set_vulnerability_cache(folder=str(tmp_path))
+    mock_hub_instance.get_vulnerabilities_bulk(["BDSA-2021-3703", "CVE-2021-44228"])
+    assert (cve.call_count, bdsa.call_count) == (1, 1)
+
+def test_user_index_is_read_once_and_kept_up_to_date(requests_mock, mock_hub_instance):
+    users_url = "{}/api/users".format(fake_hub_host)
+    alice = {'userName': 'alice', '_meta': {'href': users_url + "/a-id"}}
+    bob = {'userName': 'bob', '_meta': {'href': users_url + "/b-id"}}
+    users = requests_mock.get(users_url, json={'totalCount': 1, 'items': [alice]})
+    requests_mock.post(users_url, status_code=201, headers={'location': users_url + "/b-id"})
+    requests_mock.get(users_url + "/b-id", json=bob)
+    requests_mock.delete(users_url + "/a-id", status_code=204)
+
+    assert mock_hub_instance.find_user_by_name("alice") == alice
+    assert mock_hub_instance.find_user_by_name("bob") is None
+    assert users.call_count == 1
+
+    mock_hub_instance.create_user({'userName': 'bob'})
+    mock_hub_instance.delete_user_by_url(users_url + "/a-id")
+    assert mock_hub_instance.find_user_by_name("bob") == bob
+    assert mock_hub_instance.find_user_by_name("alice") is None
+    assert users.call_count == 1
+
+def test_assign_to_projects(requests_mock, mock_hub_instance):
+    api = "{}/api".format(fake_hub_host)
+    project = {'name': 'p1', '_meta': {'href': api + "/projects/p-id"}}
+    projects = requests_mock.get(api + "/projects", json={'totalCount': 1, 'items': [project]})
+    requests_mock.get(api + "/users", json={'items': [{'userName': 'alice', '_meta': {'href': api + "/users/a-id"}}]})
+    requests_mock.get(api + "/usergroups", json={'items': [{'name': 'devs', '_meta': {'href': api + "/usergroups/g-id"}}]})
+    roles = requests_mock.get(api + "/roles", json={'items': [{'name': 'BOM Manager', '_meta': {'href': api + "/roles/r-id"}}]})
+    role_post = requests_mock.post(api + "/users/a-id/roles", status_code=201)
+    group_post = requests_mock.post(api + "/projects/p-id/usergroups", status_code=201)
+
+    results = mock_hub_instance.assign_to_projects([
+        {'project': 'p1', 'user': 'alice', 'roles': ['BOM Manager']},
+        {'project': 'p1', 'group': 'devs'},
+        {'project': 'p1', 'user': 'nobody'},
+    ])
+
+    assert [r['status'] for r in results] == ['assigned', 'assigned', 'not_found']
+    assert role_post.last_request.json() == [{'role': api + "/roles/r-id", 'scope': api + "/projects/p-id"}]
+    assert group_post.last_request.json() == {'group': api + "/usergroups/g-id"}
+    assert (projects.call_count, roles.call_count) == (1, 1)
+
+def test_assign_user_group_to_project_skips_groups_which_are_not_assignable(requests_mock, mock_hub_instance):
+    api = "{}/api".format(fake_hub_host)
+    project = {'name': 'p1', '_meta': {'href': api + "/projects/p-id", 'links': [
+        {'rel': 'assignable-usergroups', 'href': api + "/projects/p-id/assignable-usergroups"}]}}
+    requests_mock.get(api + "/projects", json={'totalCount': 1, 'items': [project]})
+    # 'assigned' is already on the project, so it is not in the assignable user groups
+    requests_mock.get(api + "/projects/p-id/assignable-usergroups", json={'items': [{'name': 'devs', 'usergroup': api + "/usergroups/g-id"}]})
+    group_post = requests_mock.post(api + "/projects/p-id/usergroups", status_code=201)
+
+    mock_hub_instance.assign_user_group_to_project('p1', 'devs', [])
+    mock_hub_instance.assign_user_group_to_project('p1', 'assigned', [])
+
+    assert group_post.call_count == 1
+    assert group_post.last_request.json() == {'group': api + "/usergroups/g-id"}
+
 def test_create_version_reports(requests_mock, mock_hub_instance):
     pass
 
@@ -486,15 +702,57 @@ def test_get_codelocations_all(mock_hub_instance, code_locations):
 
     assert code_locs == code_locations
 
-def test_get_codelocations_unmapped(mock_hub_instance, code_locations):
+def test_get_codelocations_unmapped(requests_mock, mock_hub_instance, code_locations):
+    url = "{}/api/codelocations".format(fake_hub_host)
+    requests_mock.get(url + "?limit=100&offset=0", json={'totalCount': 101, 'items': code_locations['items'][:100]})
+    requests_mock.get(url + "?limit=100&offset=100", json={'totalCount': 101, 'items': code_locations['items'][100:]})
+
     code_locs = mock_hub_instance.get_codelocations(unmapped=True)
 
-    assert code_locs != code_locations
+    expected_items = [cl for cl in code_locations['items'] if 'mappedProjectVersion' not in cl]
+    assert code_locs == {'totalCount': len(expected_items), 'items': expected_items}
+
 
-    expected_data = copy.deepcopy(code_locations)
-    expected_data['items'] = [cl for cl in code_locations['items'] if 'mappedProjectVersion' not in cl]
-    expected_data['totalCount'] = len(expected_data['items'])
 
-    assert code_locs == expected_data
+def test_iter_codelocations_unmapped_reads_all_pages(requests_mock, mock_hub_instance, shared_datadir):
+    data = json.load((shared_datadir / 'code_locations.json').open())
+    url = "{}/api/codelocations".format(fake_hub_host)
+    # a server which ignores the unmapped filter, so filtering must also happen on the client
+    requests_mock.get(url + "?limit=100&offset=0", json={'totalCount': 101, 'items': data['items'][:100]})
+    requests_mock.get(url + "?limit=100&offset=100", json={'totalCount': 101, 'items': data['items'][100:]})
+
+    code_locs = list(mock_hub_instance.iter_codelocations(unmapped=True))
 
+    assert code_locs == [cl for cl in data['items'] if 'mappedProjectVersion' not in cl]
+    assert all(r.qs['filter'] == ['unmapped:true'] for r in requests_mock.request_history if r.path == '/api/codelocations')
 
+def test_count_codelocations(requests_mock, mock_hub_instance, shared_datadir):
+    data = json.load((shared_datadir / 'code_locations.json').open())
+    url = "{}/api/codelocations".format(fake_hub_host)
+    requests_mock.get(url + "?limit=1", json={'totalCount': 101, 'items': data['items'][:1]})
+    requests_mock.get(url + "?filter=unmapped:true&limit=100&offset=0", json={'totalCount': 101, 'items': data['items'][:100]})
+    requests_mock.get(url + "?filter=unmapped:true&limit=100&offset=100", json={'totalCount': 101, 'items': data['items'][100:]})
+
+    assert mock_hub_instance.count_codelocations() == 101
+    # agrees with iter_codelocations even though the server ignored the unmapped filter
+    assert mock_hub_instance.count_codelocations(unmapped=True) == len(list(mock_hub_instance.iter_codelocations(unmapped=True))) == 42
+
+def test_delete_unmapped_codelocations_only_deletes_complete_scans(requests_mock, mock_hub_instance):
+    code_locs = []
+    statuses = {'cl-1': 'COMPLETE', 'cl-2': 'RUNNING', 'cl-3': 'COMPLETE'}
+    for cl_id, status in statuses.items():
+        cl_url = "{}/api/codelocations/{}".format(fake_hub_host, cl_id)
+        code_locs.append({'name': cl_id, '_meta': {'href': cl_url, 'links': [{'rel': 'scans', 'href': cl_url + "/scan-summaries"}]}})
+        requests_mock.get(cl_url + "/scan-summaries", json={'items': [
+            {'status': 'COMPLETE', 'updatedAt': '2020-01-01T00:00:00.000Z'},
+            {'status': status, 'updatedAt': '2021-01-01T00:00:00.000Z'},
+        ]})
+        requests_mock.delete(cl_url, status_code=204)
+    requests_mock.get("{}/api/codelocations?limit=1000&offset=0".format(fake_hub_host), json={'totalCount': 3, 'items': code_locs})
+    progress = []
+
+    counts = mock_hub_instance.delete_unmapped_codelocations(max_workers=3, max_concurrent_deletes=1, progress=progress.append)
+
+    assert counts == {'total': 3, 'deleted': 2, 'skipped': 1, 'failed': 0}
+    assert sorted(r.path for r in requests_mock.request_history if r.method == 'DELETE') == ['/api/codelocations/cl-1', '/api/codelocations/cl-3']
+    assert len(progress) == 3
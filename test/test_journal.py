@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+import requests
+
+from blackduck.Journal import JournalStore, JournalSync
+
+fake_hub_host = "https://my-hub-host"
+journal_url = f"{fake_hub_host}/api/journal/projects/p-id"
+
+
+def event(action, timestamp, trigger_name='sysadmin'):
+    return {'action': action, 'timestamp': timestamp, 'objectData': {'type': 'COMPONENT', 'name': 'lodash'},
+            'triggerData': {'type': 'user', 'name': trigger_name}}
+
+
+def test_sync_reads_only_new_events(requests_mock):
+    e1 = event('Component Added', "2024-01-01T10:00:00.000Z")
+    e2 = event('Policy Override', "2024-02-01T10:00:00.000Z", 'alice')
+    e3 = event('Component Deleted', "2024-03-01T10:00:00.000Z")
+    requests_mock.get(f"{fake_hub_host}/api/projects", json={'items': [
+        {'name': 'p1', '_meta': {'href': f"{fake_hub_host}/api/projects/p-id", 'links': [
+            {'rel': 'project-journal', 'href': journal_url}]}}]})
+    journal = requests_mock.get(journal_url, [
+        {'json': {'items': [e2, e1]}},
+        # newest first, reading stops at the events older than the newest one stored
+        {'json': {'items': [e3, e2, e1]}},
+    ])
+    store = JournalStore(':memory:')
+    sync = JournalSync(requests.Session(), store, base_url=fake_hub_host, page_size=10)
+
+    assert sync.sync_projects(versions=False) == {journal_url: 2}
+    assert sync.sync_projects(versions=False) == {journal_url: 1}
+    assert journal.call_count == 2
+    assert store.cursor(journal_url) == e3['timestamp']
+
+    overrides = store.query(action='Policy Override', since="2024-01-15")
+    assert [(o['trigger_name'], o['project_name'], o['event']) for o in overrides] == [('alice', 'p1', e2)]
+    assert [e['action'] for e in store.query(project_name='p1')] == ['Component Deleted', 'Policy Override', 'Component Added']
+
+
+def test_sync_reports_failed_journals(requests_mock):
+    requests_mock.get(journal_url, status_code=503)
+    store = JournalStore(':memory:')
+
+    results = JournalSync(requests.Session(), store).sync([(journal_url, 'p1', None)])
+
+    assert isinstance(results[journal_url], requests.HTTPError)
+    assert store.cursor(journal_url) is None
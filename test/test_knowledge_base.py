@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+import requests
+
+from blackduck.Cache import Cache
+from blackduck.KnowledgeBase import KBLookup, normalize_purl
+
+fake_hub_host = "https://my-hub-host"
+purl_url = f"{fake_hub_host}/api/search/kb-purl-component"
+
+
+def test_normalize_purl():
+    assert normalize_purl(" pkg:NPM/lodash@4.17.21?b=2&a=1 ") == "pkg:npm/lodash@4.17.21?a=1&b=2"
+    assert normalize_purl("pkg:maven/org.apache/Struts@2.5#src") == "pkg:maven/org.apache/Struts@2.5#src"
+
+
+def test_find_purls_deduplicates_and_caches_negative_hits(requests_mock, tmp_path):
+    lodash = {'componentName': 'lodash', 'versionName': '4.17.21'}
+    requests_mock.get(purl_url, additional_matcher=lambda r: 'lodash' in r.url, json={'items': [lodash]})
+    requests_mock.get(purl_url, additional_matcher=lambda r: 'unknown' in r.url, json={'items': []})
+    kb = KBLookup(requests.Session(), base_url=fake_hub_host, cache=Cache(folder=str(tmp_path)))
+
+    matches = kb.find_purls(["pkg:npm/lodash@4.17.21", "pkg:NPM/lodash@4.17.21", "pkg:npm/unknown@1.0"])
+
+    assert matches == {"pkg:npm/lodash@4.17.21": lodash, "pkg:NPM/lodash@4.17.21": lodash, "pkg:npm/unknown@1.0": None}
+    assert requests_mock.call_count == 2
+
+    # both the match and the negative hit are persisted
+    kb = KBLookup(requests.Session(), base_url=fake_hub_host, cache=Cache(folder=str(tmp_path)))
+    assert kb.find_purl("pkg:npm/unknown@1.0") is None
+    assert kb.find_purl("pkg:npm/lodash@4.17.21") == lodash
+    assert requests_mock.call_count == 2
+
+
+def test_failed_lookups_are_not_cached(requests_mock):
+    requests_mock.get(f"{fake_hub_host}/api/components/c-id", json={'_meta': {'href': f"{fake_hub_host}/api/components/c-id"}})
+    requests_mock.get(f"{fake_hub_host}/api/components/c-id/versions/v-id", [
+        {'status_code': 503}, {'json': {'versionName': '1.0'}}])
+    requests_mock.get(f"{fake_hub_host}/api/search/kb-components", status_code=503)
+    kb = KBLookup(requests.Session(), base_url=fake_hub_host)
+
+    assert kb.find_id("c-id", "v-id") is None
+    assert kb.find_id("C-ID", "v-id") == {'versionName': '1.0'}
+    assert kb.find_id("c-id", "v-id") == {'versionName': '1.0'}
+    # the component is read once for all of its versions
+    assert requests_mock.call_count == 3
+    # a failed search finds nothing
+    assert kb.search_name("lodash") == []
+
+
+def test_versions_are_looked_up_under_the_returned_component(requests_mock):
+    merged_url = f"{fake_hub_host}/api/components/merged-id"
+    requests_mock.get(f"{fake_hub_host}/api/components/old-id", json={'name': 'lodash', '_meta': {'href': merged_url}})
+    requests_mock.get(f"{merged_url}/versions/v-id", json={'versionName': '4.17.21'})
+    kb = KBLookup(requests.Session(), base_url=fake_hub_host)
+
+    assert kb.find_ids([("old-id", None), ("old-id", "v-id")]) == {
+        ("old-id", None): {'name': 'lodash', '_meta': {'href': merged_url}},
+        ("old-id", "v-id"): {'versionName': '4.17.21'}}
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastmcp")
+
+from blackduck.mcp_server import BlackDuckMCPServer
+
+fake_hub_host = "https://my-hub-host"
+project_url = f"{fake_hub_host}/api/projects/p-id"
+version_url = f"{project_url}/versions/v-id"
+
+
+@pytest.fixture()
+def server(requests_mock, monkeypatch):
+    monkeypatch.setenv('BLACKDUCK_URL', fake_hub_host)
+    monkeypatch.setenv('BLACKDUCK_TOKEN', "a-token")
+    requests_mock.post(f"{fake_hub_host}/api/tokens/authenticate",
+                       json={'bearerToken': "a-bearer-token", 'expiresInMilliseconds': 7200000},
+                       headers={'X-CSRF-TOKEN': "a-csrf-token"})
+    requests_mock.get(f"{fake_hub_host}/api/", json={'projects': f"{fake_hub_host}/api/projects", '_meta': {}})
+    yield BlackDuckMCPServer()
+
+
+def call_tool(server, name, **arguments):
+    result = asyncio.run(server.mcp.call_tool(name, arguments))
+    # lists are wrapped in {'result': ...}, dictionaries are not
+    return result.structured_content.get('result', result.structured_content)
+
+
+def mock_project(requests_mock):
+    project = {'name': 'p1', '_meta': {'href': project_url, 'links': [{'rel': 'versions', 'href': f"{project_url}/versions"}]}}
+    version = {'versionName': '1.0', '_meta': {'href': version_url, 'links': [
+        {'rel': 'components', 'href': f"{version_url}/components"},
+        {'rel': 'vulnerable-components', 'href': f"{version_url}/vulnerable-bom-components"}]}}
+    projects = requests_mock.get(f"{fake_hub_host}/api/projects", json={'items': [project]})
+    versions = requests_mock.get(f"{project_url}/versions", json={'items': [version]})
+    return projects, versions
+
+
+def test_limit_is_passed_down_as_page_size(requests_mock, server):
+    projects, _ = mock_project(requests_mock)
+
+    assert [p['name'] for p in call_tool(server, 'list_projects', limit=5)['items']] == ['p1']
+    assert projects.last_request.qs['limit'] == ['5']
+
+
+def test_project_and_version_lookups_are_cached(requests_mock, server):
+    projects, versions = mock_project(requests_mock)
+    components = requests_mock.get(f"{version_url}/components", json={'items': [
+        {'componentName': 'lodash', 'componentVersionName': '4.17.21', 'licenses': [{'licenseDisplay': 'MIT'}]}]})
+
+    for _ in range(3):
+        result = call_tool(server, 'list_project_components', project_name='P1', version_name='1.0', limit=10)
+
+    assert result['items'][0]['licenseDisplay'] == 'MIT'
+    assert (projects.call_count, versions.call_count, components.call_count) == (1, 1, 3)
+    assert versions.last_request.qs['q'] == ['versionname:1.0']
+
+
+def test_projects_not_found_are_looked_up_again(requests_mock, server):
+    projects, _ = mock_project(requests_mock)
+
+    assert server._find_project('P2') is None
+    assert server._find_project('P2') is None
+    assert server._find_project('P1')['name'] == 'p1'
+    assert server._find_project('P1')['name'] == 'p1'
+    assert projects.call_count == 3
+
+
+def test_version_risk_reads_components_and_vulnerabilities_concurrently(requests_mock, server):
+    mock_project(requests_mock)
+    threads = []
+
+    def items(items):
+        def callback(request, context):
+            threads.append(threading.current_thread().name)
+            return {'items': items}
+        return callback
+    requests_mock.get(f"{version_url}/components", json=items([{'componentName': 'lodash'}]))
+    requests_mock.get(f"{version_url}/vulnerable-bom-components", json=items([{'vulnerabilityName': 'CVE-1'}]))
+
+    risk = call_tool(server, 'get_version_risk', project_name='p1', version_name='1.0')
+
+    assert [c['componentName'] for c in risk['components']['items']] == ['lodash']
+    assert [v['vulnerabilityName'] for v in risk['vulnerabilities']['items']] == ['CVE-1']
+    assert len(threads) == 2 and all(name.startswith("blackduck-mcp") for name in threads)
+
+
+def test_slow_tools_time_out(requests_mock, server):
+    def slow(request, context):
+        time.sleep(0.5)
+        return {'items': []}
+    requests_mock.get(f"{fake_hub_host}/api/projects", json=slow)
+    server.tool_timeout = 0.05
+
+    with pytest.raises(Exception, match="did not complete within"):
+        call_tool(server, 'list_projects')
+
+
+def test_cursor_continues_where_the_previous_call_stopped(requests_mock, server):
+    mock_project(requests_mock)
+    bom = [{'componentName': f"c{i}", 'licenses': []} for i in range(5)]
+
+    def page(request, context):
+        offset, limit = int(request.qs['offset'][0]), int(request.qs['limit'][0])
+        return {'totalCount': len(bom), 'items': bom[offset:offset + limit]}
+    components = requests_mock.get(f"{version_url}/components", json=page)
+
+    first = call_tool(server, 'list_project_components', project_name='p1', version_name='1.0', limit=3)
+    second = call_tool(server, 'list_project_components', project_name='ignored', cursor=first['next_cursor'], limit=3)
+
+    assert [c['componentName'] for c in first['items'] + second['items']] == [f"c{i}" for i in range(5)]
+    assert second['next_cursor'] is None
+    assert [r.qs['offset'] for r in components.request_history] == [['0'], ['3']]
+
+
+def test_max_bytes_truncates_at_a_page_boundary(requests_mock, server):
+    bom = [{'name': f"project-{i}", 'description': 'x' * 100} for i in range(60)]
+
+    def page(request, context):
+        offset, limit = int(request.qs['offset'][0]), int(request.qs['limit'][0])
+        return {'totalCount': len(bom), 'items': bom[offset:offset + limit]}
+    requests_mock.get(f"{fake_hub_host}/api/projects", json=page)
+
+    result = call_tool(server, 'list_projects', limit=60, max_bytes=5000)
+
+    # pages of 25 projects of about 190 bytes, a second page would exceed the budget
+    assert len(result['items']) == 25
+    assert result['truncated'] is True
+    rest = call_tool(server, 'list_projects', limit=60, cursor=result['next_cursor'])
+    assert [p['name'] for p in rest['items']] == [f"project-{i}" for i in range(25, 60)]
+
+
+def test_cursor_to_another_server_is_rejected(server):
+    cursor = server._encode_cursor("https://elsewhere/api/projects", 0, {})
+
+    with pytest.raises(Exception, match="another server"):
+        call_tool(server, 'list_projects', cursor=cursor)
+
+
+def test_portfolio_tools_answer_from_the_local_index(requests_mock, server):
+    server.index_path = ':memory:'
+    projects, versions = mock_project(requests_mock)
+    components = requests_mock.get(f"{version_url}/components", json={'items': [
+        {'componentName': 'log4j-core', 'componentVersionName': '2.14.1', 'licenses': [{'licenseDisplay': 'Apache License 2.0'}],
+         '_meta': {'href': f"{version_url}/components/log4j"}},
+        {'componentName': 'log4j-core', 'componentVersionName': '2.17.1', '_meta': {'href': f"{version_url}/components/log4j-new"}}]})
+    requests_mock.get(f"{version_url}/vulnerable-bom-components", json={'items': [
+        {'componentName': 'log4j-core', 'componentVersionName': '2.14.1', 'vulnerabilityWithRemediation': {
+            'vulnerabilityName': 'CVE-2021-44228', 'severity': 'CRITICAL', 'overallScore': 10.0}}]})
+
+    # the first query starts the refresh and answers from the (empty) index at once
+    usage = call_tool(server, 'find_component_usage', component_name='log4j-core', below_version='2.17')
+    assert usage['stale'] is True
+    server._portfolio_refresher.join()
+
+    for _ in range(2):
+        usage = call_tool(server, 'find_component_usage', component_name='log4j-core', below_version='2.17')
+
+    assert [(r['project_name'], r['component_version_name'], r['licenses']) for r in usage['items']] == [
+        ('p1', '2.14.1', 'Apache License 2.0')]
+    assert usage['stale'] is False
+    exposure = call_tool(server, 'find_vulnerability_exposure', vulnerability_name='CVE-2021-44228')
+    assert [(r['version_name'], r['severity']) for r in exposure['items']] == [('1.0', 'CRITICAL')]
+    assert [r['component_version_name'] for r in call_tool(server, 'find_license_usage', license_name='apache')['items']] == ['2.14.1']
+    # the later queries did not touch the Hub
+    assert (projects.call_count, components.call_count) == (1, 1)
+
+
+def test_refresh_portfolio_index_reports_failed_versions(requests_mock, server):
+    server.index_path = ':memory:'
+    mock_project(requests_mock)
+    requests_mock.get(f"{version_url}/components", status_code=500)
+    requests_mock.get(f"{version_url}/vulnerable-bom-components", json={'items': []})
+
+    # the refresh runs in the background, the tool does not wait for it
+    assert 'refreshing' in call_tool(server, 'refresh_portfolio_index')
+    server._portfolio_refresher.join()
+
+    # once it completed the index is not refreshed again, the failed version is retried by the next refresh
+    result = call_tool(server, 'refresh_portfolio_index')
+    assert (result['refreshing'], result['versions'], result['failed'], result['stale']) == (False, 0, 1, False)
+    assert result['indexedAt'] is not None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import pytest
+
+from blackduck.Client import Client
+from blackduck.Mirror import MirrorStore, MirrorSync, version_key
+
+fake_hub_host = "https://my-hub-host"
+project_url = f"{fake_hub_host}/api/projects/p-id"
+
+
+def version(version_id, name, bom_update, settings_update="2024-01-01T00:00:00.000Z", phase='DEVELOPMENT'):
+    url = f"{project_url}/versions/{version_id}"
+    return {
+        'versionName': name, 'phase': phase, 'lastBomUpdateDate': bom_update, 'settingUpdatedAt': settings_update,
+        '_meta': {'href': url, 'links': [
+            {'rel': 'components', 'href': f"{url}/components"},
+            {'rel': 'vulnerable-components', 'href': f"{url}/vulnerable-bom-components"},
+            {'rel': 'policy-status', 'href': f"{url}/policy-status"},
+        ]}}
+
+
+def mock_bom(requests_mock, version_id, component_version='2.14.1'):
+    url = f"{project_url}/versions/{version_id}"
+    components = requests_mock.get(f"{url}/components", json={'items': [{
+        'componentName': 'Apache Log4J', 'componentVersionName': component_version, 'policyStatus': 'IN_VIOLATION',
+        'usages': ['DYNAMICALLY_LINKED'], 'licenses': [{'licenseDisplay': 'Apache License 2.0', 'licenseType': 'CONJUNCTIVE'}],
+        '_meta': {'href': f"{url}/components/c-id"}}]})
+    requests_mock.get(f"{url}/vulnerable-bom-components", json={'items': [{
+        'componentName': 'Apache Log4J', 'componentVersionName': component_version,
+        'vulnerabilityWithRemediation': {'vulnerabilityName': 'CVE-2021-44228', 'severity': 'CRITICAL', 'overallScore': 10.0}}]})
+    requests_mock.get(f"{url}/policy-status", json={'overallStatus': 'IN_VIOLATION', 'componentVersionStatusCounts': [
+        {'name': 'IN_VIOLATION', 'value': 1}, {'name': 'NOT_IN_VIOLATION', 'value': 0}]})
+    return components
+
+
+@pytest.fixture()
+def client(requests_mock):
+    requests_mock.post(f"{fake_hub_host}/api/tokens/authenticate",
+                       json={'bearerToken': "a-bearer-token", 'expiresInMilliseconds': 7200000},
+                       headers={'X-CSRF-TOKEN': "a-csrf-token"})
+    requests_mock.get(f"{fake_hub_host}/api/", json={'projects': f"{fake_hub_host}/api/projects", '_meta': {}})
+    requests_mock.get(f"{fake_hub_host}/api/projects", json={'items': [{'name': 'p1', '_meta': {
+        'href': project_url, 'links': [{'rel': 'versions', 'href': f"{project_url}/versions"}]}}]})
+    return Client(base_url=fake_hub_host, token="a-token")
+
+
+def test_version_key_orders_numerically():
+    assert sorted(['2.17.1', '2.9.1', '2.14.1', '2.17'], key=version_key) == ['2.9.1', '2.14.1', '2.17', '2.17.1']
+
+
+def test_sync_only_reads_the_boms_which_changed(requests_mock, client):
+    store = MirrorStore(':memory:')
+    requests_mock.get(f"{project_url}/versions", json={'items': [
+        version('v1', '1.0', "2024-01-01T00:00:00.000Z"), version('v2', '2.0', "2024-01-01T00:00:00.000Z")]})
+    v1, v2 = mock_bom(requests_mock, 'v1'), mock_bom(requests_mock, 'v2')
+
+    assert MirrorSync(client, store).sync() == {'versions': 2, 'bom_updated': 2, 'settings_updated': 0, 'removed': 0, 'failed': 0}
+    assert v1.last_request.qs['limit'] == ['1000']
+    rows = store.execute("SELECT v.version_name, c.component_version_name, l.license_name, u.vulnerability_name, "
+                         "p.in_violation FROM versions v JOIN components c USING (version_url) JOIN licenses l "
+                         "USING (version_url) JOIN vulnerabilities u USING (version_url) JOIN policy_status p "
+                         "USING (version_url) ORDER BY v.version_name")
+    assert [tuple(r) for r in rows] == [('1.0', '2.14.1', 'Apache License 2.0', 'CVE-2021-44228', 1),
+                                        ('2.0', '2.14.1', 'Apache License 2.0', 'CVE-2021-44228', 1)]
+
+    # v1 settings changed, v2 BOM changed, v3 is new
+    requests_mock.get(f"{project_url}/versions", json={'items': [
+        version('v1', '1.0', "2024-01-01T00:00:00.000Z", settings_update="2024-02-01T00:00:00.000Z", phase='RELEASED'),
+        version('v2', '2.0', "2024-02-01T00:00:00.000Z"), version('v3', '3.0', "2024-02-01T00:00:00.000Z")]})
+    v1, v2, v3 = (mock_bom(requests_mock, v, '2.17.1') for v in ('v1', 'v2', 'v3'))
+
+    assert MirrorSync(client, store).sync() == {'versions': 3, 'bom_updated': 2, 'settings_updated': 1, 'removed': 0, 'failed': 0}
+    assert not v1.called and v2.called and v3.called
+    rows = store.execute("SELECT v.version_name, v.phase, c.component_version_name FROM versions v "
+                         "JOIN components c USING (version_url) ORDER BY v.version_name")
+    assert [tuple(r) for r in rows] == [('1.0', 'RELEASED', '2.14.1'), ('2.0', 'DEVELOPMENT', '2.17.1'),
+                                        ('3.0', 'DEVELOPMENT', '2.17.1')]
+    assert store.last_run()['finished_at'] is not None
+
+
+def test_failed_versions_are_retried_and_deleted_versions_removed(requests_mock, client):
+    store = MirrorStore(':memory:')
+    requests_mock.get(f"{project_url}/versions", json={'items': [
+        version('v1', '1.0', "2024-01-01T00:00:00.000Z"), version('v2', '2.0', "2024-01-01T00:00:00.000Z")]})
+    mock_bom(requests_mock, 'v1')
+    requests_mock.get(f"{project_url}/versions/v2/components", status_code=404)
+
+    assert store.is_stale(3600)
+    assert MirrorSync(client, store).sync()['failed'] == 1
+    assert [r['version_name'] for r in store.execute("SELECT version_name FROM versions")] == ['1.0']
+    # the sync completed, the failed version is retried by the next one
+    assert not store.is_stale(3600) and store.last_finished_run()['failed'] == 1
+
+    requests_mock.get(f"{project_url}/versions", json={'items': [version('v2', '2.0', "2024-01-01T00:00:00.000Z")]})
+    v2 = mock_bom(requests_mock, 'v2')
+
+    assert MirrorSync(client, store).sync() == {'versions': 1, 'bom_updated': 1, 'settings_updated': 0, 'removed': 1, 'failed': 0}
+    assert v2.called
+    assert [r['version_name'] for r in store.execute("SELECT version_name FROM versions")] == ['2.0']
+    assert store.execute("SELECT count(*) FROM components")[0][0] == 1
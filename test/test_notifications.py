@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import requests
+
+from blackduck.Notifications import NotificationFeed
+
+fake_hub_host = "https://my-hub-host"
+notifications_url = f"{fake_hub_host}/api/notifications"
+
+
+def notification(notification_id, created_at, notification_type='VULNERABILITY'):
+    return {'type': notification_type, 'createdAt': created_at, '_meta': {'href': f"{notifications_url}/{notification_id}"}}
+
+
+def test_poll_dispatches_new_notifications_and_resumes_from_cursor(requests_mock, tmp_path):
+    state_file = str(tmp_path / "cursor.json")
+    n1 = notification("n1", "2024-01-01T10:00:00.000Z")
+    n2 = notification("n2", "2024-01-01T10:00:05.000Z")
+    n3 = notification("n3", "2024-01-01T10:00:05.000Z", 'RULE_VIOLATION')
+    n4 = notification("n4", "2024-01-01T10:00:09.000Z")
+    feed_request = requests_mock.get(notifications_url, [
+        {'json': {'items': [n2, n1, n3]}},
+        # startDate is inclusive, so the notifications at 10:00:05 come back
+        {'json': {'items': [n2, n3, n4]}},
+    ])
+
+    feed = NotificationFeed(requests.Session(), base_url=fake_hub_host, types=['VULNERABILITY', 'RULE_VIOLATION'], state_file=state_file)
+    handled = []
+    vulnerabilities = []
+    feed.add_handler(handled.append)
+    feed.add_handler(vulnerabilities.append, 'VULNERABILITY')
+
+    assert feed.poll() == 3
+    assert handled == [n1, n2, n3]
+    assert vulnerabilities == [n1, n2]
+    assert feed_request.last_request.qs['filter'] == ['notificationtype:vulnerability', 'notificationtype:rule_violation']
+    assert 'startdate' not in feed_request.last_request.qs
+
+    feed = NotificationFeed(requests.Session(), base_url=fake_hub_host, types=['VULNERABILITY', 'RULE_VIOLATION'], state_file=state_file)
+    feed.add_handler(handled.append)
+    assert feed.poll() == 1
+    assert handled[-1] == n4
+    assert feed_request.last_request.qs['startdate'] == ['2024-01-01t10:00:05.000z']
+
+
+def test_cursor_does_not_move_past_a_failed_handler(requests_mock):
+    n1 = notification("n1", "2024-01-01T10:00:00.000Z")
+    n2 = notification("n2", "2024-01-01T10:00:01.000Z")
+    requests_mock.get(notifications_url, json={'items': [n1, n2]})
+    feed = NotificationFeed(requests.Session(), base_url=fake_hub_host)
+
+    def fail_on_n2(n):
+        if n == n2:
+            raise RuntimeError("handler failed")
+    feed.add_handler(fail_on_n2)
+
+    try:
+        feed.poll()
+    except RuntimeError:
+        pass
+    assert feed.cursor == {'createdAt': n1['createdAt'], 'ids': [n1['_meta']['href']]}
+    assert feed.fetch() == [n2]
+
+
+def test_cursor_keeps_the_ids_of_an_instant_written_differently(requests_mock):
+    # the start date given as the cursor is the same instant as n1, written without milliseconds
+    n1 = notification("n1", "2024-01-01T10:00:00.000Z")
+    n2 = notification("n2", "2024-01-01T10:00:00Z")
+    requests_mock.get(notifications_url, [{'json': {'items': [n1]}}, {'json': {'items': [n1, n2]}}])
+    feed = NotificationFeed(requests.Session(), base_url=fake_hub_host, start_date="2024-01-01T10:00:00Z")
+    feed.add_handler(lambda n: None)
+
+    assert feed.poll() == 1
+    assert feed.poll() == 1
+    assert feed.cursor['ids'] == [n1['_meta']['href'], n2['_meta']['href']]
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+import requests
+
+from blackduck.PolicyOverride import PolicyOverrider
+
+fake_hub_host = "https://my-hub-host"
+api = f"{fake_hub_host}/api"
+version_url = f"{api}/projects/p-id/versions/v-id"
+
+
+def bom_component(name, version, policy_status):
+    href = f"{version_url}/components/{name}-id/versions/{version}-id"
+    return {'componentName': name, 'componentVersionName': version, 'policyStatus': policy_status, '_meta': {'href': href}}
+
+
+def mock_portfolio(requests_mock):
+    requests_mock.get(f"{api}/projects", json={'items': [{'name': 'p1', '_meta': {'href': f"{api}/projects/p-id"}}]})
+    requests_mock.get(f"{api}/projects/p-id/versions", json={'items': [{'versionName': '1.0', '_meta': {'href': version_url}}]})
+    bom = requests_mock.get(f"{version_url}/components", json={'totalCount': 2, 'items': [
+        bom_component('lodash', '4.17.21', 'IN_VIOLATION'), bom_component('zlib', '1.2', 'NOT_IN_VIOLATION')]})
+    lodash_url = f"{version_url}/components/lodash-id/versions/4.17.21-id"
+    status = requests_mock.get(f"{lodash_url}/policy-status", json={'approvalStatus': 'IN_VIOLATION', '_meta': {'links': [
+        {'rel': 'policy-rule', 'href': f"{api}/policy-rules/r-sec"}, {'rel': 'policy-rule', 'href': f"{api}/policy-rules/r-lic"}]}})
+    requests_mock.get(f"{api}/policy-rules", json={'totalCount': 2, 'items': [
+        {'name': 'No critical vulns', 'category': 'SECURITY', '_meta': {'href': f"{api}/policy-rules/r-sec"}},
+        {'name': 'No GPL', 'category': 'COMPONENT', '_meta': {'href': f"{api}/policy-rules/r-lic"}}]})
+    return lodash_url, bom, status
+
+
+def test_override_reads_each_bom_and_status_once(requests_mock):
+    lodash_url, bom, status = mock_portfolio(requests_mock)
+    rule_put = requests_mock.put(f"{lodash_url}/policy-rules/r-sec/policy-status")
+
+    results = PolicyOverrider(requests.Session(), base_url=fake_hub_host).override([
+        {'project': 'p1', 'version': '1.0', 'component': 'Lodash', 'component_version': '4.17.21', 'category': 'SECURITY'},
+        {'project': 'p1', 'version': '1.0', 'component': 'lodash', 'component_version': '4.17.21', 'rule': 'No critical vulns'},
+        {'project': 'p1', 'version': '1.0', 'component': 'zlib', 'component_version': '1.2'},
+        {'project': 'p1', 'version': '1.0', 'component': 'openssl', 'component_version': '3.0'},
+        {'project': 'p1', 'version': '2.0', 'component': 'lodash', 'component_version': '4.17.21'},
+    ], comment="approved")
+
+    assert [r['status'] for r in results] == ['overridden', 'overridden', 'not_in_violation', 'not_found', 'not_found']
+    assert results[0]['rules'] == ['No critical vulns']
+    assert (bom.call_count, status.call_count, rule_put.call_count) == (1, 1, 2)
+    assert rule_put.last_request.json()['comment'] == "approved"
+    assert rule_put.last_request.json()['approvalStatus'] == "IN_VIOLATION_OVERRIDDEN"
+
+
+def test_override_without_rule_filter_puts_component_status(requests_mock):
+    lodash_url, bom, status = mock_portfolio(requests_mock)
+    status_put = requests_mock.put(f"{lodash_url}/policy-status", [{'status_code': 200}])
+
+    results = PolicyOverrider(requests.Session(), base_url=fake_hub_host).override([
+        {'project': 'p1', 'version': '1.0', 'component': 'lodash', 'component_version': '4.17.21', 'comment': 'ok'}])
+
+    assert results[0]['status'] == 'overridden'
+    assert results[0]['rules'] == ['r-sec', 'r-lic']
+    assert status_put.last_request.json()['comment'] == 'ok'
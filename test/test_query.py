@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import pytest
+
+from blackduck.Mirror import MirrorStore
+
+fake_hub_host = "https://my-hub-host"
+
+
+@pytest.fixture()
+def store():
+    store = MirrorStore(':memory:')
+    project = {'name': 'p1', '_meta': {'href': f"{fake_hub_host}/api/projects/p-id"}}
+    store.upsert_projects([project])
+    for version_id, log4j, severity in (('v1', '2.9.1', 'CRITICAL'), ('v2', '2.17.1', 'LOW'), ('v3', '2.10.0', 'CRITICAL')):
+        url = f"{project['_meta']['href']}/versions/{version_id}"
+        components = [
+            {'componentName': 'Apache Log4J', 'componentVersionName': log4j, 'policyStatus': 'IN_VIOLATION',
+             'licenses': [{'licenseDisplay': 'Apache License 2.0'}], '_meta': {'href': f"{url}/components/log4j"}},
+            {'componentName': 'readline', 'componentVersionName': '8.0', 'policyStatus': 'NOT_IN_VIOLATION',
+             'licenses': [{'licenseDisplay': 'GPL 3.0'}], '_meta': {'href': f"{url}/components/readline"}},
+        ]
+        vulnerabilities = [{'componentName': 'Apache Log4J', 'componentVersionName': log4j, 'vulnerabilityWithRemediation': {
+            'vulnerabilityName': 'CVE-2021-44228', 'severity': severity, 'remediationStatus': 'NEW'}}]
+        store.replace_version(project, {'versionName': version_id.replace('v', '') + '.0', '_meta': {'href': url}},
+                              components, vulnerabilities, {'overallStatus': 'IN_VIOLATION'})
+    return store
+
+
+def test_filters(store):
+    old_log4j = store.query('components').filter(component_name='apache log4j', component_version_name__lt='2.17')
+    assert [r['component_version_name'] for r in old_log4j.order_by('component_version_name')] == ['2.9.1', '2.10.0']
+    assert old_log4j.count() == 2
+
+    critical = store.query('vulnerabilities').filter(vulnerability_name='CVE-2021-44228', severity__in=['CRITICAL', 'HIGH'])
+    assert [r['version_name'] for r in critical.order_by('-version_name').select('version_name')] == ['3.0', '1.0']
+
+    gpl = store.query('licenses').filter(license_name__contains='gpl').select('component_name', distinct=True).all()
+    assert gpl == [{'component_name': 'readline'}]
+    assert store.query('components').filter(policy_status__ne='IN_VIOLATION').first()['component_name'] == 'readline'
+
+
+
+def test_contains_and_startswith_match_wildcards_literally(store):
+    components = store.query('components')
+    assert components.filter(component_name__contains='%').count() == 0
+    assert components.filter(component_name__startswith='read_ine').count() == 0
+    assert components.filter(component_name__startswith='read').count() == 3
+    # like still takes a pattern
+    assert components.filter(component_name__like='read_ine').count() == 3
+
+    project = {'name': 'p2', '_meta': {'href': f"{fake_hub_host}/api/projects/p2-id"}}
+    store.upsert_projects([project])
+    url = f"{project['_meta']['href']}/versions/v1"
+    store.replace_version(project, {'versionName': '1.0', '_meta': {'href': url}}, [
+        {'componentName': '100%_pure\\lib', 'componentVersionName': '1.0', 'licenses': [], '_meta': {'href': f"{url}/components/pure"}}],
+        [], {'overallStatus': 'NOT_IN_VIOLATION'})
+    assert [r['component_name'] for r in components.filter(component_name__contains='0%_pure\\')] == ['100%_pure\\lib']
+
+def test_unknown_columns_are_rejected_and_indexes_used(store):
+    with pytest.raises(ValueError):
+        store.query('components').filter(**{'component_name; DROP TABLE components --': 'x'})
+    with pytest.raises(ValueError):
+        store.query('components').filter(component_name__near='x')
+
+    sql, parameters = store.query('components').filter(component_name='Apache Log4J').sql()
+    plan = ' '.join(row['detail'] for row in store.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+    assert 'components_name_version' in plan
+
+    # a version range is checked within the rows the name index selects
+    sql, parameters = store.query('components').filter(component_name='Apache Log4J', component_version_name__lt='2.17').sql()
+    plan = ' '.join(row['detail'] for row in store.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+    assert 'components_name_version (component_name=?)' in plan
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+import pytest
+import requests
+
+from blackduck.ReportManager import ReportCache, ReportManager
+
+fake_hub_host = "https://my-hub-host"
+
+
+def make_version(version_id, bom_updated=None):
+    href = f"{fake_hub_host}/api/projects/p-id/versions/{version_id}"
+    return {'versionName': version_id, 'lastBomUpdateDate': bom_updated, '_meta': {'href': href, 'links': [
+        {'rel': 'versionReport', 'href': f"{fake_hub_host}/api/versions/{version_id}/reports"}]}}
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    yield ReportManager(requests.Session(), max_pending=1, poll_interval=0, max_poll_interval=0, output_folder=str(tmp_path))
+
+
+def test_run_creates_polls_and_downloads(requests_mock, manager, tmp_path):
+    for version_id in ("v1", "v2"):
+        location = f"{fake_hub_host}/api/versions/{version_id}/reports/r-{version_id}"
+        requests_mock.post(f"{fake_hub_host}/api/projects/p-id/versions/{version_id}/sbom-reports", status_code=201, headers={'Location': location})
+        requests_mock.get(location, [
+            {'json': {'status': 'IN_PROGRESS'}},
+            {'json': {'status': 'COMPLETED', '_meta': {'links': [{'rel': 'download', 'href': location + "/download"}]}}},
+        ])
+        requests_mock.get(location + "/download", content=f"zip-{version_id}".encode())
+        manager.add_sbom_report(make_version(version_id), filename=f"{version_id}.zip")
+
+    results = manager.run()
+
+    assert [r['status'] for r in results] == ['COMPLETED', 'COMPLETED']
+    assert (tmp_path / "v1.zip").read_bytes() == b"zip-v1"
+    assert (tmp_path / "v2.zip").read_bytes() == b"zip-v2"
+    # with max_pending=1 the second report is only created once the first stopped generating
+    methods = [(r.method, r.path) for r in requests_mock.request_history]
+    assert methods.index(('POST', '/api/projects/p-id/versions/v2/sbom-reports')) > methods.index(('GET', '/api/versions/v1/reports/r-v1'))
+
+
+def test_run_reports_failed_reports(requests_mock, manager):
+    location = f"{fake_hub_host}/api/versions/v1/reports/r-v1"
+    requests_mock.post(f"{fake_hub_host}/api/versions/v1/reports", status_code=201, headers={'Location': location})
+    requests_mock.get(location, json={'status': 'FAILED'})
+    progress = []
+
+    manager.add_version_report(make_version("v1"), ['VERSION', 'COMPONENTS'])
+    results = manager.run(progress=progress.append)
+
+    assert results[0]['status'] == 'FAILED'
+    assert progress == results
+    assert requests_mock.request_history[0].json()['categories'] == ['VERSION', 'COMPONENTS']
+
+
+def test_add_version_report_validates_categories(manager):
+    with pytest.raises(AssertionError):
+        manager.add_version_report(make_version("v1"), ['NOT_A_CATEGORY'])
+
+
+def mock_version_report(requests_mock, version_id="v1", content=b"zip"):
+    location = f"{fake_hub_host}/api/versions/{version_id}/reports/r-{version_id}"
+    requests_mock.post(f"{fake_hub_host}/api/versions/{version_id}/reports", status_code=201, headers={'Location': location})
+    requests_mock.get(location, json={'status': 'COMPLETED', '_meta': {'links': [{'rel': 'download', 'href': location + "/download"}]}})
+    requests_mock.get(location + "/download", content=content)
+
+
+def test_cached_report_is_reused_while_bom_is_unchanged(requests_mock, tmp_path):
+    mock_version_report(requests_mock)
+    cache = ReportCache(str(tmp_path / "cache"))
+    def run(bom_updated, filename):
+        manager = ReportManager(requests.Session(), poll_interval=0, output_folder=str(tmp_path), cache=cache)
+        manager.add_version_report(make_version("v1", bom_updated), ['VERSION'], filename=filename)
+        return manager.run()[0]
+
+    first = run("2024-01-01T00:00:00.000Z", "first.zip")
+    second = run("2024-01-01T00:00:00.000Z", "second.zip")
+    third = run("2024-02-01T00:00:00.000Z", "third.zip")
+
+    assert (first['source'], second['source'], third['source']) == ('created', 'cache', 'created')
+    assert (tmp_path / "second.zip").read_bytes() == b"zip"
+    assert len([r for r in requests_mock.request_history if r.method == 'POST']) == 2
+
+
+def test_matching_server_report_is_downloaded_instead_of_created(requests_mock, tmp_path):
+    reports_url = f"{fake_hub_host}/api/versions/v1/reports"
+    existing = f"{reports_url}/existing"
+    other_reports = [{'status': 'COMPLETED', 'reportType': 'VERSION', 'reportFormat': 'JSON', 'categories': ['VERSION'],
+                      'createdAt': '2024-01-02T00:00:00.000Z'}] * 100
+    requests_mock.get(reports_url, [{'json': {'totalCount': 102, 'items': other_reports}}, {'json': {'totalCount': 102, 'items': [
+        # before the BOM update, although it sorts after it as a string
+        {'status': 'COMPLETED', 'reportType': 'VERSION', 'reportFormat': 'CSV', 'categories': ['VERSION'],
+         'createdAt': '2024-01-01T01:00:00.000+02:00', '_meta': {'href': reports_url + "/stale", 'links': []}},
+        {'status': 'COMPLETED', 'reportType': 'VERSION', 'reportFormat': 'CSV', 'categories': ['VERSION'],
+         'createdAt': '2024-01-02T00:00:00.000Z', '_meta': {'href': existing, 'links': [{'rel': 'download', 'href': existing + "/download"}]}},
+    ]}}])
+    requests_mock.get(existing + "/download", content=b"existing-zip")
+    manager = ReportManager(requests.Session(), poll_interval=0, output_folder=str(tmp_path), reuse_server_reports=True)
+
+    manager.add_version_report(make_version("v1", "2024-01-01T00:00:00.000Z"), ['VERSION'], filename="v1.zip")
+    result = manager.run()[0]
+
+    assert result['status'] == 'COMPLETED' and result['source'] == 'server'
+    assert (tmp_path / "v1.zip").read_bytes() == b"existing-zip"
+    assert result['location'] == existing
+    assert not any(r.method == 'POST' for r in requests_mock.request_history)
+
+
+def test_vuln_status_report_is_created_under_base_url(requests_mock, tmp_path):
+    location = f"{fake_hub_host}/api/vulnerability-status-reports/r-1"
+    create = requests_mock.post(f"{fake_hub_host}/api/vulnerability-status-reports", status_code=201, headers={'Location': location})
+    requests_mock.get(location, json={'status': 'COMPLETED', '_meta': {'links': [{'rel': 'download', 'href': location + "/download"}]}})
+    requests_mock.get(location + "/download", content=b"zip")
+    manager = ReportManager(requests.Session(), base_url=fake_hub_host + "/", poll_interval=0, output_folder=str(tmp_path))
+
+    request = manager.add_vuln_status_report(format="JSON")
+    manager.run()
+
+    assert request['status'] == 'COMPLETED'
+    assert create.last_request.json() == {'reportFormat': 'JSON', 'locale': 'en_US'}
+    assert create.last_request.headers['Content-Type'] == 'application/vnd.blackducksoftware.report-4+json'
+    assert (tmp_path / "vuln-status-report.zip").read_bytes() == b"zip"
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import io
+import json
+import zipfile
+
+import pytest
+import requests
+
+import blackduck.ReportReader
+from blackduck.ReportReader import ReportReader
+
+fake_hub_host = "https://my-hub-host"
+
+version_report = {
+    'aggregateBomViewEntries': [{'componentName': 'a', 'overallScore': 7.5}, {'componentName': 'b'}],
+    'detailedFileBomViewEntries': [{'path': 'src/a.c'}],
+}
+
+
+def make_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('report/version-v1.json', json.dumps(version_report))
+        zf.writestr('report/source_1.csv', "\ufeffpath,match\nsrc/a.c,EXACT\nsrc/b.c,SNIPPET\n")
+        zf.writestr('report/source_2.csv', "path,match\nsrc/c.c,EXACT\n")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_iter_json_from_url(requests_mock, monkeypatch, use_ijson):
+    if use_ijson:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(blackduck.ReportReader, 'ijson', None)
+    url = f"{fake_hub_host}/api/reports/r-id"
+    requests_mock.get(url, content=make_zip())
+
+    with ReportReader.from_url(requests.Session(), url, spool_size=16) as report:
+        entries = list(report.iter_json('aggregateBomViewEntries.item', pattern=r'version.+\.json$'))
+        paths = [entry['path'] for entry in report.iter_json('detailedFileBomViewEntries.item')]
+
+    assert entries == version_report['aggregateBomViewEntries']
+    assert type(entries[0]['overallScore']) is float
+    assert paths == ['src/a.c']
+    assert requests_mock.last_request.headers['Accept'] == 'application/zip'
+
+
+def test_iter_csv_reads_all_matching_members(tmp_path):
+    pathname = tmp_path / "report.zip"
+    pathname.write_bytes(make_zip())
+
+    with ReportReader(str(pathname)) as report:
+        assert report.names(r'\.csv$') == ['report/source_1.csv', 'report/source_2.csv']
+        rows = list(report.iter_csv(pattern=r'source.*\.csv$'))
+        assert report.load_json() == version_report
+
+    assert rows == [
+        {'path': 'src/a.c', 'match': 'EXACT'},
+        {'path': 'src/b.c', 'match': 'SNIPPET'},
+        {'path': 'src/c.c', 'match': 'EXACT'},
+    ]
+
+
+def test_missing_member_raises():
+    with ReportReader(make_zip()) as report:
+        with pytest.raises(KeyError):
+            report.load_json(pattern=r'notices')
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from blackduck.Rollup import RiskProfiles, risk_counts
+
+
+def profile(critical, high, license_high=0, **labels):
+    return dict({'categories': {'SECURITY': {'CRITICAL': critical, 'HIGH': high, 'LOW': 1},
+                                'LICENSE': {'HIGH': license_high}}}, **labels)
+
+
+@pytest.fixture()
+def profiles():
+    return RiskProfiles.from_records([
+        profile(1, 2, project_name='p1', version_name='1.0', version_url='v1', phase='RELEASED', tags=['web']),
+        profile(0, 0, license_high=1, project_name='p1', version_name='2.0', version_url='v2', phase='DEVELOPMENT', tags=['web']),
+        profile(0, 3, project_name='p2', version_name='1.0', version_url='v3', phase='RELEASED', tags=['web', 'payments']),
+        profile(0, 0, project_name='p3', version_name='1.0', version_url='v4', phase='RELEASED'),
+    ], timestamp='2024-07-01T00:00:00Z')
+
+
+def test_risk_counts_of_both_profile_formats():
+    component = {'securityRiskProfile': {'counts': [{'countType': 'HIGH', 'count': 2}, {'countType': 'OK', 'count': 1}]}}
+    assert risk_counts(component)[:6] == [0, 2, 0, 0, 1, 0]
+    assert risk_counts(profile(1, 2, license_high=3))[:8] == [1, 2, 0, 1, 0, 0, 0, 3]
+
+
+def test_rollups(profiles):
+    by_project = profiles.rollup(by='project_name')
+    assert [(r['project_name'], r['versions'], r['CRITICAL'], r['HIGH'], r['LOW'], r['at_risk']) for r in by_project] == [
+        ('p1', 2, 1, 2, 2, 1), ('p2', 1, 0, 3, 1, 1), ('p3', 1, 0, 0, 1, 0)]
+
+    by_tag = profiles.rollup(by=['tags', 'phase'], risk=None)
+    assert [(r['tags'], r['phase'], r['versions'], r['SECURITY_HIGH'], r['LICENSE_HIGH']) for r in by_tag] == [
+        ('payments', 'RELEASED', 1, 3, 0), ('web', 'DEVELOPMENT', 1, 0, 1), ('web', 'RELEASED', 2, 5, 0)]
+
+    assert profiles.rollup(by=None)[0]['HIGH'] == 5
+    with pytest.raises(ValueError):
+        profiles.rollup(by='owner')
+
+
+def test_trend_counts_each_version_once_per_period(profiles, tmp_path):
+    later = RiskProfiles.from_records([
+        profile(0, 1, project_name='p1', version_name='1.0', version_url='v1', phase='RELEASED', tags=['web']),
+    ], timestamp='2024-07-15T00:00:00Z')
+    next_month = RiskProfiles.from_records([
+        profile(0, 0, project_name='p1', version_name='1.0', version_url='v1', phase='RELEASED', tags=['web']),
+    ], timestamp='2024-08-02T00:00:00Z')
+    path = str(tmp_path / "risk.npz")
+    RiskProfiles.concatenate([profiles, later, next_month]).save(path)
+    history = RiskProfiles.load(path)
+
+    trend = history.trend(by='project_name')
+    assert [(r['period'], r['project_name'], r['CRITICAL'], r['HIGH']) for r in trend] == [
+        ('2024-07-01', 'p1', 0, 1), ('2024-07-01', 'p2', 0, 3), ('2024-07-01', 'p3', 0, 0), ('2024-08-01', 'p1', 0, 0)]
+    assert history.tags[2] == ['web', 'payments']
+
+
+def test_weekly_trend_starts_on_monday_and_keeps_versions_without_url():
+    # 2024-07-01 was a Monday, 2024-07-07 the Sunday of the same week
+    history = RiskProfiles.concatenate([
+        RiskProfiles.from_records([profile(1, 0, project_name='p1', version_url='v1'),
+                                   profile(0, 1, project_name='p1'), profile(0, 1, project_name='p1')],
+                                  timestamp=timestamp)
+        for timestamp in ('2024-07-01T08:00:00Z', '2024-07-07T20:00:00Z', '2024-07-08T08:00:00Z')])
+
+    trend = history.trend(period='week')
+    assert [(r['period'], r['versions'], r['CRITICAL'], r['HIGH']) for r in trend] == [
+        ('2024-07-01', 5, 1, 4), ('2024-07-08', 3, 1, 2)]
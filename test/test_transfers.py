@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+import json
+import os
+
+import pytest
+import requests
+
+from blackduck.Transfers import ScanDownloader, sha256_of_file
+
+scan_url = "https://my-hub-host/api/scan/data/12345678-aaaa-bbbb-cccc-123456789012/scan.bdio"
+
+
+@pytest.fixture()
+def downloader():
+    yield ScanDownloader(requests.Session(), max_workers=2, chunk_size=4)
+
+
+def test_download_writes_file_and_manifest(requests_mock, downloader, tmp_path):
+    requests_mock.get(scan_url, content=b"0123456789")
+    pathname = str(tmp_path / "scan.bdio")
+
+    result = downloader.download(scan_url, pathname)
+
+    assert result['status'] == 'downloaded'
+    assert result['bytes'] == 10
+    assert open(pathname, 'rb').read() == b"0123456789"
+    assert not os.path.exists(pathname + ScanDownloader.PARTIAL_SUFFIX)
+    manifest = json.load(open(tmp_path / ScanDownloader.MANIFEST_NAME))
+    assert manifest['scan.bdio'] == {'url': scan_url, 'size': 10, 'sha256': sha256_of_file(pathname)}
+
+
+def test_download_skips_complete_files(requests_mock, downloader, tmp_path):
+    requests_mock.get(scan_url, content=b"0123456789")
+    pathname = str(tmp_path / "scan.bdio")
+    downloader.download(scan_url, pathname)
+
+    result = ScanDownloader(requests.Session(), verify_hash=True).download(scan_url, pathname)
+
+    assert result['status'] == 'skipped'
+    assert requests_mock.call_count == 1
+
+
+def test_download_resumes_partial_file(requests_mock, downloader, tmp_path):
+    requests_mock.get(scan_url, content=b"56789", status_code=206, headers={'Content-Range': 'bytes 5-9/10'})
+    pathname = str(tmp_path / "scan.bdio")
+    with open(pathname + ScanDownloader.PARTIAL_SUFFIX, 'wb') as f:
+        f.write(b"01234")
+
+    result = downloader.download(scan_url, pathname)
+
+    assert result['status'] == 'resumed'
+    assert requests_mock.last_request.headers['Range'] == 'bytes=5-'
+    assert open(pathname, 'rb').read() == b"0123456789"
+
+
+def test_download_all_reports_failures(requests_mock, downloader, tmp_path):
+    other_url = scan_url.replace("scan.bdio", "other.bdio")
+    requests_mock.get(scan_url, content=b"0123456789")
+    requests_mock.get(other_url, status_code=404)
+    jobs = [(scan_url, str(tmp_path / "a" / "scan.bdio")), (other_url, str(tmp_path / "a" / "other.bdio"))]
+
+    results = downloader.download_all(jobs)
+
+    assert [r['status'] for r in results] == ['downloaded', 'failed']
+
+
+upload_url = "https://my-hub-host/api/scan/data"
+
+
+@pytest.fixture()
+def uploader():
+    pytest.importorskip("requests_toolbelt")
+    from blackduck.Transfers import ScanUploader
+    yield ScanUploader(requests.Session(), url=upload_url, max_workers=2, backoff_factor=0)
+
+
+def test_scan_mime_type(tmp_path):
+    from blackduck.Transfers import scan_mime_type
+    sbom = tmp_path / "sbom.json"
+    sbom.write_text(json.dumps({'bomFormat': 'CycloneDX'}))
+    jsonld = tmp_path / "scan.jsonld"
+    jsonld.write_text("{}")
+
+    assert scan_mime_type(str(sbom)) == 'application/vnd.cyclonedx'
+    assert scan_mime_type(str(jsonld)) == 'application/ld+json'
+    assert scan_mime_type("scan.bdio") == 'application/vnd.blackducksoftware.bdio+zip'
+    with pytest.raises(ValueError):
+        scan_mime_type("scan.txt")
+
+
+def test_upload_streams_multipart_and_retries(requests_mock, uploader, tmp_path):
+    bodies = []
+    def read_body(request, context):
+        bodies.append(request.body.read())
+        return ""
+    requests_mock.post(upload_url, [{'status_code': 503, 'text': read_body}, {'status_code': 201, 'text': read_body}])
+    scan = tmp_path / "scan.bdio"
+    scan.write_bytes(b"bdio-content")
+
+    result = uploader.upload(str(scan), fields={'projectName': 'p', 'versionName': 'v'})
+
+    assert result['status'] == 'uploaded'
+    assert result['attempts'] == 2
+    assert requests_mock.last_request.headers['Content-Type'].startswith('multipart/form-data')
+    # the file is re-read from disk for the retry
+    assert len(bodies) == 2 and all(b"bdio-content" in body and b'name="projectName"' in body for body in bodies)
+
+
+def test_upload_all_reports_failures(requests_mock, uploader, tmp_path):
+    requests_mock.post(upload_url, status_code=400)
+    scan = tmp_path / "scan.bdio"
+    scan.write_bytes(b"bdio-content")
+
+    results = uploader.upload_all([str(scan)])
+
+    assert results[0]['status'] == 'failed'
+    assert results[0]['attempts'] == 1
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+from datetime import datetime, timedelta, timezone
+
+import blackduck.Utils
+
+import requests
+
+from blackduck.Utils import (filter_by_date, get_link, get_paged_items, iso8601_timespan, iso8601_to_date, parse_iso8601,
+                             parse_iso8601_all, to_iso8601)
+
+
+def test_parse_iso8601():
+    assert parse_iso8601("2024-07-01T10:11:12.345Z") == datetime(2024, 7, 1, 10, 11, 12, 345000, tzinfo=timezone.utc)
+    assert parse_iso8601("2024-07-01T12:11:12.345+02:00") == datetime(2024, 7, 1, 10, 11, 12, 345000, tzinfo=timezone.utc)
+    # not ISO-8601, dateutil's turn
+    assert parse_iso8601("July 1 2024") == datetime(2024, 7, 1)
+    assert parse_iso8601_all(["2024-07-01T10:11:12Z", None]) == [datetime(2024, 7, 1, 10, 11, 12, tzinfo=timezone.utc), None]
+    assert to_iso8601(datetime(2024, 7, 1, 12, 11, 12, 345678, tzinfo=timezone(timedelta(hours=2)))) == "2024-07-01T10:11:12.345Z"
+
+
+def test_parse_iso8601_without_fromisoformat(monkeypatch):
+    # python 3.6
+    monkeypatch.setattr(blackduck.Utils, '_fromisoformat', None)
+    assert parse_iso8601("2024-07-01T10:11:12.345Z") == datetime(2024, 7, 1, 10, 11, 12, 345000, tzinfo=timezone.utc)
+    assert parse_iso8601("2024-07-01T12:11:12.345+02:00") == datetime(2024, 7, 1, 10, 11, 12, 345000, tzinfo=timezone.utc)
+
+
+def test_iso8601_to_date_with_zone():
+    assert iso8601_to_date("2024-07-01T10:11:12.345Z") == datetime(2024, 7, 1, 10, 11, 12, 345000)
+    assert iso8601_to_date("2024-07-01T10:11:12.345Z", with_zone=True).tzinfo == timezone.utc
+    assert iso8601_to_date("2024-07-01T10:11:12+02:00", with_zone=True).utcoffset() == timedelta(hours=2)
+
+
+def test_iso8601_timespan_ends_now():
+    timestamps = list(iso8601_timespan(days_ago=14))
+    assert len(timestamps) == 2
+    assert datetime.now(timezone.utc).replace(tzinfo=None) - datetime.fromisoformat(timestamps[-1]) < timedelta(days=7, minutes=1)
+
+
+def test_filter_by_date():
+    items = [
+        {'name': 'a', 'createdAt': "2024-06-30T23:59:59.999Z"},
+        {'name': 'b', 'createdAt': "2024-07-01T00:00:00.000Z"},
+        {'name': 'c', 'createdAt': "2024-07-01T03:00:00+02:00"},  # 01:00 UTC, parsed
+        {'name': 'd', 'createdAt': "2024-07-01T10:11:12.345Z"},
+        {'name': 'e'},
+    ]
+    in_range = filter_by_date(items, start="2024-07-01T00:00:00Z", end=datetime(2024, 7, 1, 10, 11, 12, 345500))
+    assert [i['name'] for i in in_range] == ['b', 'c', 'd']
+    assert [i['name'] for i in filter_by_date(items, end="2024-07-01T10:11:12.345Z")] == ['a', 'b', 'c']
+
+
+def test_get_link_and_paged_items(requests_mock):
+    url = "https://my-hub-host/api/projects"
+    assert get_link({'_meta': {'links': [{'rel': 'versions', 'href': url + "/p/versions"}]}}, 'versions') == url + "/p/versions"
+    assert get_link({'name': 'no links'}, 'versions') is None
+
+    pages = requests_mock.get(url, [{'json': {'totalCount': 4, 'items': [1, 2]}}, {'json': {'totalCount': 4, 'items': [3, 4]}}])
+    assert list(get_paged_items(requests.Session(), url, {'q': 'name:p'}, page_size=2)) == [1, 2, 3, 4]
+    # the total count says there is no third page
+    assert pages.call_count == 2
+    assert pages.last_request.qs == {'q': ['name:p'], 'offset': ['2'], 'limit': ['2']}
+
+    pages = requests_mock.get(url, [{'json': {'totalCount': 3, 'items': [1, 2]}}, {'json': {'totalCount': 3, 'items': [3]}}])
+    assert list(get_paged_items(requests.Session(), url, page_size=2, prefetch=True)) == [1, 2, 3]
+    assert pages.call_count == 2